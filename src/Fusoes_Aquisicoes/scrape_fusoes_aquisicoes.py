@@ -1,43 +1,116 @@
 # Autor: Karinne Cristina
 # Data: 2025-02-19
 # Descrição: Script para extração de notícias do site Fusões & Aquisições e salvamento no banco de dados.
+import argparse
 import logging
 import os
+import re
 import sys
-import locale
-from datetime import datetime
-from typing import List, Optional
-
-import cloudscraper
-import psycopg2
-from bs4 import BeautifulSoup
-from psycopg2.extras import execute_values
+from datetime import date
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 # Adiciona o caminho do diretório src para importar módulos personalizados
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
 from config.db_connection import DatabaseConnection
-
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("fusoes_aquisicoes.log"), logging.StreamHandler()]
-)
+from config.migrations import apply_migration
+from common.bulk_loader import bulk_upsert
+from common.checkpoint import Checkpoint, CheckpointMark, CrawlCheckpoint
+from common.content_hash import HashedTable
+from common.crawl_state import CrawlState, HighWaterMark
+from common.dates import parse_iso_date, parse_long_date
+from common.delimited_text import extract_delimited_text
+from common.html_parser import Strainer, make_soup
+from common.http_client import HttpClient, get_client
+from common.known_items import KnownItems
+from common.metrics import metrics
+from common.near_duplicates import CLUSTER_COLUMN, DEDUP_TABLES, NearDuplicateIndex
+from common.pipeline import DEFAULT_BATCH_SIZE, stream_to_postgres
+from common.replay import DEFAULT_WORKERS, replay_pages
+from common.search import SEARCH_INDEXES
 
 # Constantes globais
 BASE_URL: str = 'https://fusoesaquisicoes.com/destaques-do-dia/page/'
-DATA_LIMIT: datetime.date = datetime(2023, 12, 30).date()
+DATA_LIMIT: date = date(2023, 12, 30)
 MAX_PAGES: int = 1
 TABLE_NAME: str = "fusoes_aquisicoes"
-locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
+TABLE_SPEC = HashedTable(
+    TABLE_NAME,
+    columns=("titulo", "resumo", "data"),
+    key_columns=("titulo", "data"),
+    content_columns=("resumo",),
+    legacy_constraint="unique_news_fusoes",
+    reset_columns=(CLUSTER_COLUMN,),
+)
+ARTICLE_CACHE_TTL: int = 30 * 24 * 3600  # corpo dos artigos não muda após publicado
+CONTENT_CLASS: str = 'content post-excerpt entry-content clearfix'
+START_DELIMITER: str = "INSIGHT DO DIA: Humores & Rumores"
+END_DELIMITER: str = "Saiba quais são as mais recentespostagens de humores e rumoresdo mercado"
+CONTENT_CHUNK_SIZE: int = 16 * 1024  # caracteres de HTML entregues por vez ao extrator em streaming
+# Apenas os elementos usados em cada página são montados pelo parser
+CONTENT_STRAINER = Strainer('div', class_=CONTENT_CLASS)
+ARTICLE_STRAINER = Strainer('article')
+
+
+def _create_cloudscraper_session():
+    """Importa o cloudscraper só ao criar a sessão; é a dependência mais lenta de importar entre os scrapers."""
+    import cloudscraper
+
+    return cloudscraper.create_scraper()
+
 
 class NewsScraper:
-    def __init__(self, base_url: str, max_pages: int = MAX_PAGES) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        max_pages: int = MAX_PAGES,
+        incremental: bool = True,
+        skip_known: bool = True,
+        streaming_extraction: bool = True,
+        update_changed: bool = False,
+        http: Optional[HttpClient] = None,
+    ) -> None:
+        """
+        :param streaming_extraction: Extrai o corpo dos artigos durante o parsing, guardando apenas o texto
+            entre os delimitadores; com False, monta a árvore com o BeautifulSoup.
+        :param update_changed: Regrava as notícias já existentes cujo corpo mudou (desativa skip_known,
+            já que o corpo só é conhecido após baixar o artigo).
+        :param http: Cliente HTTP (padrão: o compartilhado com a sessão do cloudscraper; na reprodução,
+            um ArchiveClient).
+        """
         self.base_url = base_url
+        self.streaming_extraction = streaming_extraction
         self.max_pages = max_pages
         self.news: List[List[str]] = []
-        self.scraper = cloudscraper.create_scraper()
+        self.stop_crawl = False
+        self._newest: Optional[Tuple[date, str]] = None
+        self.http = http or get_client("cloudscraper", session_factory=_create_cloudscraper_session)
+        self.http.set_cache_policy(r"^https://fusoesaquisicoes\.com/(?!destaques-do-dia/)", ARTICLE_CACHE_TTL)
+        self.incremental = incremental
+        self.skip_known = skip_known
+        self.update_changed = update_changed
+        # Preenchidos por _prepare_database no primeiro acesso ao banco
+        self.crawl_state: Optional[CrawlState] = None
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        self.high_water_mark = HighWaterMark()
+        self.known_items: Optional[KnownItems] = None
+        # Definido apenas no modo --stream, em que cada página é gravada antes de o checkpoint avançar
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+
+    def _prepare_database(self) -> None:
+        """
+        Cria/atualiza a tabela e lê o estado da coleta no primeiro acesso ao banco, e não no construtor,
+        para que instanciar o scraper não abra conexões.
+        """
+        if self.crawl_state is not None:
+            return
         self._setup_database()
+        self.crawl_state = CrawlState(TABLE_NAME)
+        self.near_duplicates = NearDuplicateIndex()
+        if self.incremental:
+            self.high_water_mark = self.crawl_state.get()
+        if self.skip_known and not self.update_changed:
+            self.known_items = KnownItems(TABLE_NAME, ["titulo", "data"])
 
     def _setup_database(self) -> None:
         """Cria a tabela no banco de dados se não existir."""
@@ -51,120 +124,333 @@ class NewsScraper:
         );
         """
         try:
-            with DatabaseConnection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(create_table_query)
-                    conn.commit()
+            apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+        except Exception as e:
+            logging.error(f"Erro ao configurar banco de dados: {e}")
+            return
+        # Migração opcional: uma falha aqui não pode impedir as seguintes
+        try:
+            apply_migration(f"{TABLE_NAME}_0002_comprime_resumo", self._compress_resumo)
+        except Exception as e:
+            logging.warning(f"Compressão lz4 da coluna resumo não aplicada: {e}")
+        try:
+            apply_migration(f"{TABLE_NAME}_0003_hash_conteudo", TABLE_SPEC.migration)
+            apply_migration(f"{TABLE_NAME}_0004_busca_textual", SEARCH_INDEXES[TABLE_NAME].migration)
+            apply_migration(f"{TABLE_NAME}_0005_cluster_id", DEDUP_TABLES[TABLE_NAME].migration)
+            apply_migration(f"{TABLE_NAME}_0006_atualizado_em", TABLE_SPEC.updated_at_migration)
             logging.info(f"Tabela {TABLE_NAME} verificada/criada com sucesso.")
         except Exception as e:
             logging.error(f"Erro ao configurar banco de dados: {e}")
 
-    def extract_full_content(self, article_url: str) -> str:
-        """Extrai o conteúdo completo de um artigo."""
-        try:
-            response = self.scraper.get(article_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            content = soup.find('div', class_='content post-excerpt entry-content clearfix')
+    @staticmethod
+    def _compress_resumo(cursor) -> None:
+        """
+        Os resumos diários são longos; lz4 comprime e descomprime mais rápido que o pglz padrão.
+        Só existe no PostgreSQL 14+ compilado com lz4; nos demais servidores a coluna continua com pglz.
+        """
+        cursor.execute(
+            "SELECT 1 FROM pg_settings WHERE name = 'default_toast_compression' AND 'lz4' = ANY(enumvals)"
+        )
+        if cursor.fetchone() is None:
+            logging.info("Servidor sem suporte a lz4; a coluna resumo continua com a compressão padrão.")
+            return
+        cursor.execute(f"ALTER TABLE {TABLE_NAME} ALTER COLUMN resumo SET COMPRESSION lz4;")
 
-            if content:
-                full_text = content.get_text(strip=True)
-                start_delimiter = "INSIGHT DO DIA: Humores & Rumores"
-                end_delimiter = "Saiba quais são as mais recentespostagens de humores e rumoresdo mercado"
+    def extract_full_content(self, article_url: str) -> Optional[str]:
+        """
+        Extrai o conteúdo completo de um artigo.
 
-                if start_delimiter in full_text:
-                    full_text = full_text.split(start_delimiter, 1)[-1]
-                full_text = full_text.split(end_delimiter)[0]
+        :return: Texto do artigo, "Conteúdo não encontrado" se a página não tem a div do conteúdo,
+            ou None se a página não pôde ser lida (erro HTTP; na reprodução, artigo não arquivado).
+        """
+        try:
+            response = self.http.get(article_url)
+            response.raise_for_status()
+            if self.streaming_extraction:
+                full_text = self._extract_streaming(response)
             else:
+                full_text = self._extract_soup(response.text)
+
+            if full_text is None:
                 logging.warning("Conteúdo não encontrado na div com a classe especificada.")
                 return "Conteúdo não encontrado"
-
             return full_text
         except Exception as e:
             logging.error(f"Erro ao acessar o artigo {article_url}: {e}")
-            return ""
+            return None
+
+    def _extract_streaming(self, response) -> Optional[str]:
+        """Entrega o HTML em pedaços ao extrator, que para no delimitador final sem montar a árvore."""
+        response.encoding = response.encoding or response.apparent_encoding
+        with metrics.timer("parse"):
+            return extract_delimited_text(
+                response.iter_content(CONTENT_CHUNK_SIZE, decode_unicode=True),
+                'div', CONTENT_CLASS, START_DELIMITER, END_DELIMITER,
+            )
+
+    def _extract_soup(self, html: str) -> Optional[str]:
+        """Extrai o texto entre os delimitadores a partir da árvore montada pelo BeautifulSoup."""
+        soup = make_soup(html, CONTENT_STRAINER)
+        content = soup.find('div', class_=CONTENT_CLASS)
+        if not content:
+            return None
+
+        full_text = content.get_text(strip=True)
+        if START_DELIMITER in full_text:
+            full_text = full_text.split(START_DELIMITER, 1)[-1]
+        return full_text.split(END_DELIMITER)[0]
 
     def extract_data(self, url: str) -> Optional[List[List[str]]]:
         """Extrai os dados das notícias da página fornecida."""
         try:
-            response = self.scraper.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            articles = soup.find_all('article')
+            metrics.incr("pages")
+            data = self.parse_listing(response.text)
+            return data if data else None
+        except Exception as e:
+            logging.error(f'Erro ao acessar a página {url}: {e}')
+            return None
+
+    def parse_listing(self, html: str, keep_unread: bool = True) -> List[List[str]]:
+        """
+        Extrai resumo, corpo completo e data das notícias de uma página de destaques.
 
-            data: List[List[str]] = []
-            for article in articles:
-                summary_element = article.find('div', class_='post-excerpt')
-                date_element = article.find('time', class_='entry-date')
-                link_element = article.find('a', href=True)
+        :param keep_unread: Mantém, com o corpo vazio, as notícias cujo artigo não pôde ser lido; caso
+            contrário elas são descartadas.
+        """
+        soup = make_soup(html, ARTICLE_STRAINER)
+        articles = soup.find_all('article')
 
-                if not summary_element or not date_element or not link_element:
-                    continue
+        data: List[List[str]] = []
+        for article in articles:
+            summary_element = article.find('div', class_='post-excerpt')
+            date_element = article.find('time', class_='entry-date')
+            link_element = article.find('a', href=True)
+
+            if not summary_element or not date_element or not link_element:
+                continue
+
+            summary = summary_element.get_text(strip=True)
+            date_str = date_element.get_text(strip=True)
+            article_link = link_element['href']
+
+            publish_date = parse_long_date(date_str)
+            if publish_date is None:
+                logging.error(f'Erro ao processar a data: {date_str}')
+                continue
 
-                summary = summary_element.get_text(strip=True)
-                date_str = date_element.get_text(strip=True)
-                article_link = link_element['href']
+            if publish_date <= DATA_LIMIT:
+                logging.info(f"Encontrada notícia com data anterior ao limite ({DATA_LIMIT}). Parando a extração.")
+                self.stop_crawl = True
+                break
+
+            if article_link == self.high_water_mark.url or (
+                self.high_water_mark.data and publish_date < self.high_water_mark.data
+            ):
+                logging.info("Encontrada notícia já ingerida em execução anterior. Parando a extração.")
+                self.stop_crawl = True
+                break
 
-                try:
-                    publish_date = datetime.strptime(date_str, '%d de %B de %Y').date()
-                except ValueError:
-                    logging.error(f'Erro ao processar a data: {date_str}')
+            if self._newest is None:
+                self._newest = (publish_date, article_link)
+
+            if self.known_items is not None and (summary, publish_date) in self.known_items:
+                logging.info(f"Notícia já existente no banco, ignorando: {article_link}")
+                continue
+            full_text = self.extract_full_content(article_link)
+            if full_text is None:
+                if not keep_unread:
+                    logging.warning(f"Artigo não lido, notícia descartada: {article_link}")
                     continue
+                full_text = ""
+            data.append([summary, full_text, publish_date])
+            metrics.incr("articles")
+        return data
 
-                if publish_date <= DATA_LIMIT:
-                    logging.info(f"Encontrada notícia com data anterior ao limite ({DATA_LIMIT}). Parando a extração.")
-                    return None
+    def parse_archived_listing(self, response) -> List[List[str]]:
+        """
+        Extrai as notícias de uma versão arquivada dos destaques (usado pelos processos da reprodução).
 
-                full_text = self.extract_full_content(article_link)
-                data.append([summary, full_text, publish_date])
+        As notícias cujo artigo não foi arquivado são descartadas: gravadas com o corpo vazio, sobrescreveriam
+        o resumo já coletado, já que a reprodução regrava as linhas que mudaram.
+        """
+        return self.parse_listing(response.text, keep_unread=False)
 
-            return data if data else None
-        except Exception as e:
-            logging.error(f'Erro ao acessar a página {url}: {e}')
-            return None
+    def save_to_postgres(self) -> Tuple[int, int]:
+        """
+        Salva os dados extraídos no banco de dados.
 
-    def save_to_postgres(self) -> None:
-        """Salva os dados extraídos no banco de dados."""
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
         if not self.news:
             logging.info("Nenhum artigo para salvar no banco de dados.")
-            return
-        insert_query = f"""
-        INSERT INTO {TABLE_NAME} (titulo, resumo, data)
-        VALUES %s
-        ON CONFLICT (titulo, data) DO NOTHING;
-        """
+            return 0, 0
         try:
             with DatabaseConnection() as conn:
-                with conn.cursor() as cursor:
-                    execute_values(cursor, insert_query, self.news)
-                    conn.commit()
+                inserted, skipped = bulk_upsert(
+                    conn, TABLE_NAME, TABLE_SPEC.stored_columns, TABLE_SPEC.with_hashes(self.news),
+                    **TABLE_SPEC.upsert_options(self.update_changed),
+                )
             logging.info("Dados inseridos no banco de dados com sucesso.")
+            self.near_duplicates.assign([TABLE_NAME])
+            if self._newest:
+                self.crawl_state.update(*self._newest)
+            return inserted, skipped
         except Exception as e:
             logging.error(f"Erro ao inserir dados no banco de dados: {e}")
+            return 0, 0
+
+    def iter_news(self, start_page: int = 1) -> Iterator[Union[List[str], CheckpointMark]]:
+        """
+        Gera as notícias de cada página assim que ela é processada, sem acumulá-las.
 
-    def run(self) -> None:
-        """Executa o scraper para coletar e armazenar as notícias."""
-        self.news = []
-        for page in range(1, self.max_pages + 1):
+        Com checkpoint ativo, gera também um CheckpointMark ao fim de cada página.
+        """
+        self._prepare_database()
+        for page in range(start_page, self.max_pages + 1):
             page_url = f'{self.base_url}{page}/'
             data = self.extract_data(page_url)
 
             if data is None:
                 break
 
-            self.news.extend(data)
+            yield from data
             logging.info(f'Página {page} processada.')
 
+            if self.stop_crawl:
+                break
+
+            if self.checkpoint is not None:
+                yield CheckpointMark(self._checkpoint_position(page), (f'{self.base_url}{page + 1}/',))
+
+    def _checkpoint_position(self, page: int) -> Dict[str, Any]:
+        """Posição salva ao concluir uma página: a própria página e a notícia mais recente vista até ela."""
+        newest = [self._newest[0].isoformat(), self._newest[1]] if self._newest else None
+        return {"pagina": page, "mais_recente": newest}
+
+    def _restore_checkpoint(self, checkpoint: Optional[Checkpoint]) -> int:
+        """
+        Restaura a notícia mais recente vista antes da interrupção, para que a marca d'água não regrida.
+
+        :return: Página em que a coleta continua.
+        """
+        if checkpoint is None:
+            logging.info("Nenhum checkpoint encontrado. A coleta começa pela primeira página.")
+            return 1
+        newest = checkpoint.posicao.get("mais_recente")
+        if newest:
+            self._newest = (parse_iso_date(newest[0]), newest[1])
+        logging.info(f"Retomando a coleta a partir da página {checkpoint.posicao['pagina'] + 1}.")
+        return checkpoint.posicao["pagina"] + 1
+
+    def stream_to_postgres(self, batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = False) -> Tuple[int, int]:
+        """
+        Coleta e grava as notícias em lotes de tamanho fixo, sem acumulá-las em memória.
+
+        A cada página concluída e gravada, o número da página é salvo como checkpoint.
+
+        :param batch_size: Quantidade de notícias por lote gravado.
+        :param resume: Continua a partir da página seguinte à do último checkpoint.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        try:
+            self._prepare_database()
+            self.checkpoint = CrawlCheckpoint(TABLE_NAME)
+            if resume:
+                start_page = self._restore_checkpoint(self.checkpoint.load())
+            else:
+                self.checkpoint.clear()
+                start_page = 1
+            inserted, skipped = stream_to_postgres(
+                TABLE_SPEC.with_hashes(self.iter_news(start_page)), TABLE_NAME, TABLE_SPEC.stored_columns,
+                batch_size=batch_size, checkpoint=self.checkpoint, **TABLE_SPEC.upsert_options(self.update_changed),
+            )
+            self.near_duplicates.assign([TABLE_NAME])
+        except Exception as e:
+            logging.error(f"Erro ao inserir dados no banco de dados: {e}")
+            return 0, 0
+        # A marca d'água só avança quando a coleta termina; uma execução interrompida não pula o que faltou
+        if self._newest:
+            self.crawl_state.update(*self._newest)
+        return inserted, skipped
+
+    def replay(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Reprocessa, sem rede, todas as versões arquivadas dos destaques e grava as notícias extraídas.
+
+        O corpo vem das páginas de artigo arquivadas; as notícias cujo artigo não foi arquivado são
+        descartadas, para não sobrescrever o resumo gravado. A marca d'água e o checkpoint da coleta não
+        são alterados.
+
+        :param workers: Processos usados no parsing.
+        :param batch_size: Quantidade de notícias por lote gravado.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        try:
+            self._prepare_database()
+            factory = partial(
+                NewsScraper, self.base_url, incremental=False, skip_known=False,
+                streaming_extraction=self.streaming_extraction,
+            )
+            rows = (
+                news
+                for page_news in replay_pages(f"^{re.escape(self.base_url)}\\d+/$", factory, "parse_archived_listing", workers)
+                for news in page_news
+            )
+            inserted, skipped = stream_to_postgres(
+                TABLE_SPEC.with_hashes(rows), TABLE_NAME, TABLE_SPEC.stored_columns,
+                batch_size=batch_size, **TABLE_SPEC.upsert_options(self.update_changed),
+            )
+            self.near_duplicates.assign([TABLE_NAME])
+        except Exception as e:
+            logging.error(f"Erro ao inserir dados no banco de dados: {e}")
+            return 0, 0
+        logging.info("Reprocessamento concluído.")
+        return inserted, skipped
+
+    def run(self) -> Tuple[int, int]:
+        """
+        Executa o scraper para coletar e armazenar as notícias.
+
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self.news = list(self.iter_news())
+
         if self.news:
             logging.info("Extração de dados concluída com sucesso.")
-            self.save_to_postgres()
-        else:
-            logging.warning("Nenhum dado extraído.")
+            return self.save_to_postgres()
+        logging.warning("Nenhum dado extraído.")
+        return 0, 0
+
+
+def main(argv: Optional[List[str]] = None) -> Tuple[int, int]:
+    # Configuração de logging feita aqui, e não na importação, para que importar o módulo não crie arquivos
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("fusoes_aquisicoes.log"), logging.StreamHandler()]
+    )
 
+    parser = argparse.ArgumentParser(description="Coleta os destaques do dia do site Fusões & Aquisições.")
+    parser.add_argument("--stream", action="store_true", help="Grava as notícias no banco em lotes durante a coleta.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Notícias por lote no modo --stream.")
+    parser.add_argument("--update-changed", action="store_true", help="Regrava as notícias existentes cujo conteúdo mudou.")
+    parser.add_argument("--resume", action="store_true", help="Retoma a última coleta interrompida (implica --stream).")
+    parser.add_argument("--replay", action="store_true", help="Reprocessa as páginas arquivadas, sem rede (implica --update-changed).")
+    parser.add_argument("--replay-workers", type=int, default=DEFAULT_WORKERS, help="Processos usados no modo --replay.")
+    args = parser.parse_args(argv)
 
-def main() -> None:
-    scraper = NewsScraper(BASE_URL)
-    scraper.run()
+    scraper = NewsScraper(BASE_URL, update_changed=args.update_changed or args.replay)
+    try:
+        if args.replay:
+            return scraper.replay(args.replay_workers, args.batch_size)
+        if args.stream or args.resume:
+            return scraper.stream_to_postgres(args.batch_size, resume=args.resume)
+        return scraper.run()
+    finally:
+        metrics.write_report(TABLE_NAME)
 
 if __name__ == "__main__":
     main()
@@ -1,39 +1,111 @@
 import os
-import re
+import argparse
 import logging
-from typing import List, Optional
-from datetime import datetime
-from urllib.parse import quote
-import requests
-import psycopg2
-from psycopg2 import sql
-from psycopg2.extras import execute_values
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from datetime import date, datetime
+from functools import partial
+from urllib.parse import parse_qs, quote, urlparse
 import sys
 
+if TYPE_CHECKING:
+    import asyncio
+
+    import requests
+
 # Adiciona o diretório src ao caminho de pesquisa
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
 from config.db_connection import DatabaseConnection
-
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("neofeed.log"), logging.StreamHandler()]
-)
+from config.migrations import apply_migration
+from common.bulk_loader import bulk_upsert
+from common.checkpoint import Checkpoint, CheckpointMark, CrawlCheckpoint
+from common.content_hash import HashedTable
+from common.crawl_state import CrawlState, HighWaterMark
+from common.dates import parse_iso_date, parse_short_date
+from common.html_parser import Strainer, make_soup
+from common import http_client
+from common.http_client import HttpClient, get_client
+from common.metrics import metrics
+from common.near_duplicates import CLUSTER_COLUMN, DEDUP_TABLES, NearDuplicateIndex
+from common.pipeline import DEFAULT_BATCH_SIZE, stream_to_postgres
+from common.replay import DEFAULT_WORKERS, replay_pages
+from common.search import SEARCH_INDEXES
+from common.term_matcher import TermMatcher
 
 
 # Constantes
 SEARCH_TERMS = ["Aporte", "Aportes", "Fusão", "Aquisição", "M&A", "Série A", "Série B", "Série C"]
+SEARCH_URL = "https://neofeed.com.br/?s={term}"
+SEARCH_PAGE_URL = "https://neofeed.com.br/page/{page}/?s={term}"
+# Páginas de resultados (primeira e seguintes) reprocessadas no modo --replay
+SEARCH_ARCHIVE_PATTERN = r"^https://neofeed\.com\.br/(?:page/\d+/)?\?s="
+MAX_SEARCH_PAGES = 20
+MAX_CONCURRENT_REQUESTS = 8
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"}
 TABLE_NAME = "neofeed"
+TABLE_SPEC = HashedTable(
+    TABLE_NAME,
+    columns=("titulo", "resumo", "termo", "data"),
+    key_columns=("titulo", "data"),
+    content_columns=("resumo", "termo"),
+    legacy_constraint="unique_news",
+    reset_columns=(CLUSTER_COLUMN,),
+)
+# Apenas os artigos da listagem são montados pelo parser
+ARTICLE_STRAINER = Strainer("article")
+
+
+class ListingEntry(NamedTuple):
+    """Artigo extraído de uma página de resultados da busca."""
+
+    url: Optional[str]
+    titulo: str
+    resumo: str
+    data: date
+
 
 class NewsScraper:
-    def __init__(self) -> None:
-        self.found_articles: List[List[str]] = []
+    def __init__(
+        self,
+        search_terms: List[str] = SEARCH_TERMS,
+        incremental: bool = True,
+        update_changed: bool = False,
+        http: Optional[HttpClient] = None,
+    ) -> None:
+        """
+        Inicializa o scraper.
+
+        :param search_terms: Vocabulário usado para confirmar que o termo aparece no título ou resumo.
+        :param incremental: Ignora artigos anteriores aos já ingeridos para cada termo em execuções anteriores.
+        :param update_changed: Regrava os artigos já existentes cujo resumo ou termo mudou.
+        :param http: Cliente HTTP (padrão: o compartilhado no processo; na reprodução, um ArchiveClient).
+        """
+        self.found_articles: List[List[object]] = []
         self.current_year = datetime.now().year
         self.previous_year = self.current_year - 1
+        self.incremental = incremental
+        self.update_changed = update_changed
+        self.search_terms = search_terms
+        self.matcher = TermMatcher(search_terms)
+        self.http = http or get_client()
+        # Preenchidos por _prepare_database no primeiro acesso ao banco
+        self.crawl_state: Optional[CrawlState] = None
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        self.high_water_marks: Dict[str, HighWaterMark] = {}
+        self._newest: Dict[str, Tuple[date, Optional[str]]] = {}
+        # Definido apenas no modo --stream, em que cada termo é gravado antes de o checkpoint avançar
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self._completed_terms: List[str] = []
+
+    def _prepare_database(self) -> None:
+        """
+        Cria/atualiza as tabelas no primeiro acesso ao banco, e não no construtor, para que instanciar
+        o scraper não abra conexões.
+        """
+        if self.crawl_state is not None:
+            return
         self._setup_database()
+        self.crawl_state = CrawlState(TABLE_NAME)
+        self.near_duplicates = NearDuplicateIndex()
 
     def _setup_database(self) -> None:
         """Configura a conexão com o banco de dados e cria a tabela."""
@@ -47,86 +119,360 @@ class NewsScraper:
             CONSTRAINT unique_news UNIQUE (titulo, data)
         );
         """
-        with DatabaseConnection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(create_table_query)
-                conn.commit()
+        apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+        apply_migration(f"{TABLE_NAME}_0002_hash_conteudo", TABLE_SPEC.migration)
+        apply_migration(f"{TABLE_NAME}_0003_busca_textual", SEARCH_INDEXES[TABLE_NAME].migration)
+        apply_migration(f"{TABLE_NAME}_0004_cluster_id", DEDUP_TABLES[TABLE_NAME].migration)
+        apply_migration(f"{TABLE_NAME}_0005_atualizado_em", TABLE_SPEC.updated_at_migration)
         logging.info(f"Tabela {TABLE_NAME} verificada/criada com sucesso.")
 
     def fetch_news(self, term: str) -> None:
         """Busca notícias para um termo específico."""
-        search_url = f"https://neofeed.com.br/?s={quote(term)}"
+        search_url = SEARCH_URL.format(term=quote(term))
         logging.info(f"Buscando notícias para o termo: {term} ({search_url})")
         try:
-            response = requests.get(search_url, headers=HEADERS)
+            response = self.http.get(search_url, headers=HEADERS)
             response.raise_for_status()
+            metrics.incr("pages")
             self.parse_articles(response.text, term)
-        except requests.exceptions.RequestException as e:
+        except http_client.RequestException as e:
             logging.error(f"Erro ao buscar notícias para '{term}': {e}")
 
-    def parse_articles(self, page_content: str, term: str) -> None:
-        """Extrai e processa artigos do HTML."""
-        soup = BeautifulSoup(page_content, "html.parser")
-        articles = soup.find_all("article")
-        if not articles:
-            logging.warning(f"Nenhum artigo encontrado para o termo: {term}")
-            return
-        for article in articles:
+    def _high_water_mark(self, term: str) -> HighWaterMark:
+        """Retorna a marca d'água do termo, consultando o banco apenas uma vez por execução."""
+        if not self.incremental:
+            return HighWaterMark()
+        self._prepare_database()
+        if term not in self.high_water_marks:
+            self.high_water_marks[term] = self.crawl_state.get(term)
+        return self.high_water_marks[term]
+
+    def parse_listing(self, page_content: str) -> List[ListingEntry]:
+        """Extrai os artigos (URL, título, resumo e data) de uma página de resultados."""
+        soup = make_soup(page_content, ARTICLE_STRAINER)
+        entries = []
+        for article in soup.find_all("article"):
             title_tag = article.find("h3", class_="title-listagem")
             summary_tag = article.find("p")
             date_tag = article.find("span", class_="date")
+            link_tag = article.find("a", href=True)
             if title_tag and date_tag:
-                title = title_tag.get_text(strip=True)
-                summary = summary_tag.get_text(strip=True) if summary_tag else "Sem resumo"
                 news_date = self._extract_date(date_tag.get_text(strip=True))
-                if news_date:
-                    self.check_and_append_article(title, summary, term, news_date)
+                if not news_date:
+                    continue
+                entries.append(ListingEntry(
+                    url=link_tag["href"] if link_tag else None,
+                    titulo=title_tag.get_text(strip=True),
+                    resumo=summary_tag.get_text(strip=True) if summary_tag else "Sem resumo",
+                    data=news_date,
+                ))
+        return entries
 
-    def _extract_date(self, date_str: str) -> Optional[str]:
-        """Converte uma string de data para o formato aceito pelo PostgreSQL."""
+    def _track_newest(self, term: str, entry: ListingEntry) -> None:
+        """Guarda o artigo mais recente visto para o termo, usado para avançar a marca d'água."""
+        newest_date, _ = self._newest.get(term, (date.min, None))
+        if entry.data > newest_date:
+            self._newest[term] = (entry.data, entry.url)
+
+    def parse_articles(self, page_content: str, term: str) -> bool:
+        """
+        Extrai e processa artigos do HTML.
+
+        :return: True se a página alcançou artigos já ingeridos em execuções anteriores.
+        """
+        entries = self.parse_listing(page_content)
+        if not entries:
+            logging.warning(f"Nenhum artigo encontrado para o termo: {term}")
+            return False
+
+        high_water_mark = self._high_water_mark(term)
+        reached_known = False
+        for entry in entries:
+            if high_water_mark.data and entry.data < high_water_mark.data:
+                reached_known = True
+                continue
+
+            self._track_newest(term, entry)
+            self.check_and_append_article(entry.titulo, entry.resumo, term, entry.data)
+        return reached_known
+
+    def parse_archived_listing(self, response: "requests.Response") -> List[List[object]]:
+        """
+        Extrai os artigos de uma versão arquivada dos resultados da busca (usado pelos processos da reprodução).
+
+        O termo é o da própria busca, lido do parâmetro "s" da URL, como na coleta termo a termo.
+        """
+        term = parse_qs(urlparse(response.url).query).get("s", [""])[0]
+        for entry in self.parse_listing(response.text):
+            self.check_and_append_article(entry.titulo, entry.resumo, term, entry.data)
+        articles, self.found_articles = self.found_articles, []
+        return articles
+
+    def _get_search_page(self, term: str, page: int) -> Optional[str]:
+        """Baixa uma página de resultados; retorna None no fim da paginação ou em caso de erro."""
+        if page == 1:
+            search_url = SEARCH_URL.format(term=quote(term))
+        else:
+            search_url = SEARCH_PAGE_URL.format(page=page, term=quote(term))
         try:
-            article_date = datetime.strptime(date_str, "%d/%m/%y")
-            if article_date.year < 100:
-                article_date = article_date.replace(year=2000 + article_date.year)
-            return article_date.strftime("%Y-%m-%d")
-        except ValueError:
-            logging.warning(f"Formato de data inesperado: {date_str}")
+            response = self.http.get(search_url, headers=HEADERS)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            metrics.incr("pages")
+            return response.text
+        except http_client.RequestException as e:
+            logging.error(f"Erro ao buscar a página {page} de '{term}': {e}")
             return None
 
-    def check_and_append_article(self, title: str, summary: str, term: str, news_date: str) -> None:
+    async def _search_term(self, term: str, semaphore: "asyncio.Semaphore", unique_entries: Dict[object, ListingEntry]) -> None:
+        """
+        Percorre as páginas de resultados de um termo até passar do ano de corte ou alcançar artigos já ingeridos.
+
+        Os artigos são guardados em unique_entries pela URL, de modo que um artigo retornado por vários termos
+        é processado uma única vez.
+        """
+        import asyncio
+
+        high_water_mark = self._high_water_mark(term)
+        for page in range(1, MAX_SEARCH_PAGES + 1):
+            async with semaphore:
+                page_content = await asyncio.to_thread(self._get_search_page, term, page)
+            if not page_content:
+                break
+
+            entries = self.parse_listing(page_content)
+            if not entries:
+                break
+
+            in_range = False
+            reached_known = False
+            for entry in entries:
+                if entry.data.year < self.previous_year:
+                    continue
+                in_range = True
+                if high_water_mark.data and entry.data < high_water_mark.data:
+                    reached_known = True
+                    continue
+
+                self._track_newest(term, entry)
+                unique_entries.setdefault(entry.url or (entry.titulo, entry.data), entry)
+
+            if reached_known or not in_range:
+                logging.info(f"Busca por '{term}' encerrada na página {page}.")
+                break
+
+    async def _fetch_all(self, terms: List[str]) -> Dict[object, ListingEntry]:
+        import asyncio
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        unique_entries: Dict[object, ListingEntry] = {}
+        await asyncio.gather(*(self._search_term(term, semaphore, unique_entries) for term in terms))
+        return unique_entries
+
+    def fetch_all(self, terms: List[str]) -> None:
+        """
+        Busca todos os termos ao mesmo tempo, seguindo a paginação de cada busca até o ano de corte.
+
+        Os artigos retornados por mais de um termo são deduplicados antes do processamento; cada artigo
+        é registrado com o primeiro termo do vocabulário encontrado em seu título ou resumo.
+        """
+        # O asyncio só é importado aqui: sozinho, custa ~50 ms no import do módulo
+        import asyncio
+
+        # As marcas d'água são lidas antes, para não bloquear o event loop com consultas ao banco
+        for term in terms:
+            self._high_water_mark(term)
+
+        unique_entries = asyncio.run(self._fetch_all(terms))
+        logging.info(f"{len(unique_entries)} artigos únicos encontrados para {len(terms)} termos.")
+        for entry in unique_entries.values():
+            matched_terms = self.matcher.search(f"{entry.titulo}\n{entry.resumo}")
+            if matched_terms:
+                self.check_and_append_article(entry.titulo, entry.resumo, matched_terms[0], entry.data)
+
+    def _extract_date(self, date_str: str) -> Optional[date]:
+        """Converte a data da listagem ("DD/MM/AA") em date."""
+        article_date = parse_short_date(date_str)
+        if article_date is None:
+            logging.warning(f"Formato de data inesperado: {date_str}")
+        return article_date
+
+    def check_and_append_article(self, title: str, summary: str, term: str, news_date: date) -> None:
         """Adiciona o artigo à lista se o termo estiver no título ou resumo e a data for do ano corrente ou anterior."""
         # Verifica se a data é do ano corrente ou do ano anterior
-        article_year = datetime.strptime(news_date, "%Y-%m-%d").year
+        article_year = news_date.year
         if article_year == self.current_year or article_year == self.previous_year:
-            if re.search(term, title, re.IGNORECASE) or re.search(term, summary, re.IGNORECASE):
+            if term in self.matcher.search(f"{title}\n{summary}"):
                 term = "Aporte" if term == "Aportes" else term
                 self.found_articles.append([title, summary, term, news_date])
+                metrics.incr("articles")
                 logging.info(f"Notícia encontrada: {news_date}")
         else:
             pass
 
-    def save_to_postgres(self) -> None:
-        """Salva os artigos extraídos no banco de dados."""
+    def save_to_postgres(self) -> Tuple[int, int]:
+        """
+        Salva os artigos extraídos no banco de dados.
+
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
         if not self.found_articles:
             logging.info("Nenhum artigo para salvar no banco de dados.")
-            return
-        insert_query = f"""
-        INSERT INTO {TABLE_NAME} (titulo, resumo, termo, data)
-        VALUES %s
-        ON CONFLICT (titulo, data) DO NOTHING;
-        """
+            self._update_crawl_state()
+            return 0, 0
         with DatabaseConnection() as conn:
-            with conn.cursor() as cursor:
-                execute_values(cursor, insert_query, self.found_articles)
-                conn.commit()
+            inserted, skipped = bulk_upsert(
+                conn, TABLE_NAME, TABLE_SPEC.stored_columns, TABLE_SPEC.with_hashes(self.found_articles),
+                **TABLE_SPEC.upsert_options(self.update_changed),
+            )
         logging.info("Dados inseridos no banco de dados com sucesso.")
+        self.near_duplicates.assign([TABLE_NAME])
+        self._update_crawl_state()
+        return inserted, skipped
+
+    def iter_news(self, terms: List[str], fanout: bool = False) -> Iterator[Union[List[object], CheckpointMark]]:
+        """
+        Gera os artigos encontrados para cada termo assim que sua busca é processada, sem acumulá-los.
+
+        Com fanout=True as buscas são feitas em paralelo por fetch_all e os artigos gerados ao final.
+        Com checkpoint ativo e sem fanout, gera também um CheckpointMark ao fim de cada termo.
+        """
+        if fanout:
+            self.fetch_all(terms)
+            articles, self.found_articles = self.found_articles, []
+            yield from articles
+            return
+
+        for index, term in enumerate(terms):
+            self.fetch_news(term)
+            term_articles, self.found_articles = self.found_articles, []
+            yield from term_articles
+            if self.checkpoint is not None:
+                pending = tuple(SEARCH_URL.format(term=quote(next_term)) for next_term in terms[index + 1:])
+                yield CheckpointMark(self._checkpoint_position(term), pending)
 
+    def _checkpoint_position(self, term: str) -> Dict[str, Any]:
+        """Posição salva ao concluir um termo: os termos concluídos e o artigo mais recente de cada um."""
+        self._completed_terms.append(term)
+        return {
+            "termos_concluidos": list(self._completed_terms),
+            "mais_recentes": {
+                newest_term: [news_date.isoformat(), article_url]
+                for newest_term, (news_date, article_url) in self._newest.items()
+            },
+        }
 
-def main() -> None:
-    scraper = NewsScraper()
-    for term in SEARCH_TERMS:
-        scraper.fetch_news(term)
-    scraper.save_to_postgres()
+    def _restore_checkpoint(self, checkpoint: Optional[Checkpoint], terms: List[str]) -> List[str]:
+        """
+        Restaura os artigos mais recentes vistos antes da interrupção, para que as marcas d'água não regridam.
+
+        :return: Termos que ainda faltam buscar.
+        """
+        if checkpoint is None:
+            logging.info("Nenhum checkpoint encontrado. A coleta começa pelo primeiro termo.")
+            return terms
+        self._completed_terms = list(checkpoint.posicao.get("termos_concluidos", []))
+        for term, (news_date, article_url) in checkpoint.posicao.get("mais_recentes", {}).items():
+            self._newest[term] = (parse_iso_date(news_date), article_url)
+        remaining = [term for term in terms if term not in self._completed_terms]
+        logging.info(f"Retomando a coleta: {len(self._completed_terms)} termos concluídos, {len(remaining)} restantes.")
+        return remaining
+
+    def stream_to_postgres(
+        self, terms: List[str], batch_size: int = DEFAULT_BATCH_SIZE, fanout: bool = False, resume: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Busca os termos e grava os artigos em lotes de tamanho fixo durante a coleta.
+
+        Sem fanout, a cada termo concluído e gravado os termos já buscados são salvos como checkpoint.
+
+        :param terms: Termos a buscar.
+        :param batch_size: Quantidade de artigos por lote gravado.
+        :param fanout: Busca todos os termos em paralelo, seguindo a paginação (ver fetch_all).
+        :param resume: Busca apenas os termos que faltavam no último checkpoint.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
+        self.checkpoint = CrawlCheckpoint(TABLE_NAME)
+        if resume:
+            terms = self._restore_checkpoint(self.checkpoint.load(), terms)
+        else:
+            self.checkpoint.clear()
+
+        inserted, skipped = stream_to_postgres(
+            TABLE_SPEC.with_hashes(self.iter_news(terms, fanout)), TABLE_NAME, TABLE_SPEC.stored_columns,
+            batch_size=batch_size, checkpoint=self.checkpoint, **TABLE_SPEC.upsert_options(self.update_changed),
+        )
+        self.near_duplicates.assign([TABLE_NAME])
+        # A marca d'água só avança quando a coleta termina; uma execução interrompida não pula o que faltou
+        self._update_crawl_state()
+        return inserted, skipped
+
+    def replay(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Reprocessa, sem rede, todas as versões arquivadas das páginas de resultados e grava os artigos extraídos.
+
+        As marcas d'água e o checkpoint da coleta não são alterados.
+
+        :param workers: Processos usados no parsing.
+        :param batch_size: Quantidade de artigos por lote gravado.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
+        factory = partial(NewsScraper, self.search_terms, incremental=False)
+        rows = (
+            article
+            for page_articles in replay_pages(SEARCH_ARCHIVE_PATTERN, factory, "parse_archived_listing", workers)
+            for article in page_articles
+        )
+        inserted, skipped = stream_to_postgres(
+            TABLE_SPEC.with_hashes(rows), TABLE_NAME, TABLE_SPEC.stored_columns,
+            batch_size=batch_size, **TABLE_SPEC.upsert_options(self.update_changed),
+        )
+        self.near_duplicates.assign([TABLE_NAME])
+        logging.info("Reprocessamento concluído.")
+        return inserted, skipped
+
+    def _update_crawl_state(self) -> None:
+        """Avança a marca d'água de cada termo com o artigo mais recente visto nesta execução."""
+        for term, (news_date, article_url) in self._newest.items():
+            self.crawl_state.update(news_date, article_url, termo=term)
+
+
+def main(argv: Optional[List[str]] = None) -> Tuple[int, int]:
+    # Configuração de logging feita aqui, e não na importação, para que importar o módulo não crie arquivos
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("neofeed.log"), logging.StreamHandler()]
+    )
+
+    parser = argparse.ArgumentParser(description="Coleta notícias de investimentos do Neofeed.")
+    parser.add_argument("--stream", action="store_true", help="Grava os artigos no banco em lotes durante a coleta.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Artigos por lote no modo --stream.")
+    parser.add_argument("--fanout", action="store_true", help="Busca todos os termos em paralelo, seguindo a paginação dos resultados.")
+    parser.add_argument("--update-changed", action="store_true", help="Regrava os artigos existentes cujo conteúdo mudou.")
+    parser.add_argument("--resume", action="store_true", help="Retoma a última coleta interrompida (implica --stream).")
+    parser.add_argument("--replay", action="store_true", help="Reprocessa as páginas arquivadas, sem rede (implica --update-changed).")
+    parser.add_argument("--replay-workers", type=int, default=DEFAULT_WORKERS, help="Processos usados no modo --replay.")
+    args = parser.parse_args(argv)
+
+    scraper = NewsScraper(update_changed=args.update_changed or args.replay)
+    try:
+        if args.replay:
+            return scraper.replay(args.replay_workers, args.batch_size)
+        if args.stream or args.resume:
+            return scraper.stream_to_postgres(SEARCH_TERMS, args.batch_size, args.fanout, resume=args.resume)
+        if args.fanout:
+            scraper.fetch_all(SEARCH_TERMS)
+        else:
+            for term in SEARCH_TERMS:
+                scraper.fetch_news(term)
+        return scraper.save_to_postgres()
+    finally:
+        metrics.write_report(TABLE_NAME)
 
 if __name__ == "__main__":
     main()
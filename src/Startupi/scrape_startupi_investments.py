@@ -1,45 +1,176 @@
 import os
+import re
+import argparse
 import sys
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Tuple, Union
+from datetime import date, datetime
+from functools import partial
 from urllib.parse import quote
 
-import requests
 import psycopg2
-from psycopg2.extras import execute_values
-from bs4 import BeautifulSoup
+
+if TYPE_CHECKING:
+    import requests
+    from bs4 import Tag
 
 # Adiciona o diretório src ao caminho de pesquisa
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
 from config.db_connection import DatabaseConnection
-
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("startupi.log"), logging.StreamHandler()]
-)
+from config.migrations import apply_migration
+from common.bulk_loader import bulk_upsert
+from common.checkpoint import Checkpoint, CheckpointMark, CrawlCheckpoint
+from common.content_hash import HashedTable
+from common.crawl_state import CrawlState
+from common.dates import month_number
+from common.http_cache import NEVER_EXPIRE
+from common.html_parser import Strainer, make_soup
+from common import http_client
+from common.http_client import HttpClient, get_client
+from common.metrics import metrics
+from common.near_duplicates import CLUSTER_COLUMN, DEDUP_TABLES, NearDuplicateIndex
+from common.pipeline import DEFAULT_BATCH_SIZE, stream_to_postgres
+from common.replay import DEFAULT_WORKERS, replay_pages
+from common.search import SEARCH_INDEXES
 
 # Constantes
-MES_NUMERAL = {
-    "JAN": "01", "FEV": "02", "MAR": "03", "ABR": "04", "MAI": "05", "JUN": "06",
-    "JUL": "07", "AGO": "08", "SET": "09", "OUT": "10", "NOV": "11", "DEZ": "12"
-}
 TABLE_NAME = "startupi"
+DEALS_TABLE_NAME = "startupi_deals"
+# O texto do mês é ao mesmo tempo chave e conteúdo: uma edição na página gera um novo registro
+TABLE_SPEC = HashedTable(
+    TABLE_NAME,
+    columns=("resumo", "data"),
+    key_columns=("resumo", "data"),
+    content_columns=(),
+    legacy_constraint="unique_news_investment",
+)
+DEALS_TABLE_SPEC = HashedTable(
+    DEALS_TABLE_NAME,
+    columns=("empresa", "valor", "moeda", "rodada", "investidores", "texto", "data"),
+    key_columns=("texto", "data"),
+    content_columns=("empresa", "valor", "moeda", "rodada", "investidores"),
+    legacy_constraint="unique_deal",
+    reset_columns=(CLUSTER_COLUMN,),
+)
+MAX_WORKERS = 8
+# O ranking do ano que acabou de terminar ainda recebe correções; só os anos anteriores a ele não mudam mais
+RECENT_YEAR_CACHE_TTL = 24 * 3600
+# Apenas o widget de abas (títulos dos meses e conteúdos) é montado pelo parser
+TABS_STRAINER = Strainer(class_=re.compile(r"^elementor-tab"))
 BASE_URL = "https://startupi.com.br/ranking-investimentos-{}/"
+# Páginas dos anos do ranking reprocessadas no modo --replay; o grupo é o ano
+YEAR_ARCHIVE_PATTERN = r"^https://startupi\.com\.br/ranking-investimentos-(\d{4})/$"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
 }
 
+# Expressões usadas para separar cada aporte do texto do mês
+AMOUNT_PATTERN = re.compile(
+    r"(?P<moeda>R\$|US\$|U\$|€)\s*(?P<valor>\d+(?:[.,]\d+)*)\s*(?P<escala>mil(?:h(?:ão|ões|ao|oes))?|bilh(?:ão|ões|ao|oes)|mi\b|bi\b)?",
+    re.IGNORECASE,
+)
+ROUND_PATTERN = re.compile(
+    r"\b(pr[ée][- ]?seed|seed|anjo|pr[ée][- ]?s[ée]rie\s+[a-h]\b|s[ée]rie\s+[a-h]\b|venture debt|bridge|growth|ipo)",
+    re.IGNORECASE,
+)
+INVESTORS_PATTERN = re.compile(
+    r"(?:liderad[ao]s?\s+(?:pel[ao]s?|por)|com\s+(?:a\s+)?participação\s+d[eao]s?|investidores?:|com\s+aporte\s+d[eao]s?)\s+(?P<investidores>[^.]+)",
+    re.IGNORECASE,
+)
+COMPANY_PATTERN = re.compile(
+    r"^\s*(?:[-•–]\s*)?(?P<empresa>[^,:;–(]+?)\s*(?:[:–(,]|\s-\s|\b(?:recebe|recebeu|capta|captou|levanta|levantou|anuncia|anunciou|fecha|fechou|conclui|concluiu)\b)",
+    re.IGNORECASE,
+)
+AMOUNT_SCALE = {"mil": 1e3, "mi": 1e6, "milhão": 1e6, "milhões": 1e6, "milhao": 1e6, "milhoes": 1e6,
+                "bi": 1e9, "bilhão": 1e9, "bilhões": 1e9, "bilhao": 1e9, "bilhoes": 1e9}
+
+
+def _parse_amount(number: str, scale: Optional[str]) -> Optional[float]:
+    """Converte um valor no formato brasileiro ("10,5", "1.500") multiplicado pela escala."""
+    if "," in number:
+        number = number.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", number):
+        number = number.replace(".", "")
+    try:
+        value = float(number)
+    except ValueError:
+        return None
+    return value * AMOUNT_SCALE.get((scale or "").lower(), 1)
+
+
+def extract_deal(text: str) -> Optional[Dict[str, object]]:
+    """
+    Extrai empresa, valor, rodada e investidores de uma linha do ranking.
+
+    :return: Dicionário com os campos encontrados, ou None se a linha não descrever um aporte.
+    """
+    amount_match = AMOUNT_PATTERN.search(text)
+    round_match = ROUND_PATTERN.search(text)
+    if not amount_match and not round_match:
+        return None
+
+    company_match = COMPANY_PATTERN.search(text)
+    investors_match = INVESTORS_PATTERN.search(text)
+    return {
+        "empresa": company_match.group("empresa").strip() if company_match else None,
+        "valor": _parse_amount(amount_match.group("valor"), amount_match.group("escala")) if amount_match else None,
+        "moeda": amount_match.group("moeda").upper() if amount_match else None,
+        "rodada": round_match.group(1).strip() if round_match else None,
+        "investidores": investors_match.group("investidores").strip() if investors_match else None,
+        "texto": text,
+    }
+
 class InvestmentScraper:
     """Classe para coletar e processar investimentos do Startupi."""
 
-    def __init__(self, start_year: int = 2022) -> None:
-        self.all_news_investments: List[Dict[str, str]] = []
+    def __init__(
+        self,
+        start_year: int = 2022,
+        incremental: bool = True,
+        update_changed: bool = False,
+        http: Optional[HttpClient] = None,
+    ) -> None:
+        """
+        Inicializa o scraper.
+
+        :param start_year: Primeiro ano do ranking a ser coletado.
+        :param incremental: Pula os anos já ingeridos em execuções anteriores (páginas de anos passados não mudam).
+        :param update_changed: Regrava os aportes já existentes cujos campos extraídos mudaram.
+        :param http: Cliente HTTP (padrão: o compartilhado no processo; na reprodução, um ArchiveClient).
+        """
+        self.update_changed = update_changed
+        self.all_news_investments: List[Dict[str, object]] = []
         self.start_year = start_year
         self.end_year = datetime.now().year - 1
+        self.completed_years: List[int] = []
+        # Definido apenas no modo --stream, em que cada ano é gravado antes de o checkpoint avançar
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self.http = http or get_client()
+        # As páginas de anos anteriores não mudam mais, exceto a do ano anterior, revalidada diariamente
+        for year in range(self.start_year, datetime.now().year):
+            ttl = RECENT_YEAR_CACHE_TTL if year == self.end_year else NEVER_EXPIRE
+            self.http.set_cache_policy(f"^{re.escape(BASE_URL.format(year))}$", ttl)
+        self.incremental = incremental
+        # Preenchidos por _prepare_database no primeiro acesso ao banco
+        self.crawl_state: Optional[CrawlState] = None
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+
+    def _prepare_database(self) -> None:
+        """
+        Cria/atualiza as tabelas e lê o estado da coleta no primeiro acesso ao banco, e não no construtor,
+        para que instanciar o scraper não abra conexões. Na coleta incremental, avança o ano inicial.
+        """
+        if self.crawl_state is not None:
+            return
         self._setup_database()
+        self.crawl_state = CrawlState(TABLE_NAME)
+        self.near_duplicates = NearDuplicateIndex()
+        if self.incremental:
+            high_water_mark = self.crawl_state.get()
+            if high_water_mark.data:
+                # O ano anterior é sempre recoletado: seu ranking ainda recebe correções (ver RECENT_YEAR_CACHE_TTL)
+                self.start_year = max(self.start_year, min(high_water_mark.data.year + 1, self.end_year))
 
     def _setup_database(self) -> None:
         """Configura a conexão com o banco de dados e cria a tabela se necessário."""
@@ -51,11 +182,31 @@ class InvestmentScraper:
             CONSTRAINT unique_news_investment UNIQUE (resumo, data)
         );
         """
+        create_deals_table_query = f"""
+        CREATE TABLE IF NOT EXISTS {DEALS_TABLE_NAME} (
+            id SERIAL PRIMARY KEY,
+            empresa TEXT,
+            valor NUMERIC,
+            moeda TEXT,
+            rodada TEXT,
+            investidores TEXT,
+            texto TEXT NOT NULL,
+            data DATE NOT NULL,
+            CONSTRAINT unique_deal UNIQUE (texto, data)
+        );
+        """
         try:
-            with DatabaseConnection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(create_table_query)
-                    conn.commit()
+            apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+            apply_migration(f"{DEALS_TABLE_NAME}_0001_cria_tabela", create_deals_table_query)
+            apply_migration(f"{TABLE_NAME}_0002_hash_conteudo", TABLE_SPEC.migration)
+            apply_migration(f"{DEALS_TABLE_NAME}_0002_hash_conteudo", DEALS_TABLE_SPEC.migration)
+            apply_migration(f"{TABLE_NAME}_0003_busca_textual", SEARCH_INDEXES[TABLE_NAME].migration)
+            apply_migration(f"{DEALS_TABLE_NAME}_0003_busca_textual", SEARCH_INDEXES[DEALS_TABLE_NAME].migration)
+            apply_migration(f"{DEALS_TABLE_NAME}_0004_cluster_id", DEDUP_TABLES[DEALS_TABLE_NAME].migration)
+            # Os clusters gravados antes da chave (empresa, valor, data) juntavam aportes distintos
+            apply_migration(f"{DEALS_TABLE_NAME}_0005_reagrupa_por_chave", DEDUP_TABLES[DEALS_TABLE_NAME].reset)
+            apply_migration(f"{TABLE_NAME}_0004_atualizado_em", TABLE_SPEC.updated_at_migration)
+            apply_migration(f"{DEALS_TABLE_NAME}_0006_atualizado_em", DEALS_TABLE_SPEC.updated_at_migration)
             logging.info(f"Tabela {TABLE_NAME} verificada/criada com sucesso.")
         except Exception as e:
             logging.error(f"Erro ao configurar banco de dados: {e}")
@@ -64,22 +215,22 @@ class InvestmentScraper:
         """Obtém o conteúdo HTML da página especificada."""
         try:
             logging.info(f"Acessando a página: {url}")
-            response = requests.get(url, headers=HEADERS, timeout=10)
+            response = self.http.get(url, headers=HEADERS)
             response.raise_for_status()
+            metrics.incr("pages")
             return response.text
-        except requests.exceptions.RequestException as e:
+        except http_client.RequestException as e:
             logging.error(f"Erro ao acessar {url}: {e}")
             return None
 
-    def parse_content(self, html: str, year: int) -> List[Dict[str, str]]:
-        """Extrai os textos organizados por mês e ano, formatando a data."""
-        soup = BeautifulSoup(html, "html.parser")
+    def _iter_month_sections(self, html: str) -> Iterator[Tuple[int, "Tag"]]:
+        """Gera o número do mês e a seção (aba) com o conteúdo de cada mês da página."""
+        soup = make_soup(html, TABS_STRAINER)
         month_elements = soup.select(".elementor-tab-title.elementor-tab-desktop-title")
-        investments = []
 
         for month in month_elements:
-            month_name = month.get_text(strip=True).upper()
-            month_num = MES_NUMERAL.get(month_name)
+            month_name = month.get_text(strip=True)
+            month_num = month_number(month_name)
             if not month_num:
                 logging.warning(f"Mês não reconhecido: {month_name}")
                 continue
@@ -88,54 +239,270 @@ class InvestmentScraper:
             content_section = soup.find("div", {"id": content_id})
 
             if content_section:
-                text = content_section.get_text(separator=" ").strip()
-                data_formatada = f"01/{month_num}/{year}"
-                investments.append({"resumo": text, "data": data_formatada})
+                yield month_num, content_section
+
+    def parse_content(self, html: str, year: int) -> List[Dict[str, object]]:
+        """Extrai os textos organizados por mês e ano, com a data do primeiro dia do mês."""
+        investments = []
+        for month_num, content_section in self._iter_month_sections(html):
+            text = content_section.get_text(separator=" ").strip()
+            investments.append({"resumo": text, "data": date(year, month_num, 1)})
 
+        metrics.incr("articles", len(investments))
         return investments
 
-    def scrape_investments(self) -> None:
-        """Executa o fluxo completo para coletar os dados dos investimentos."""
-        for year in range(self.start_year, self.end_year + 1):
+    def parse_deals(self, html: str, year: int) -> List[Dict[str, object]]:
+        """Separa o conteúdo de cada mês em aportes individuais (empresa, valor, rodada e investidores)."""
+        deals = []
+        for month_num, content_section in self._iter_month_sections(html):
+            blocks = content_section.find_all(["p", "li"]) or [content_section]
+            for block in blocks:
+                for line in block.get_text(separator="\n").split("\n"):
+                    line = " ".join(line.split())
+                    deal = extract_deal(line) if line else None
+                    if deal:
+                        deal["data"] = date(year, month_num, 1)
+                        deals.append(deal)
+        metrics.incr("deals", len(deals))
+        return deals
+
+    def parse_archived_year(self, response: "requests.Response") -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+        """
+        Extrai os textos dos meses e os aportes de uma versão arquivada da página de um ano
+        (usado pelos processos da reprodução).
+        """
+        year = int(re.match(YEAR_ARCHIVE_PATTERN, response.url).group(1))
+        return self.parse_content(response.text, year), self.parse_deals(response.text, year)
+
+    def fetch_years(self, years: List[int], max_workers: int = MAX_WORKERS) -> List[Optional[str]]:
+        """Baixa as páginas dos anos informados em paralelo, na mesma ordem dos anos."""
+        if not years:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(years))) as executor:
+            return list(executor.map(self.get_page_content, (BASE_URL.format(year) for year in years)))
+
+    def backfill(self, max_workers: int = MAX_WORKERS) -> Tuple[int, int]:
+        """
+        Recoleta todos os anos em paralelo e grava, além do texto de cada mês, um registro por aporte
+        na tabela de aportes.
+
+        :param max_workers: Máximo de páginas de anos baixadas ao mesmo tempo.
+        :return: Tupla (inseridos, ignorados por já existirem) da tabela de aportes.
+        """
+        self._prepare_database()
+        years = list(range(self.start_year, self.end_year + 1))
+        pages = self.fetch_years(years, max_workers)
+
+        investments: List[Dict[str, object]] = []
+        deals: List[Dict[str, object]] = []
+        for year, html_content in zip(years, pages):
+            if not html_content:
+                logging.warning(f"Pulando ano {year} devido a erro na página.")
+                continue
+            investments.extend(self.parse_content(html_content, year))
+            deals.extend(self.parse_deals(html_content, year))
+            self.completed_years.append(year)
+        logging.info(f"{len(deals)} aportes extraídos de {len(self.completed_years)} anos.")
+
+        self.all_news_investments = investments
+        self.save_to_postgres()
+
+        rows = ([deal[column] for column in DEALS_TABLE_SPEC.columns] for deal in deals)
+        try:
+            inserted, skipped = stream_to_postgres(
+                DEALS_TABLE_SPEC.with_hashes(rows), DEALS_TABLE_NAME, DEALS_TABLE_SPEC.stored_columns,
+                **DEALS_TABLE_SPEC.upsert_options(self.update_changed),
+            )
+            # O texto de cada mês reúne vários aportes; apenas os aportes individuais são agrupados
+            self.near_duplicates.assign([DEALS_TABLE_NAME])
+            return inserted, skipped
+        except psycopg2.DatabaseError as e:
+            logging.error(f"Erro ao salvar aportes no banco: {e}")
+            return 0, 0
+
+    def iter_investments(self, years: Optional[List[int]] = None) -> Iterator[Union[Dict[str, object], CheckpointMark]]:
+        """
+        Gera os investimentos de cada ano assim que sua página é processada, sem acumulá-los.
+
+        :param years: Anos a coletar (padrão: do ano inicial ao ano anterior ao corrente).
+        :return: Gerador de dicionários com resumo e data; com checkpoint ativo, um CheckpointMark
+                 ao fim de cada ano coletado.
+        """
+        self._prepare_database()
+        years = list(range(self.start_year, self.end_year + 1)) if years is None else years
+        for index, year in enumerate(years):
             url = BASE_URL.format(year)
             html_content = self.get_page_content(url)
 
             if html_content:
-                investment_data = self.parse_content(html_content, year)
-                self.all_news_investments.extend(investment_data)
+                yield from self.parse_content(html_content, year)
+                self.completed_years.append(year)
+                if self.checkpoint is not None:
+                    pending = tuple(BASE_URL.format(next_year) for next_year in years[index + 1:])
+                    yield CheckpointMark({"anos_concluidos": list(self.completed_years)}, pending)
             else:
                 logging.warning(f"Pulando ano {year} devido a erro na página.")
 
+    def _restore_checkpoint(self, checkpoint: Optional[Checkpoint]) -> List[int]:
+        """
+        Restaura os anos concluídos antes da interrupção, usados para avançar a marca d'água sem lacunas.
+
+        :return: Anos que ainda faltam coletar (inclusive os que falharam antes da interrupção).
+        """
+        years = list(range(self.start_year, self.end_year + 1))
+        if checkpoint is None:
+            logging.info("Nenhum checkpoint encontrado. A coleta começa pelo ano inicial.")
+            return years
+        self.completed_years = list(checkpoint.posicao.get("anos_concluidos", []))
+        remaining = [year for year in years if year not in self.completed_years]
+        logging.info(f"Retomando a coleta: anos concluídos {self.completed_years}, restantes {remaining}.")
+        return remaining
+
+    def scrape_investments(self) -> None:
+        """Executa o fluxo completo para coletar os dados dos investimentos."""
+        self.all_news_investments.extend(self.iter_investments())
         logging.info("Scraping concluído.")
 
-    def save_to_postgres(self) -> None:
-        """Salva os artigos extraídos no banco de dados."""
-        if not self.all_news_investments:
-            logging.info("Nenhum artigo para salvar no banco de dados.")
-            return
+    def stream_to_postgres(self, batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = False) -> Tuple[int, int]:
+        """
+        Coleta e grava os investimentos em lotes de tamanho fixo, sem acumulá-los em memória.
+
+        A cada ano concluído e gravado, os anos já coletados são salvos como checkpoint.
+
+        :param batch_size: Quantidade de registros por lote gravado.
+        :param resume: Coleta apenas os anos que faltavam no último checkpoint.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        try:
+            self._prepare_database()
+            self.checkpoint = CrawlCheckpoint(TABLE_NAME)
+            if resume:
+                years = self._restore_checkpoint(self.checkpoint.load())
+            else:
+                self.checkpoint.clear()
+                years = None
+            rows = (
+                news if isinstance(news, CheckpointMark) else (news["resumo"], news["data"])
+                for news in self.iter_investments(years)
+            )
+            inserted, skipped = stream_to_postgres(
+                TABLE_SPEC.with_hashes(rows), TABLE_NAME, TABLE_SPEC.stored_columns,
+                batch_size=batch_size, checkpoint=self.checkpoint, **TABLE_SPEC.upsert_options(self.update_changed),
+            )
+        except psycopg2.DatabaseError as e:
+            logging.error(f"Erro ao salvar dados no banco: {e}")
+            return 0, 0
+        self._update_crawl_state()
+        logging.info("Scraping concluído.")
+        return inserted, skipped
+
+    def replay(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Reprocessa, sem rede, todas as versões arquivadas das páginas dos anos e grava os textos dos meses
+        e os aportes extraídos. O estado da coleta e o checkpoint não são alterados.
+
+        :param workers: Processos usados no parsing.
+        :param batch_size: Quantidade de registros por lote gravado.
+        :return: Tupla (inseridos, ignorados por já existirem) da tabela de aportes.
+        """
+        self._prepare_database()
+        investments: List[Dict[str, object]] = []
+        deals: List[Dict[str, object]] = []
+        for page_investments, page_deals in replay_pages(
+            YEAR_ARCHIVE_PATTERN, partial(InvestmentScraper, incremental=False), "parse_archived_year", workers
+        ):
+            investments.extend(page_investments)
+            deals.extend(page_deals)
+        logging.info(f"{len(investments)} meses e {len(deals)} aportes extraídos das páginas arquivadas.")
+
+        try:
+            stream_to_postgres(
+                TABLE_SPEC.with_hashes((news["resumo"], news["data"]) for news in investments),
+                TABLE_NAME, TABLE_SPEC.stored_columns,
+                batch_size=batch_size, **TABLE_SPEC.upsert_options(self.update_changed),
+            )
+            inserted, skipped = stream_to_postgres(
+                DEALS_TABLE_SPEC.with_hashes([deal[column] for column in DEALS_TABLE_SPEC.columns] for deal in deals),
+                DEALS_TABLE_NAME, DEALS_TABLE_SPEC.stored_columns,
+                batch_size=batch_size, **DEALS_TABLE_SPEC.upsert_options(self.update_changed),
+            )
+        except psycopg2.DatabaseError as e:
+            logging.error(f"Erro ao salvar dados no banco: {e}")
+            return 0, 0
+        self.near_duplicates.assign([DEALS_TABLE_NAME])
+        logging.info("Reprocessamento concluído.")
+        return inserted, skipped
+
+    def save_to_postgres(self) -> Tuple[int, int]:
+        """
+        Salva os artigos extraídos no banco de dados.
 
-        data_to_insert = [(news["resumo"], news["data"]) for news in self.all_news_investments]
-        insert_query = f"""
-        INSERT INTO {TABLE_NAME} (resumo, data)
-        VALUES %s
-        ON CONFLICT (resumo, data) DO NOTHING;
+        :return: Tupla (inseridos, ignorados por já existirem).
         """
+        self._prepare_database()
+        if not self.all_news_investments:
+            logging.info("Nenhum artigo para salvar no banco de dados.")
+            self._update_crawl_state()
+            return 0, 0
 
+        data_to_insert = ((news["resumo"], news["data"]) for news in self.all_news_investments)
         try:
             with DatabaseConnection() as conn:
-                with conn.cursor() as cursor:
-                    execute_values(cursor, insert_query, data_to_insert)
-                    conn.commit()
+                inserted, skipped = bulk_upsert(
+                    conn, TABLE_NAME, TABLE_SPEC.stored_columns, TABLE_SPEC.with_hashes(data_to_insert),
+                    **TABLE_SPEC.upsert_options(self.update_changed),
+                )
             logging.info("Dados inseridos no banco de dados com sucesso.")
+            self._update_crawl_state()
+            return inserted, skipped
         except psycopg2.DatabaseError as e:
             logging.error(f"Erro ao salvar dados no banco: {e}")
+            return 0, 0
+
+    def _update_crawl_state(self) -> None:
+        """Registra o último ano ingerido sem lacunas desde o ano inicial."""
+        last_year = None
+        for year in range(self.start_year, self.end_year + 1):
+            if year not in self.completed_years:
+                break
+            last_year = year
+        if last_year is not None:
+            self.crawl_state.update(date(last_year, 12, 31), BASE_URL.format(last_year))
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> Tuple[int, int]:
     """Função principal para executar o scraper e salvar os dados."""
-    scraper = InvestmentScraper(start_year=2022)
-    scraper.scrape_investments()
-    scraper.save_to_postgres()
+    # Configuração de logging feita aqui, e não na importação, para que importar o módulo não crie arquivos
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("startupi.log"), logging.StreamHandler()]
+    )
+
+    parser = argparse.ArgumentParser(description="Coleta o ranking de investimentos do Startupi.")
+    parser.add_argument("--stream", action="store_true", help="Grava os registros no banco em lotes durante a coleta.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Registros por lote no modo --stream.")
+    parser.add_argument("--backfill", action="store_true", help="Recoleta todos os anos em paralelo e grava um registro por aporte.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Páginas de anos baixadas em paralelo no modo --backfill.")
+    parser.add_argument("--update-changed", action="store_true", help="Regrava os aportes existentes cujos campos mudaram.")
+    parser.add_argument("--resume", action="store_true", help="Retoma a última coleta interrompida (implica --stream).")
+    parser.add_argument("--replay", action="store_true", help="Reprocessa as páginas arquivadas, sem rede (implica --update-changed).")
+    parser.add_argument("--replay-workers", type=int, default=DEFAULT_WORKERS, help="Processos usados no modo --replay.")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.replay:
+            return InvestmentScraper(start_year=2022, incremental=False, update_changed=True).replay(args.replay_workers, args.batch_size)
+        if args.backfill:
+            return InvestmentScraper(start_year=2022, incremental=False, update_changed=args.update_changed).backfill(args.workers)
+
+        scraper = InvestmentScraper(start_year=2022, update_changed=args.update_changed)
+        if args.stream or args.resume:
+            return scraper.stream_to_postgres(args.batch_size, resume=args.resume)
+        scraper.scrape_investments()
+        return scraper.save_to_postgres()
+    finally:
+        metrics.write_report(TABLE_NAME)
 
 if __name__ == "__main__":
     main()
@@ -1,44 +1,120 @@
 import os
-import requests
-from bs4 import BeautifulSoup
-import time
-import csv
+import re
+import argparse
 import logging
-from datetime import datetime
-import psycopg2
-from psycopg2 import sql
-from psycopg2.extras import execute_values
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from urllib.parse import urlparse
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
 import sys
 
+if TYPE_CHECKING:
+    import requests
+
 # Adiciona o diretório src ao caminho de pesquisa
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
 from config.db_connection import DatabaseConnection
+from config.migrations import apply_migration
+from common.bulk_loader import bulk_upsert
+from common.checkpoint import Checkpoint, CheckpointMark, CrawlCheckpoint
+from common.content_hash import HashedTable
+from common.crawl_state import CrawlState, HighWaterMark
+from common.dates import parse_iso_date
+from common.html_parser import Strainer, make_soup
+from common import http_client
+from common.http_client import HttpClient, get_client
+from common.known_items import KnownItems
+from common.metrics import metrics
+from common.near_duplicates import CLUSTER_COLUMN, DEDUP_TABLES, NearDuplicateIndex
+from common.pipeline import DEFAULT_BATCH_SIZE, stream_to_postgres
+from common.replay import DEFAULT_WORKERS, replay_pages
+from common.search import SEARCH_INDEXES
+from common.term_matcher import TermMatcher
 
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("startups.log"), logging.StreamHandler()]
-)
-
 # Constantes
 BASE_URL = "https://startups.com.br/ultimas-noticias/page/"
 TERMOS = ["Aporte", "Fusão", "Aquisição", "M&A", "Série A", "Série B", "Série C"]
 MAX_PAGES = 2
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+ARTICLE_CACHE_TTL = 30 * 24 * 3600  # páginas de notícia mudam pouco após publicadas
 TABLE_NAME = "startups"
+TABLE_SPEC = HashedTable(
+    TABLE_NAME,
+    columns=("titulo", "resumo", "termo", "data"),
+    key_columns=("titulo", "data"),
+    content_columns=("resumo", "termo"),
+    legacy_constraint="unique_titulo_data",
+    reset_columns=(CLUSTER_COLUMN,),
+)
+# Apenas os elementos usados em cada página são montados pelo parser
+DATE_STRAINER = Strainer("time", class_="text-gray-500")
+LISTING_STRAINER = Strainer("div", class_="grid gap-row-6")
 
 class NewsScraper:
-    def __init__(self, base_url: str = BASE_URL, termos: List[str] = TERMOS, max_pages: int = MAX_PAGES) -> None:
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        termos: List[str] = TERMOS,
+        max_pages: int = MAX_PAGES,
+        max_workers: int = MAX_WORKERS,
+        max_per_host: int = MAX_PER_HOST,
+        incremental: bool = True,
+        skip_known: bool = True,
+        update_changed: bool = False,
+        http: Optional[HttpClient] = None,
+    ) -> None:
         """
         Inicializa o scraper com as configurações fornecidas.
+
+        :param max_workers: Máximo de páginas de notícia buscadas em paralelo (1 desativa o paralelismo).
+        :param max_per_host: Máximo de requisições simultâneas a um mesmo host.
+        :param incremental: Interrompe a paginação ao alcançar notícias já ingeridas em execuções anteriores.
+        :param skip_known: Não busca a página de notícias cujo título já está na tabela.
+        :param update_changed: Regrava as notícias já existentes cujo resumo ou termo mudou (desativa skip_known).
+        :param http: Cliente HTTP (padrão: o compartilhado no processo; na reprodução, um ArchiveClient).
         """
         self.all_news: List[List[str]] = []
         self.base_url = base_url
         self.termos = termos
+        self.matcher = TermMatcher(termos)
         self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self.http = http or get_client()
+        self.http.set_cache_policy(r"^https://startups\.com\.br/(?!ultimas-noticias/)", ARTICLE_CACHE_TTL)
+        self.incremental = incremental
+        self.skip_known = skip_known
+        # Preenchidos por _prepare_database no primeiro acesso ao banco
+        self.crawl_state: Optional[CrawlState] = None
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        self.high_water_mark = HighWaterMark()
+        self.known_titles: Optional[KnownItems] = None
+        self._newest_url: Optional[str] = None
+        self._newest_date: Optional[date] = None
+        self.update_changed = update_changed
+        # Definido apenas no modo --stream, em que cada página é gravada antes de o checkpoint avançar
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+
+    def _prepare_database(self) -> None:
+        """
+        Cria/atualiza as tabelas e lê o estado da coleta no primeiro acesso ao banco, e não no construtor,
+        para que instanciar o scraper não abra conexões.
+        """
+        if self.crawl_state is not None:
+            return
         self._setup_database()
+        self.crawl_state = CrawlState(TABLE_NAME)
+        self.near_duplicates = NearDuplicateIndex()
+        if self.incremental:
+            self.high_water_mark = self.crawl_state.get()
+        if self.skip_known and not self.update_changed:
+            self.known_titles = KnownItems(TABLE_NAME, ["titulo"])
 
     def _setup_database(self) -> None:
         """Configura a conexão com o banco de dados e cria a tabela."""
@@ -52,129 +128,328 @@ class NewsScraper:
             CONSTRAINT unique_titulo_data UNIQUE (titulo, data)
         );
         """
-        with DatabaseConnection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(create_table_query)
-                conn.commit()
+        apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+        apply_migration(f"{TABLE_NAME}_0002_hash_conteudo", TABLE_SPEC.migration)
+        apply_migration(f"{TABLE_NAME}_0003_busca_textual", SEARCH_INDEXES[TABLE_NAME].migration)
+        apply_migration(f"{TABLE_NAME}_0004_cluster_id", DEDUP_TABLES[TABLE_NAME].migration)
+        apply_migration(f"{TABLE_NAME}_0005_atualizado_em", TABLE_SPEC.updated_at_migration)
         logging.info(f"Tabela {TABLE_NAME} verificada/criada com sucesso.")
 
-    def get_news_date(self, news_url: str) -> Optional[str]:
+    def get_news_date(self, news_url: str) -> Optional[date]:
         """
         Obtém a data de uma notícia a partir de sua URL.
 
         :param news_url: URL da notícia.
-        :return: Data da notícia no formato "DD/MM/YYYY" ou None em caso de erro.
+        :return: Data da notícia ou None em caso de erro.
         """
         try:
-            response = requests.get(news_url)
+            response = self.http.get(news_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = make_soup(response.content, DATE_STRAINER)
 
             time_element = soup.find("time", class_="text-gray-500")
-            if time_element and time_element.get("datetime"):
-                date_time = time_element["datetime"]
-                date_object = datetime.fromisoformat(date_time)
-                return date_object.strftime("%d/%m/%Y")
-            else:
+            news_date = parse_iso_date(time_element["datetime"]) if time_element and time_element.get("datetime") else None
+            if news_date is None:
                 logging.warning(f"Data não encontrada para a notícia: {news_url}")
-                return None
-        except requests.exceptions.RequestException as e:
+            return news_date
+        except http_client.RequestException as e:
             logging.error(f"Erro ao acessar a página da notícia {news_url}: {e}")
             return None
 
-    def scrape_paginated_news(self) -> None:
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Retorna o semáforo que limita as requisições simultâneas ao host da URL."""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _get_news_date_polite(self, news_url: str) -> Optional[date]:
+        """Obtém a data da notícia respeitando o limite de requisições por host."""
+        with self._host_slot(news_url):
+            return self.get_news_date(news_url)
+
+    def get_news_dates(self, news_urls: List[str]) -> List[Optional[date]]:
         """
-        Realiza o scraping das notícias paginadas e filtra as relevantes com base nos termos especificados.
+        Obtém as datas de várias notícias em paralelo.
 
-        :return: Lista de notícias encontradas.
+        :param news_urls: URLs das notícias.
+        :return: Datas (ou None), na mesma ordem das URLs.
         """
-        all_news = []
-        page = 1
+        if self.max_workers <= 1 or len(news_urls) <= 1:
+            return [self.get_news_date(news_url) for news_url in news_urls]
 
-        while page <= self.max_pages:
-            url = f"{self.base_url}{page}/"
-            logging.info(f"Acessando página {page}...")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(news_urls))) as executor:
+            return list(executor.map(self._get_news_date_polite, news_urls))
 
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
+    def parse_listing(self, content: bytes, page: object) -> Tuple[Optional[List[Dict[str, object]]], bool]:
+        """
+        Extrai as notícias relevantes de uma página da listagem, buscando a data de cada uma na página da notícia.
+
+        :param content: HTML da página da listagem.
+        :param page: Número (ou URL) da página, usado apenas nos logs.
+        :return: Tupla (notícias, conteúdo já ingerido alcançado); notícias é None quando a página não tem mais links.
+        """
+        soup = make_soup(content, LISTING_STRAINER)
+        grid_div = soup.find("div", class_="grid gap-row-6")
+        if not grid_div:
+            logging.warning(f"Elemento 'grid gap-row-6' não encontrado na página {page}. Pulando para a próxima página.")
+            return [], False
+
+        news_links = grid_div.find_all("a", class_="feed-link")
+        if not news_links:
+            logging.info(f"Sem mais notícias relevantes na página {page}. Encerrando...")
+            return None, False
+
+        reached_known = False
+        matches: List[Tuple[str, str, str, str]] = []
+        for link in news_links:
+            title = link.get("title")
+            news_url = link.get("href")
+            if self._newest_url is None:
+                self._newest_url = news_url
+
+            if news_url and news_url == self.high_water_mark.url:
+                logging.info(f"Notícia já ingerida encontrada na página {page}. Encerrando a paginação.")
+                reached_known = True
+                break
 
-                soup = BeautifulSoup(response.content, "html.parser")
-                grid_div = soup.find("div", class_="grid gap-row-6")
+            summary_element = link.find_next("p", class_="feed-excert feed-excert-md line-clamp-3")
 
-                if grid_div:
-                    news_links = grid_div.find_all("a", class_="feed-link")
+            if title and self.known_titles is not None and title in self.known_titles:
+                logging.info(f"Notícia já existente no banco, ignorando: {title}")
+                continue
 
-                    if not news_links:
-                        logging.info(f"Sem mais notícias relevantes na página {page}. Encerrando...")
-                        break
+            if title and news_url:
+                matched_terms = self.matcher.search(title)
+                if matched_terms:
+                    # Como no Neofeed, a notícia é registrada com o primeiro termo do vocabulário encontrado
+                    term = matched_terms[0]
+                    logging.info(f"Termos encontrados: {', '.join(matched_terms)}")
+                    news_summary = summary_element.get_text(strip=True) if summary_element else "Resumo não encontrado"
+                    matches.append((title, news_url, news_summary, term))
 
-                    for link in news_links:
-                        title = link.get("title")
-                        news_url = link.get("href")
-                        summary_element = link.find_next("p", class_="feed-excert feed-excert-md line-clamp-3")
+        # As páginas das notícias encontradas são buscadas em paralelo, mantendo a ordem da listagem
+        news = []
+        news_dates = self.get_news_dates([news_url for _, news_url, _, _ in matches])
+        for (title, news_url, news_summary, term), article_date in zip(matches, news_dates):
+            if not article_date:
+                continue
 
-                        if title and news_url:
-                            for term in self.termos:
-                                if term.lower() in title.lower():
-                                    logging.info(f"Termo encontrado: {term}")
+            if self.high_water_mark.data and article_date < self.high_water_mark.data:
+                reached_known = True
+                continue
+
+            if self._newest_date is None or article_date > self._newest_date:
+                self._newest_date = article_date
+            metrics.incr("articles")
+            news.append({
+                "titulo": title,
+                "resumo": news_summary,
+                "termo": term,
+                "data": article_date
+            })
+        return news, reached_known
+
+    def parse_archived_listing(self, response: "requests.Response") -> List[Dict[str, object]]:
+        """Extrai as notícias de uma versão arquivada da listagem (usado pelos processos da reprodução)."""
+        news, _ = self.parse_listing(response.content, response.url)
+        return news or []
+
+    def iter_news(self, start_page: int = 1) -> Iterator[Union[Dict[str, object], CheckpointMark]]:
+        """
+        Percorre as páginas da listagem e gera as notícias relevantes página a página, sem acumulá-las.
+
+        :param start_page: Primeira página da listagem a ser percorrida (usada ao retomar um checkpoint).
+        :return: Gerador de dicionários com titulo, resumo, termo e data; com checkpoint ativo, um
+                 CheckpointMark ao fim de cada página.
+        """
+        self._prepare_database()
+        page = start_page
+
+        while page <= self.max_pages:
+            url = f"{self.base_url}{page}/"
+            logging.info(f"Acessando página {page}...")
 
-                                    news_date = self.get_news_date(news_url)
-                                    article_date = datetime.strptime(news_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-                                    news_summary = summary_element.get_text(strip=True) if summary_element else "Resumo não encontrado"
+            try:
+                response = self.http.get(url)
+                response.raise_for_status()
+                metrics.incr("pages")
 
-                                    self.all_news.append({
-                                        "titulo": title,
-                                        "resumo": news_summary,
-                                        "termo": term,
-                                        "data": article_date
-                                    })
-                                    break
+                news, reached_known = self.parse_listing(response.content, page)
+                if news is None:
+                    break
+                yield from news
 
-                else:
-                    logging.warning(f"Elemento 'grid gap-row-6' não encontrado na página {page}. Pulando para a próxima página.")
+                if reached_known:
+                    logging.info("Conteúdo já ingerido alcançado. Encerrando...")
+                    break
 
+                if self.checkpoint is not None:
+                    yield CheckpointMark(self._checkpoint_position(page), (f"{self.base_url}{page + 1}/",))
                 page += 1
-                time.sleep(2)
 
-            except requests.exceptions.RequestException as e:
+            except http_client.RequestException as e:
                 logging.error(f"Erro ao acessar a página {url}: {e}")
                 break
 
+    def scrape_paginated_news(self) -> None:
+        """
+        Realiza o scraping das notícias paginadas e filtra as relevantes com base nos termos especificados.
+
+        :return: Lista de notícias encontradas.
+        """
+        self.all_news.extend(self.iter_news())
+
         logging.info(f"Total de notícias encontradas: {len(self.all_news)}")
         if self.all_news:
             logging.info(f"Exemplo de notícia: {self.all_news[0]}")
 
         logging.info("Scraping concluído.")
 
-    def save_to_postgres(self) -> None:
-        """Salva os artigos extraídos no banco de dados."""
+    def save_to_postgres(self) -> Tuple[int, int]:
+        """
+        Salva os artigos extraídos no banco de dados.
+
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
         if not self.all_news:
             logging.info("Nenhum artigo para salvar no banco de dados.")
-            return
+            self._update_crawl_state()
+            return 0, 0
 
         # Transformando a lista de dicionários em uma lista de tuplas
-        data_to_insert = [
+        data_to_insert = (
             (news["titulo"], news["resumo"], news["termo"], news["data"])
             for news in self.all_news
-        ]
+        )
 
-        insert_query = f"""
-        INSERT INTO {TABLE_NAME} (titulo, resumo, termo, data)
-        VALUES %s
-        ON CONFLICT (titulo, data) DO NOTHING;
-        """
         with DatabaseConnection() as conn:
-            with conn.cursor() as cursor:
-                execute_values(cursor, insert_query, data_to_insert)
-                conn.commit()
+            inserted, skipped = bulk_upsert(
+                conn, TABLE_NAME, TABLE_SPEC.stored_columns, TABLE_SPEC.with_hashes(data_to_insert),
+                **TABLE_SPEC.upsert_options(self.update_changed),
+            )
         logging.info("Dados inseridos no banco de dados com sucesso.")
+        self.near_duplicates.assign([TABLE_NAME])
+        self._update_crawl_state()
+        return inserted, skipped
+
+    def stream_to_postgres(self, batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = False) -> Tuple[int, int]:
+        """
+        Coleta e grava as notícias em lotes de tamanho fixo, sem acumulá-las em memória.
+
+        A cada página concluída e gravada, o número da página é salvo como checkpoint.
+
+        :param batch_size: Quantidade de notícias por lote gravado.
+        :param resume: Continua a partir da página seguinte à do último checkpoint.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
+        self.checkpoint = CrawlCheckpoint(TABLE_NAME)
+        if resume:
+            start_page = self._restore_checkpoint(self.checkpoint.load())
+        else:
+            self.checkpoint.clear()
+            start_page = 1
+
+        rows = (
+            news if isinstance(news, CheckpointMark)
+            else (news["titulo"], news["resumo"], news["termo"], news["data"])
+            for news in self.iter_news(start_page)
+        )
+        inserted, skipped = stream_to_postgres(
+            TABLE_SPEC.with_hashes(rows), TABLE_NAME, TABLE_SPEC.stored_columns,
+            batch_size=batch_size, checkpoint=self.checkpoint, **TABLE_SPEC.upsert_options(self.update_changed),
+        )
+        self.near_duplicates.assign([TABLE_NAME])
+        # A marca d'água só avança quando a coleta termina; uma execução interrompida não pula o que faltou
+        self._update_crawl_state()
+        logging.info("Scraping concluído.")
+        return inserted, skipped
+
+    def replay(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Reprocessa, sem rede, todas as versões arquivadas da listagem e grava as notícias extraídas.
+
+        As datas vêm das páginas de notícia arquivadas; notícias cuja página não foi arquivada são ignoradas.
+        A marca d'água e o checkpoint da coleta não são alterados.
+
+        :param workers: Processos usados no parsing.
+        :param batch_size: Quantidade de notícias por lote gravado.
+        :return: Tupla (inseridos, ignorados por já existirem).
+        """
+        self._prepare_database()
+        factory = partial(NewsScraper, self.base_url, self.termos, max_workers=1, incremental=False, skip_known=False)
+        rows = (
+            (news["titulo"], news["resumo"], news["termo"], news["data"])
+            for page_news in replay_pages(f"^{re.escape(self.base_url)}\\d+/$", factory, "parse_archived_listing", workers)
+            for news in page_news
+        )
+        inserted, skipped = stream_to_postgres(
+            TABLE_SPEC.with_hashes(rows), TABLE_NAME, TABLE_SPEC.stored_columns,
+            batch_size=batch_size, **TABLE_SPEC.upsert_options(self.update_changed),
+        )
+        self.near_duplicates.assign([TABLE_NAME])
+        logging.info("Reprocessamento concluído.")
+        return inserted, skipped
+
+    def _checkpoint_position(self, page: int) -> Dict[str, object]:
+        """Posição salva ao concluir uma página: a própria página e a notícia mais recente vista até ela."""
+        return {
+            "pagina": page,
+            "mais_recente_url": self._newest_url,
+            "mais_recente_data": self._newest_date.isoformat() if self._newest_date else None,
+        }
+
+    def _restore_checkpoint(self, checkpoint: Optional[Checkpoint]) -> int:
+        """
+        Restaura a notícia mais recente vista antes da interrupção, para que a marca d'água não regrida.
+
+        :return: Página em que a coleta continua.
+        """
+        if checkpoint is None:
+            logging.info("Nenhum checkpoint encontrado. A coleta começa pela primeira página.")
+            return 1
+        position = checkpoint.posicao
+        self._newest_url = position.get("mais_recente_url")
+        self._newest_date = parse_iso_date(position["mais_recente_data"]) if position.get("mais_recente_data") else None
+        logging.info(f"Retomando a coleta a partir da página {position['pagina'] + 1}.")
+        return position["pagina"] + 1
+
+    def _update_crawl_state(self) -> None:
+        """Avança a marca d'água com a notícia mais recente vista nesta execução."""
+        self.crawl_state.update(self._newest_date, self._newest_url)
+
+
+def main(argv: Optional[List[str]] = None) -> Tuple[int, int]:
+    # Configuração de logging feita aqui, e não na importação, para que importar o módulo não crie arquivos
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("startups.log"), logging.StreamHandler()]
+    )
 
+    parser = argparse.ArgumentParser(description="Coleta notícias de investimentos do startups.com.br.")
+    parser.add_argument("--stream", action="store_true", help="Grava as notícias no banco em lotes durante a coleta.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Notícias por lote no modo --stream.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Páginas de notícia buscadas em paralelo.")
+    parser.add_argument("--update-changed", action="store_true", help="Regrava as notícias existentes cujo conteúdo mudou.")
+    parser.add_argument("--resume", action="store_true", help="Retoma a última coleta interrompida (implica --stream).")
+    parser.add_argument("--replay", action="store_true", help="Reprocessa as páginas arquivadas, sem rede (implica --update-changed).")
+    parser.add_argument("--replay-workers", type=int, default=DEFAULT_WORKERS, help="Processos usados no modo --replay.")
+    args = parser.parse_args(argv)
 
-def main() -> None:
-    scraper = NewsScraper()
-    scraper.scrape_paginated_news()
-    scraper.save_to_postgres()
+    scraper = NewsScraper(max_workers=args.workers, update_changed=args.update_changed or args.replay)
+    try:
+        if args.replay:
+            return scraper.replay(args.replay_workers, args.batch_size)
+        if args.stream or args.resume:
+            return scraper.stream_to_postgres(args.batch_size, resume=args.resume)
+        scraper.scrape_paginated_news()
+        return scraper.save_to_postgres()
+    finally:
+        metrics.write_report(TABLE_NAME)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,63 @@
+import os
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+# Constantes
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics_data")
+# Esquema único das quatro fontes; colunas que a fonte não tem ficam nulas (ex.: termo no Startupi)
+SCHEMA = pa.schema([
+    ("fonte", pa.string()),
+    ("id", pa.int64()),
+    ("titulo", pa.string()),
+    ("resumo", pa.string()),
+    ("termo", pa.string()),
+    ("data", pa.date32()),
+    ("ano", pa.int16()),
+    ("mes", pa.int8()),
+])
+PARTITION_COLUMNS = ["ano", "mes"]
+COLUMNS = [name for name in SCHEMA.names if name not in PARTITION_COLUMNS]
+
+
+def query(
+    termos: Optional[Sequence[str]] = None,
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    fontes: Optional[Sequence[str]] = None,
+    columns: Optional[Sequence[str]] = None,
+    root: str = ANALYTICS_DIR,
+) -> pd.DataFrame:
+    """
+    Consulta os arquivos Parquet exportados, sem acessar o PostgreSQL.
+
+    Os filtros de data descartam as partições (ano) fora do intervalo antes da leitura; os demais
+    usam as estatísticas dos arquivos para pular os grupos de linhas que não podem casar.
+
+    :param termos: Termos aceitos (coluna termo); o Startupi e o Fusões não têm termo e ficam de fora.
+    :param inicio: Data mínima (inclusive).
+    :param fim: Data máxima (inclusive).
+    :param fontes: Fontes aceitas (startups, neofeed, startupi, fusoes_aquisicoes).
+    :param columns: Colunas retornadas (padrão: todas do esquema, exceto as de partição).
+    :return: DataFrame ordenado por data, da mais recente para a mais antiga.
+    """
+    filters: List[Tuple[str, str, object]] = []
+    if inicio is not None:
+        filters += [("ano", ">=", inicio.year), ("data", ">=", inicio)]
+    if fim is not None:
+        filters += [("ano", "<=", fim.year), ("data", "<=", fim)]
+    if termos:
+        filters.append(("termo", "in", list(termos)))
+    if fontes:
+        filters.append(("fonte", "in", list(fontes)))
+
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=list(columns or COLUMNS))
+    frame = pd.read_parquet(
+        root, engine="pyarrow", columns=list(columns or COLUMNS), filters=filters or None
+    )
+    if "data" in frame.columns:
+        frame = frame.sort_values("data", ascending=False, ignore_index=True)
+    return frame
@@ -0,0 +1,241 @@
+import os
+import sys
+import glob
+import json
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2.errors import UndefinedColumn, UndefinedTable
+
+# Adiciona o diretório src ao caminho de pesquisa
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
+from config.db_connection import DatabaseConnection
+from analytics.dataset import ANALYTICS_DIR, COLUMNS, PARTITION_COLUMNS, SCHEMA
+from common.content_hash import UPDATED_AT_COLUMN
+from common.metrics import metrics
+
+
+@dataclass(frozen=True)
+class SourceTable:
+    """Tabela de uma fonte e as expressões que a levam ao esquema único (titulo, resumo, termo)."""
+
+    fonte: str
+    titulo: str = "titulo"
+    resumo: str = "resumo"
+    termo: str = "termo"
+
+    def select_query(self) -> str:
+        return (
+            f"SELECT id, {self.titulo}, {self.resumo}, {self.termo}, data FROM {self.fonte} "
+            f"WHERE id > %s ORDER BY id"
+        )
+
+    def changed_query(self) -> str:
+        """Linhas já exportadas (id até o último) regravadas depois da exportação anterior, pelo índice de atualizado_em."""
+        return (
+            f"SELECT id, {self.titulo}, {self.resumo}, {self.termo}, data FROM {self.fonte} "
+            f"WHERE {UPDATED_AT_COLUMN} > %s::timestamptz - interval '{CHANGE_OVERLAP}' AND id <= %s ORDER BY id"
+        )
+
+
+# Constantes
+SOURCES: Tuple[SourceTable, ...] = (
+    SourceTable("startups"),
+    SourceTable("neofeed"),
+    SourceTable("startupi", titulo="NULL", termo="NULL"),
+    SourceTable("fusoes_aquisicoes", termo="NULL"),
+)
+CHUNK_ROWS = 50_000
+# Começa com "_" para ser ignorado pelo leitor de datasets do pyarrow
+STATE_FILE = "_export_state.json"
+# Regravações confirmadas depois do início da exportação anterior, mas com atualizado_em anterior a ele
+# (transações longas), entram na seguinte; reexportar uma linha inalterada não muda o dataset
+CHANGE_OVERLAP = "1 hour"
+
+
+class ParquetExporter:
+    """
+    Exporta as linhas novas de cada fonte para arquivos Parquet particionados por ano e mês.
+
+    O último id exportado de cada fonte e o início da última exportação ficam em STATE_FILE, no próprio
+    diretório do dataset. Cada execução grava as linhas com id maior que o último e regrava, nos arquivos
+    em que estão, as linhas já exportadas cujo atualizado_em é posterior à exportação anterior (regravadas
+    por --update-changed ou --replay). Apagar o diretório faz a próxima exportação recomeçar do zero.
+    """
+
+    def __init__(self, root: str = ANALYTICS_DIR, chunk_rows: int = CHUNK_ROWS, full_refresh: bool = False) -> None:
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.full_refresh = full_refresh
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.state: Dict[str, Dict[str, Any]] = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as file:
+            state = json.load(file)
+        # Formato antigo (só o último id): sem o início da última exportação, a fonte é reexportada uma vez por inteiro
+        return {fonte: entry if isinstance(entry, dict) else {"last_id": entry} for fonte, entry in state.items()}
+
+    def _save_state(self) -> None:
+        """Grava o estado em um arquivo temporário e o renomeia, para nunca deixá-lo pela metade."""
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def export(self, sources: Sequence[SourceTable] = SOURCES) -> Dict[str, int]:
+        """
+        Exporta as fontes informadas.
+
+        :return: Quantidade de linhas exportadas (novas ou regravadas) por fonte.
+        """
+        return {source.fonte: self.export_source(source) for source in sources}
+
+    def export_source(self, source: SourceTable) -> int:
+        """
+        Regrava as linhas já exportadas que mudaram e depois lê as linhas com id maior que o último exportado,
+        em blocos, gravando um arquivo por partição e bloco.
+
+        Sem o início da última exportação no estado (ou com full_refresh), os arquivos da fonte são
+        apagados e a fonte é exportada desde o início.
+        """
+        entry = self.state.get(source.fonte, {})
+        last_id = entry.get("last_id", 0)
+        last_export = entry.get("last_export")
+        exported = 0
+        try:
+            with DatabaseConnection() as conn:
+                with conn.cursor() as cursor:
+                    # Relógio do banco, o mesmo que preenche atualizado_em
+                    cursor.execute("SELECT NOW()")
+                    started = cursor.fetchone()[0].isoformat()
+                if last_id and (self.full_refresh or last_export is None):
+                    logging.info(f"Reexportando {source.fonte} por inteiro.")
+                    self._remove_files(source.fonte)
+                    last_id = 0
+                    self.state[source.fonte] = {"last_id": 0}
+                    self._save_state()
+                elif last_id:
+                    with conn.cursor() as cursor:
+                        cursor.execute(source.changed_query(), (last_export, last_id))
+                        changed = cursor.fetchall()
+                    if changed:
+                        with metrics.timer("export"):
+                            self._rewrite_rows(source.fonte, changed)
+                        exported += len(changed)
+                        logging.info(f"{len(changed)} linhas de {source.fonte} regravadas no dataset.")
+
+                # Cursor nomeado: o servidor entrega as linhas aos poucos, sem carregar a tabela na memória
+                with conn.cursor(name=f"export_{source.fonte}") as cursor:
+                    cursor.itersize = self.chunk_rows
+                    cursor.execute(source.select_query(), (last_id,))
+                    while True:
+                        rows = cursor.fetchmany(self.chunk_rows)
+                        if not rows:
+                            break
+                        with metrics.timer("export"):
+                            self._write_chunk(source.fonte, rows)
+                        last_id = rows[-1][0]
+                        exported += len(rows)
+                        # O estado avança bloco a bloco; um bloco regravado após uma falha sobrescreve o mesmo arquivo.
+                        # O início da exportação só é gravado ao final, para que uma falha repita as regravações
+                        self.state[source.fonte] = {**self.state.get(source.fonte, {}), "last_id": last_id}
+                        self._save_state()
+                self.state[source.fonte] = {"last_id": last_id, "last_export": started}
+                self._save_state()
+        except UndefinedTable:
+            logging.warning(f"Tabela {source.fonte} não existe. Fonte ignorada.")
+            return 0
+        except UndefinedColumn:
+            logging.warning(
+                f"Tabela {source.fonte} sem a coluna {UPDATED_AT_COLUMN}; execute o scraper para aplicar as migrações. "
+                "Fonte ignorada."
+            )
+            return 0
+
+        metrics.incr("rows_exported", exported)
+        logging.info(f"{exported} linhas de {source.fonte} exportadas (último id: {last_id}).")
+        return exported
+
+    def _remove_files(self, fonte: str) -> None:
+        """Apaga os arquivos da fonte em todas as partições."""
+        for path in glob.glob(os.path.join(self.root, "*", "*", f"{fonte}-*.parquet")):
+            os.remove(path)
+
+    def _rewrite_rows(self, fonte: str, rows: List[tuple]) -> None:
+        """
+        Substitui, nos arquivos da partição (ano e mês da data) em que estão, as linhas já exportadas que mudaram.
+        A data faz parte da chave das fontes, então uma linha regravada nunca muda de partição.
+        """
+        frame = pd.DataFrame(rows, columns=["id", "titulo", "resumo", "termo", "data"]).set_index("id")
+        dates = pd.to_datetime(frame["data"])
+        frame["data"] = dates.dt.date
+        missing = set(frame.index)
+        for (year, month), partition in frame.groupby([dates.dt.year, dates.dt.month]):
+            pattern = os.path.join(self.root, f"ano={year}", f"mes={month}", f"{fonte}-*.parquet")
+            for path in glob.glob(pattern):
+                table = pq.read_table(path)
+                current = table.to_pandas()
+                found = current["id"].isin(partition.index)
+                if not found.any():
+                    continue
+                ids = current.loc[found, "id"]
+                for column in ["titulo", "resumo", "termo", "data"]:
+                    current.loc[found, column] = partition.loc[ids, column].to_numpy()
+                missing -= set(ids)
+                # Grava em um arquivo temporário e renomeia, para que um leitor nunca veja o arquivo pela metade
+                temp_path = f"{path}.tmp"
+                pq.write_table(pa.Table.from_pandas(current, schema=table.schema, preserve_index=False), temp_path)
+                os.replace(temp_path, path)
+        if missing:
+            # Linhas ausentes do dataset (ex.: arquivo apagado à mão) voltam em um arquivo próprio
+            self._write_chunk(fonte, [(row_id, *frame.loc[row_id]) for row_id in sorted(missing)])
+
+    def _write_chunk(self, fonte: str, rows: List[tuple]) -> None:
+        frame = pd.DataFrame(rows, columns=["id", "titulo", "resumo", "termo", "data"])
+        frame.insert(0, "fonte", fonte)
+        dates = pd.to_datetime(frame["data"])
+        frame["ano"] = dates.dt.year
+        frame["mes"] = dates.dt.month
+        table = pa.Table.from_pandas(frame[[*COLUMNS, *PARTITION_COLUMNS]], schema=SCHEMA, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            self.root,
+            partition_cols=PARTITION_COLUMNS,
+            # Nome determinístico (fonte e primeiro id do bloco): reexportar o bloco substitui o arquivo
+            basename_template=f"{fonte}-{rows[0][0]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, int]:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("analytics.log"), logging.StreamHandler()]
+    )
+
+    source_names = [source.fonte for source in SOURCES]
+    parser = argparse.ArgumentParser(description="Exporta as notícias de todas as fontes para Parquet.")
+    parser.add_argument("--sources", nargs="+", choices=source_names, default=source_names, help="Fontes a exportar.")
+    parser.add_argument("--output", default=ANALYTICS_DIR, help="Diretório do dataset Parquet.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Linhas lidas do banco por arquivo gravado.")
+    parser.add_argument("--full-refresh", action="store_true", help="Apaga e reexporta as fontes por inteiro.")
+    args = parser.parse_args(argv)
+
+    exporter = ParquetExporter(args.output, args.chunk_rows, args.full_refresh)
+    try:
+        return exporter.export([source for source in SOURCES if source.fonte in args.sources])
+    finally:
+        metrics.write_report("analytics")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import statistics
+import subprocess
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Constantes
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), "import_budget.json")
+DEFAULT_REPEAT = 5
+# Folga fixa, em ms, somada à mediana ao recalibrar o orçamento com --update-budget. É pequena o bastante
+# para que voltar a carregar uma dependência como o requests (~80 ms) na importação faça o orçamento falhar
+BUDGET_TOLERANCE_MS = 25
+MODULES = [
+    "run_all",
+    "Startups.scrape_startups_news",
+    "Neofeed.scrape_neofeed_news",
+    "Startupi.scrape_startupi_investments",
+    "Fusoes_Aquisicoes.scrape_fusoes_aquisicoes",
+]
+# Dependências que só podem ser carregadas quando usadas, nunca na importação dos scrapers
+DEFERRED_MODULES = ["asyncio", "bs4", "cloudscraper", "dotenv", "pandas", "pyarrow", "requests", "urllib3"]
+
+# Executado em um interpretador novo: importa o módulo e informa quais dependências adiadas foram carregadas
+PROBE = (
+    "import sys; sys.path.insert(0, {src!r}); import {module}; import json; "
+    "print(json.dumps(sorted(name for name in {deferred!r} if name in sys.modules)))"
+)
+
+
+@dataclass
+class ImportResult:
+    """Tempo de importação de um módulo em um interpretador novo."""
+
+    module: str
+    median_ms: float = 0.0
+    runs_ms: List[float] = field(default_factory=list)
+    budget_ms: Optional[float] = None
+    deferred_loaded: List[str] = field(default_factory=list)
+    slowest: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        over_budget = self.budget_ms is not None and self.median_ms > self.budget_ms
+        return self.error is None and not over_budget and not self.deferred_loaded
+
+
+def parse_importtime(stderr: str, module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Lê a saída de `python -X importtime` e devolve o tempo acumulado (ms) do módulo e de cada import
+    feito diretamente por ele.
+    """
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # Cada import é listado ao terminar, depois dos que ele mesmo fez
+        if depth == 0:
+            if name.strip() == module:
+                return int(cumulative) / 1000, children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+    raise RuntimeError(f"Tempo de importação de {module} não encontrado na saída do -X importtime")
+
+
+def measure(module: str, repeat: int) -> ImportResult:
+    """Importa o módulo `repeat` vezes, cada uma em um processo novo, e guarda a mediana."""
+    result = ImportResult(module)
+    command = [sys.executable, "-X", "importtime", "-c", PROBE.format(src=SRC_DIR, module=module, deferred=DEFERRED_MODULES)]
+    for _ in range(repeat):
+        process = subprocess.run(command, capture_output=True, text=True, cwd=SRC_DIR)
+        if process.returncode != 0:
+            result.error = process.stderr.strip().splitlines()[-1]
+            return result
+        total_ms, children = parse_importtime(process.stderr, module)
+        result.runs_ms.append(total_ms)
+        result.deferred_loaded = json.loads(process.stdout.strip().splitlines()[-1])
+    result.median_ms = statistics.median(result.runs_ms)
+    # Dependências mais lentas da última execução, para orientar o que adiar em seguida
+    result.slowest = dict(sorted(children.items(), key=lambda item: item[1], reverse=True)[:5])
+    return result
+
+
+def load_budget(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def print_summary(results: List[ImportResult]) -> None:
+    lines = ["", f"{'Módulo':<45}{'Mediana (ms)':>14}{'Orçamento':>11}  Situação"]
+    for result in results:
+        budget = f"{result.budget_ms:.0f}" if result.budget_ms is not None else "-"
+        if result.error:
+            status = f"erro: {result.error}"
+        elif result.deferred_loaded:
+            status = f"carrega na importação: {', '.join(result.deferred_loaded)}"
+        else:
+            status = "ok" if result.ok else "acima do orçamento"
+        lines.append(f"{result.module:<45}{result.median_ms:>14.1f}{budget:>11}  {status}")
+        if result.slowest:
+            lines.append("    " + ", ".join(f"{name} {ms:.1f}ms" for name, ms in result.slowest.items()))
+    logging.info("\n".join(lines))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos pontos de entrada e compara com o orçamento.")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Módulos a medir.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Importações por módulo (vale a mediana).")
+    parser.add_argument("--budget", default=BUDGET_FILE, help="JSON com o orçamento, em ms, de cada módulo.")
+    parser.add_argument(
+        "--update-budget", action="store_true", help="Regrava o orçamento com a mediana de cada módulo mais a folga fixa."
+    )
+    parser.add_argument("--output", help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    budget = load_budget(args.budget)
+    results = []
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        result.budget_ms = budget.get(module)
+        results.append(result)
+    print_summary(results)
+
+    if args.update_budget:
+        for result in results:
+            if result.error is None:
+                budget[result.module] = round(result.median_ms + BUDGET_TOLERANCE_MS)
+        with open(args.budget, "w", encoding="utf-8") as file:
+            json.dump(budget, file, indent=2, ensure_ascii=False)
+            file.write("\n")
+        logging.info(f"Orçamento atualizado em {args.budget}")
+        return 0
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2, ensure_ascii=False)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
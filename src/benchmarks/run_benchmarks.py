@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Adiciona o diretório src ao caminho de pesquisa
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.stub_server import StubServer
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado do benchmark de um scraper."""
+
+    name: str
+    duration: float = 0.0
+    pages: int = 0
+    articles: int = 0
+    pages_per_s: float = 0.0
+    articles_per_s: float = 0.0
+    fetch_p50_ms: float = 0.0
+    fetch_p99_ms: float = 0.0
+    peak_rss_mb: float = 0.0
+    inserted: int = 0
+    skipped: int = 0
+    logged_errors: int = 0
+    error: Optional[str] = None
+
+
+class _ErrorCounter(logging.Handler):
+    """Conta os erros registrados pelo scraper, que trata as próprias exceções e só as reporta no log."""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+# Constantes
+DEFAULT_PAGES = 5
+# O stub não precisa de proteção contra sobrecarga; o limitador não deve dominar a medição
+UNLIMITED_RATE = 1_000_000.0
+# Prefixo do schema descartável em que cada execução grava as tabelas dos scrapers
+SCHEMA_PREFIX = "benchmark_"
+
+
+def _run_startups(base_url: str, pages: int) -> Tuple[int, int]:
+    from Startups.scrape_startups_news import NewsScraper
+
+    scraper = NewsScraper(
+        base_url=f"{base_url}/startups/ultimas-noticias/page/", max_pages=pages, incremental=False, skip_known=False
+    )
+    scraper.scrape_paginated_news()
+    return scraper.save_to_postgres()
+
+
+def _run_neofeed(base_url: str, pages: int) -> Tuple[int, int]:
+    from Neofeed import scrape_neofeed_news as module
+
+    module.SEARCH_URL = f"{base_url}/neofeed/?s={{term}}"
+    module.SEARCH_PAGE_URL = f"{base_url}/neofeed/page/{{page}}/?s={{term}}"
+    module.MAX_SEARCH_PAGES = pages
+    scraper = module.NewsScraper(incremental=False)
+    scraper.fetch_all(module.SEARCH_TERMS)
+    return scraper.save_to_postgres()
+
+
+def _run_startupi(base_url: str, pages: int) -> Tuple[int, int]:
+    from Startupi import scrape_startupi_investments as module
+
+    module.BASE_URL = f"{base_url}/startupi/ranking-investimentos-{{}}/"
+    # Uma página por ano do ranking
+    scraper = module.InvestmentScraper(start_year=datetime.now().year - pages, incremental=False)
+    scraper.scrape_investments()
+    return scraper.save_to_postgres()
+
+
+def _run_fusoes_aquisicoes(base_url: str, pages: int) -> Tuple[int, int]:
+    from Fusoes_Aquisicoes.scrape_fusoes_aquisicoes import NewsScraper
+
+    scraper = NewsScraper(
+        f"{base_url}/fusoes_aquisicoes/destaques-do-dia/page/", max_pages=pages, incremental=False, skip_known=False
+    )
+    return scraper.run()
+
+
+RUNNERS: Dict[str, Callable[[str, int], Tuple[int, int]]] = {
+    "startups": _run_startups,
+    "neofeed": _run_neofeed,
+    "startupi": _run_startupi,
+    "fusoes_aquisicoes": _run_fusoes_aquisicoes,
+}
+
+
+def run_benchmark(name: str, base_url: str, pages: int) -> BenchmarkResult:
+    """Executa um scraper contra o servidor stub e coleta as métricas da execução (em um processo próprio)."""
+    from common.metrics import metrics
+    from common.rate_limiter import get_rate_limiter
+
+    get_rate_limiter().set_rate(urlparse(base_url).netloc, UNLIMITED_RATE, UNLIMITED_RATE)
+    metrics.reset()
+    result = BenchmarkResult(name)
+    error_counter = _ErrorCounter()
+    logging.getLogger().addHandler(error_counter)
+    start = time.perf_counter()
+    try:
+        result.inserted, result.skipped = RUNNERS[name](base_url, pages) or (0, 0)
+    except Exception as e:
+        logging.exception(f"Falha no benchmark de {name}")
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        logging.getLogger().removeHandler(error_counter)
+    result.duration = time.perf_counter() - start
+    result.logged_errors = error_counter.count
+    # Os fixtures nunca estão vazios: nenhuma linha inserida ou já existente significa que o scraper
+    # engoliu uma falha (ex.: erro no banco) e devolveu (0, 0)
+    if result.error is None and result.inserted + result.skipped == 0:
+        result.error = f"nenhuma linha gravada ({result.logged_errors} erros no log)"
+
+    report = metrics.snapshot()
+    counters, fetch = report["counters"], report["stages"].get("fetch", {})
+    result.pages = int(counters.get("pages", 0))
+    result.articles = int(counters.get("articles", 0))
+    result.pages_per_s = result.pages / result.duration if result.duration else 0.0
+    result.articles_per_s = result.articles / result.duration if result.duration else 0.0
+    result.fetch_p50_ms = fetch.get("p50_s", 0.0) * 1000
+    result.fetch_p99_ms = fetch.get("p99_s", 0.0) * 1000
+    # ru_maxrss é informado em KB no Linux
+    result.peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+@contextmanager
+def isolated_schema(keep: bool = False) -> Iterator[str]:
+    """
+    Cria um schema descartável e faz os processos dos scrapers gravarem só nele (POSTGRES_SCHEMA), de modo que
+    o benchmark não toca as tabelas de produção, crawl_state, crawl_checkpoint nem as de quase duplicatas.
+    BENCHMARK_POSTGRES_DB, se definido, troca também o banco. O schema é apagado ao final, a menos que keep.
+    """
+    from config.db_connection import DatabaseConnection, close_pool
+
+    if os.getenv("BENCHMARK_POSTGRES_DB"):
+        os.environ["POSTGRES_DB"] = os.environ["BENCHMARK_POSTGRES_DB"]
+    schema = f"{SCHEMA_PREFIX}{os.getpid()}"
+    with DatabaseConnection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+        conn.commit()
+    os.environ["POSTGRES_SCHEMA"] = schema
+    logging.info(f"Tabelas do benchmark no schema {schema}.")
+    try:
+        yield schema
+    finally:
+        del os.environ["POSTGRES_SCHEMA"]
+        if keep:
+            logging.info(f"Schema {schema} mantido.")
+        else:
+            with DatabaseConnection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+                conn.commit()
+        close_pool()
+
+
+def run_benchmarks(names: List[str], pages: int, latency: float, jitter: float) -> List[BenchmarkResult]:
+    """
+    Sobe o servidor stub e executa os scrapers um de cada vez, cada um em um processo novo,
+    para que o pico de memória medido seja apenas o do scraper.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with StubServer(latency=latency, jitter=jitter) as server:
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                try:
+                    result = executor.submit(run_benchmark, name, server.base_url, pages).result()
+                except Exception as e:
+                    result = BenchmarkResult(name, error=f"{type(e).__name__}: {e}")
+            results.append(result)
+            logging.info(f"Benchmark {name} finalizado em {result.duration:.2f}s")
+    return results
+
+
+def print_summary(results: List[BenchmarkResult], baseline: Optional[Dict[str, dict]] = None) -> None:
+    """Exibe os resultados; com uma execução de referência, mostra a variação de páginas/s."""
+    lines = [
+        "",
+        f"{'Scraper':<20}{'Páginas/s':>11}{'Artigos/s':>11}{'p50 (ms)':>10}{'p99 (ms)':>10}{'RSS (MB)':>10}{'Variação':>10}  Erro",
+    ]
+    for result in results:
+        reference = (baseline or {}).get(result.name)
+        change = ""
+        if reference and reference.get("pages_per_s"):
+            change = f"{(result.pages_per_s / reference['pages_per_s'] - 1) * 100:+.1f}%"
+        lines.append(
+            f"{result.name:<20}{result.pages_per_s:>11.1f}{result.articles_per_s:>11.1f}{result.fetch_p50_ms:>10.1f}"
+            f"{result.fetch_p99_ms:>10.1f}{result.peak_rss_mb:>10.1f}{change:>10}  {result.error or ''}"
+        )
+    logging.info("\n".join(lines))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Mede o desempenho dos scrapers com páginas gravadas servidas localmente.")
+    parser.add_argument("--sources", nargs="+", choices=list(RUNNERS), default=list(RUNNERS), help="Scrapers a medir.")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help="Páginas de listagem (ou anos, no Startupi) por scraper.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência fixa simulada em cada resposta.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latência aleatória adicional (0 a N ms) em cada resposta.")
+    parser.add_argument("--output", help="Grava os resultados em JSON para comparação entre execuções.")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior usado como referência.")
+    parser.add_argument("--keep-schema", action="store_true", help="Mantém o schema com as tabelas gravadas pelo benchmark.")
+    args = parser.parse_args(argv)
+
+    # Cache em disco desativado: cada execução precisa buscar todas as páginas no stub
+    os.environ["HTTP_CACHE_DIR"] = ""
+    # As páginas do stub não devem entrar no arquivo de páginas usado pela reprodução
+    os.environ["PAGE_ARCHIVE_DIR"] = ""
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = {entry["name"]: entry for entry in json.load(file)}
+
+    with isolated_schema(args.keep_schema):
+        results = run_benchmarks(args.sources, args.pages, args.latency_ms / 1000, args.jitter_ms / 1000)
+    print_summary(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2, ensure_ascii=False)
+    return 0 if all(result.error is None for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+# Constantes
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ROUTES_FILE = "routes.json"
+
+
+def load_routes(fixtures_dir: str = FIXTURES_DIR) -> List[Tuple[Pattern[str], str]]:
+    """
+    Carrega as rotas de todas as fontes gravadas em fixtures/<fonte>/routes.json.
+
+    Cada rota associa uma expressão regular do caminho (prefixado com /<fonte>) a um arquivo HTML;
+    os grupos nomeados da expressão ficam disponíveis no template (ex.: {{PAGE}}), valendo "1" quando ausentes.
+    """
+    routes = []
+    for source in sorted(os.listdir(fixtures_dir)):
+        routes_path = os.path.join(fixtures_dir, source, ROUTES_FILE)
+        if not os.path.isfile(routes_path):
+            continue
+        with open(routes_path, encoding="utf-8") as file:
+            for route in json.load(file):
+                with open(os.path.join(fixtures_dir, source, route["file"]), encoding="utf-8") as html:
+                    routes.append((re.compile(f"^/{source}{route['pattern']}$"), html.read()))
+    return routes
+
+
+def render(template: str, variables: Dict[str, str]) -> str:
+    """Substitui as variáveis {{NOME}} do template."""
+    for name, value in variables.items():
+        template = template.replace(f"{{{{{name}}}}}", value)
+    return template
+
+
+class StubServer:
+    """
+    Servidor HTTP local que reproduz as páginas gravadas das fontes, com latência simulada.
+
+    Os links dos templates usam {{BASE}}, substituído pelo endereço do servidor, de modo que o scraper
+    continua navegando dentro do stub. {{YEAR}} e {{YEAR2}} mantêm as datas dentro da janela de coleta.
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: str = FIXTURES_DIR,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        :param latency: Atraso fixo de cada resposta, em segundos.
+        :param jitter: Atraso adicional aleatório (uniforme entre 0 e jitter), em segundos.
+        :param port: Porta a escutar (0 escolhe uma porta livre).
+        """
+        self.routes = load_routes(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = urlsplit(self.path).path
+                body = stub.resolve(path)
+                delay = stub.latency + (random.uniform(0, stub.jitter) if stub.jitter else 0.0)
+                if delay:
+                    time.sleep(delay)
+
+                if body is None:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args) -> None:
+                logging.debug(f"stub: {format % args}")
+
+        return Handler
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Retorna o HTML da primeira rota que casa com o caminho, ou None (404)."""
+        today = date.today()
+        for pattern, template in self.routes:
+            match = pattern.match(path)
+            if match:
+                variables = {
+                    "BASE": self.base_url,
+                    "YEAR": str(today.year),
+                    "YEAR2": f"{today.year % 100:02d}",
+                    **{name.upper(): value for name, value in match.groupdict(default="1").items()},
+                }
+                return render(template, variables)
+        return None
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        logging.info(f"Servidor stub escutando em {self.base_url} ({len(self.routes)} rotas).")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
@@ -0,0 +1,119 @@
+import io
+import logging
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from common.metrics import metrics
+
+# Constantes
+# Posição de cada linha no lote, preenchida pelo próprio COPY; entre linhas com a mesma chave, vale a última
+ORDINAL_COLUMN = "_ordem"
+
+
+def _csv_field(value: Any) -> str:
+    """Formata um valor para COPY em CSV: None vira NULL (campo vazio sem aspas) e o resto vai entre aspas."""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class _CsvRowStream(io.TextIOBase):
+    """Arquivo somente leitura que gera as linhas CSV sob demanda, sem materializar o lote inteiro."""
+
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        self._rows: Iterator[Sequence[Any]] = iter(rows)
+        self._buffer = ""
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += ",".join(_csv_field(value) for value in row) + "\n"
+            self.count += 1
+
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def bulk_upsert(
+    conn,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    conflict_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    change_column: Optional[str] = None,
+    reset_columns: Optional[Sequence[str]] = None,
+) -> Tuple[int, int]:
+    """
+    Carrega as linhas via COPY FROM STDIN em uma tabela temporária e as mescla na tabela final
+    com um único INSERT ... SELECT ... ON CONFLICT DO NOTHING. A transação é confirmada ao final.
+
+    Com update_columns, as linhas já existentes são regravadas (ON CONFLICT DO UPDATE), apenas
+    quando change_column (ex.: o hash do conteúdo) difere do valor gravado.
+
+    Quando o lote contém a mesma chave mais de uma vez, vale a última linha (ex.: na reprodução, a versão
+    mais recente de uma página arquivada).
+
+    :param conn: Conexão psycopg2.
+    :param table_name: Tabela de destino.
+    :param columns: Colunas na ordem dos valores de cada linha.
+    :param rows: Linhas a inserir.
+    :param conflict_columns: Colunas da restrição única usada para descartar duplicados.
+    :param update_columns: Colunas regravadas quando a linha já existe.
+    :param change_column: Coluna comparada para decidir se a linha existente mudou.
+    :param reset_columns: Colunas que voltam ao valor padrão quando a linha existente é regravada
+                          (ex.: cluster_id, recalculado a partir do conteúdo novo).
+    :return: Tupla (inseridas, ignoradas). As linhas atualizadas não entram em nenhuma das duas.
+    """
+    staging_table = f"_staging_{table_name}"
+    column_list = ", ".join(columns)
+    conflict_list = ", ".join(conflict_columns)
+    stream = _CsvRowStream(rows)
+
+    with metrics.timer("insert"), conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table_name} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {staging_table} ADD COLUMN {ORDINAL_COLUMN} BIGSERIAL")
+        cursor.copy_expert(f"COPY {staging_table} ({column_list}) FROM STDIN WITH (FORMAT csv)", stream)
+        insert = (
+            f"INSERT INTO {table_name} ({column_list}) "
+            # DISTINCT ON evita o erro de ON CONFLICT quando o próprio lote contém chaves repetidas;
+            # a ordenação pela posição no lote faz a última ocorrência de cada chave prevalecer
+            f"SELECT DISTINCT ON ({conflict_list}) {column_list} FROM {staging_table} "
+            f"ORDER BY {conflict_list}, {ORDINAL_COLUMN} DESC "
+        )
+        if update_columns:
+            assignments = ", ".join(
+                [f"{column} = EXCLUDED.{column}" for column in update_columns]
+                + [f"{column} = DEFAULT" for column in reset_columns or ()]
+            )
+            condition = f" WHERE {table_name}.{change_column} IS DISTINCT FROM EXCLUDED.{change_column}" if change_column else ""
+            # xmax = 0 apenas nas linhas recém-inseridas; nas atualizadas ele guarda a transação atual
+            cursor.execute(
+                f"{insert}ON CONFLICT ({conflict_list}) DO UPDATE SET {assignments}{condition} RETURNING (xmax = 0)"
+            )
+            written = [row[0] for row in cursor.fetchall()]
+            inserted = sum(written)
+            updated = len(written) - inserted
+        else:
+            cursor.execute(f"{insert}ON CONFLICT ({conflict_list}) DO NOTHING")
+            inserted = cursor.rowcount
+            updated = 0
+        conn.commit()
+
+    skipped = stream.count - inserted - updated
+    metrics.incr("rows_inserted", inserted)
+    metrics.incr("rows_updated", updated)
+    metrics.incr("conflicts", skipped)
+    logging.info(f"{table_name}: {inserted} linhas inseridas, {updated} atualizadas, {skipped} ignoradas por conflito.")
+    return inserted, skipped
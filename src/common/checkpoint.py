@@ -0,0 +1,84 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.db_connection import DatabaseConnection
+from config.migrations import apply_migration
+
+# Constantes
+TABLE_NAME = "crawl_checkpoint"
+
+
+@dataclass
+class Checkpoint:
+    """Progresso salvo de uma coleta interrompida."""
+
+    posicao: Dict[str, Any] = field(default_factory=dict)
+    pendentes: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class CheckpointMark:
+    """
+    Marcador intercalado às linhas geradas pelo scraper indicando que uma unidade (página, termo, ano)
+    terminou. stream_to_postgres grava as linhas anteriores ao marcador antes de salvar o checkpoint.
+    """
+
+    posicao: Dict[str, Any]
+    pendentes: Tuple[str, ...] = ()
+
+
+class CrawlCheckpoint:
+    """Persiste, por fonte, a última unidade concluída de uma coleta e as URLs que ainda faltam."""
+
+    def __init__(self, fonte: str) -> None:
+        self.fonte = fonte
+        self._setup_database()
+
+    def _setup_database(self) -> None:
+        """Cria a tabela de checkpoints se não existir."""
+        create_table_query = f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            fonte TEXT PRIMARY KEY,
+            posicao JSONB NOT NULL,
+            pendentes JSONB NOT NULL DEFAULT '[]',
+            atualizado_em TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        """
+        apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+
+    def load(self) -> Optional[Checkpoint]:
+        """Retorna o checkpoint da fonte, ou None se a última coleta terminou normalmente."""
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT posicao, pendentes, atualizado_em FROM {TABLE_NAME} WHERE fonte = %s", (self.fonte,)
+                )
+                row = cursor.fetchone()
+        if row is None:
+            return None
+        logging.info(f"Checkpoint de {self.fonte} salvo em {row[2]}: {row[0]} ({len(row[1])} URLs pendentes)")
+        return Checkpoint(posicao=row[0], pendentes=list(row[1]))
+
+    def save(self, posicao: Dict[str, Any], pendentes: Sequence[str] = ()) -> None:
+        """Registra a última unidade concluída; chamado somente depois que suas linhas foram gravadas."""
+        upsert_query = f"""
+        INSERT INTO {TABLE_NAME} (fonte, posicao, pendentes)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (fonte) DO UPDATE SET
+            posicao = EXCLUDED.posicao,
+            pendentes = EXCLUDED.pendentes,
+            atualizado_em = NOW();
+        """
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(upsert_query, (self.fonte, json.dumps(posicao), json.dumps(list(pendentes))))
+                conn.commit()
+
+    def clear(self) -> None:
+        """Remove o checkpoint ao fim de uma coleta completa."""
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {TABLE_NAME} WHERE fonte = %s", (self.fonte,))
+                conn.commit()
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+from common.checkpoint import CheckpointMark
+from common.text import fold
+
+# Constantes
+KEY_HASH_COLUMN = "hash_chave"
+CONTENT_HASH_COLUMN = "hash_conteudo"
+# Momento da gravação ou da última regravação da linha; usado pela exportação incremental (analytics)
+UPDATED_AT_COLUMN = "atualizado_em"
+FIELD_SEPARATOR = "\x1f"
+
+
+def normalize(value: Any) -> str:
+    """Forma canônica de um valor para o hash: texto sem acentos, caixa e espaços repetidos; datas em ISO."""
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (int, float, Decimal)):
+        # 1e7 (float do parser) e Decimal("10000000") (NUMERIC lido do banco) geram o mesmo hash
+        return format(Decimal(str(value)).normalize(), "f")
+    return fold(" ".join(str(value).split()))
+
+
+def content_hash(values: Iterable[Any]) -> str:
+    """MD5 dos valores normalizados, no formato aceito por colunas UUID (16 bytes no índice)."""
+    payload = FIELD_SEPARATOR.join(normalize(value) for value in values)
+    return hashlib.md5(payload.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+@dataclass(frozen=True)
+class HashedTable:
+    """
+    Tabela cuja restrição única é o hash das colunas que identificam a linha.
+
+    hash_chave (colunas de key_columns) substitui a restrição sobre as colunas de texto, mantendo o
+    índice pequeno; hash_conteudo (colunas de content_columns) permite regravar apenas as linhas
+    que mudaram desde a última coleta. As colunas de reset_columns são calculadas a partir do conteúdo
+    (ex.: cluster_id) e voltam ao valor padrão quando a linha é regravada, para serem recalculadas;
+    atualizado_em (padrão NOW()) também, de modo que marca tanto a inserção quanto a última regravação.
+    """
+
+    name: str
+    columns: Tuple[str, ...]
+    key_columns: Tuple[str, ...]
+    content_columns: Tuple[str, ...]
+    legacy_constraint: str
+    reset_columns: Tuple[str, ...] = ()
+
+    @property
+    def stored_columns(self) -> List[str]:
+        """Colunas gravadas, na ordem das linhas geradas por with_hashes."""
+        return [*self.columns, KEY_HASH_COLUMN, CONTENT_HASH_COLUMN]
+
+    def _hashes(self, row: Dict[str, Any]) -> Tuple[str, str]:
+        key = content_hash(row[column] for column in self.key_columns)
+        # Sem colunas de conteúdo (a chave já é o conteúdo), o hash de conteúdo repete o da chave
+        content = content_hash(row[column] for column in self.content_columns) if self.content_columns else key
+        return key, content
+
+    def with_hashes(self, rows: Iterable[Sequence[Any]]) -> Iterator[Tuple[Any, ...]]:
+        """Acrescenta hash_chave e hash_conteudo às linhas, sob demanda; marcadores de checkpoint passam adiante."""
+        for row in rows:
+            if isinstance(row, CheckpointMark):
+                yield row
+                continue
+            yield (*row, *self._hashes(dict(zip(self.columns, row))))
+
+    def upsert_options(self, update_changed: bool = False) -> Dict[str, Optional[Sequence[str]]]:
+        """Argumentos de bulk_upsert/stream_to_postgres para esta tabela."""
+        return {
+            "conflict_columns": [KEY_HASH_COLUMN],
+            "update_columns": [*self.columns, CONTENT_HASH_COLUMN] if update_changed else None,
+            "change_column": CONTENT_HASH_COLUMN if update_changed else None,
+            "reset_columns": [*self.reset_columns, UPDATED_AT_COLUMN] if update_changed else None,
+        }
+
+    def updated_at_migration(self, cursor) -> None:
+        """
+        Cria atualizado_em e o índice usado pela exportação incremental. As linhas existentes recebem o
+        momento da migração (um default estável não reescreve a tabela).
+        """
+        cursor.execute(
+            f"ALTER TABLE {self.name} ADD COLUMN IF NOT EXISTS {UPDATED_AT_COLUMN} TIMESTAMPTZ NOT NULL DEFAULT NOW()"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.name}_{UPDATED_AT_COLUMN}_idx ON {self.name} ({UPDATED_AT_COLUMN})"
+        )
+
+    def migration(self, cursor) -> None:
+        """
+        Cria as colunas de hash, preenche as linhas existentes e troca a restrição única pelo hash da chave.
+
+        Linhas que passam a ter a mesma chave normalizada (ex.: títulos que diferem só na acentuação)
+        são removidas, mantendo a mais antiga.
+        """
+        cursor.execute(
+            f"ALTER TABLE {self.name} "
+            f"ADD COLUMN IF NOT EXISTS {KEY_HASH_COLUMN} UUID, "
+            f"ADD COLUMN IF NOT EXISTS {CONTENT_HASH_COLUMN} UUID"
+        )
+        cursor.execute(f"SELECT id, {', '.join(self.columns)} FROM {self.name} ORDER BY id")
+        seen = set()
+        duplicates: List[int] = []
+        updates: List[Tuple[int, str, str]] = []
+        for row_id, *values in cursor.fetchall():
+            key, content = self._hashes(dict(zip(self.columns, values)))
+            if key in seen:
+                duplicates.append(row_id)
+                continue
+            seen.add(key)
+            updates.append((row_id, key, content))
+
+        if duplicates:
+            cursor.execute(f"DELETE FROM {self.name} WHERE id = ANY(%s)", (duplicates,))
+            logging.warning(f"{self.name}: {len(duplicates)} linhas duplicadas após a normalização foram removidas.")
+        execute_values(
+            cursor,
+            f"UPDATE {self.name} AS t SET {KEY_HASH_COLUMN} = v.chave::uuid, {CONTENT_HASH_COLUMN} = v.conteudo::uuid "
+            f"FROM (VALUES %s) AS v(id, chave, conteudo) WHERE t.id = v.id",
+            updates,
+            page_size=1000,
+        )
+        cursor.execute(
+            f"ALTER TABLE {self.name} "
+            f"ALTER COLUMN {KEY_HASH_COLUMN} SET NOT NULL, "
+            f"ALTER COLUMN {CONTENT_HASH_COLUMN} SET NOT NULL, "
+            f"DROP CONSTRAINT IF EXISTS {self.legacy_constraint}, "
+            f"ADD CONSTRAINT {self.name}_{KEY_HASH_COLUMN}_key UNIQUE ({KEY_HASH_COLUMN})"
+        )
@@ -0,0 +1,71 @@
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from config.db_connection import DatabaseConnection
+from config.migrations import apply_migration
+
+# Constantes
+TABLE_NAME = "crawl_state"
+
+
+@dataclass
+class HighWaterMark:
+    """Conteúdo mais recente já ingerido por uma fonte (e termo, quando houver)."""
+
+    data: Optional[date] = None
+    url: Optional[str] = None
+
+
+class CrawlState:
+    """Persiste, por fonte e termo, a data e a URL mais recentes já ingeridas."""
+
+    def __init__(self, fonte: str) -> None:
+        self.fonte = fonte
+        self._setup_database()
+
+    def _setup_database(self) -> None:
+        """Cria a tabela de estado se não existir."""
+        create_table_query = f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            fonte TEXT NOT NULL,
+            termo TEXT NOT NULL DEFAULT '',
+            ultima_data DATE,
+            ultima_url TEXT,
+            atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (fonte, termo)
+        );
+        """
+        apply_migration(f"{TABLE_NAME}_0001_cria_tabela", create_table_query)
+
+    def get(self, termo: str = "") -> HighWaterMark:
+        """Retorna a marca d'água da fonte/termo (vazia se ainda não houver ingestão)."""
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT ultima_data, ultima_url FROM {TABLE_NAME} WHERE fonte = %s AND termo = %s",
+                    (self.fonte, termo),
+                )
+                row = cursor.fetchone()
+        if row is None:
+            return HighWaterMark()
+        logging.info(f"Marca d'água de {self.fonte}/{termo or '-'}: {row[0]} ({row[1]})")
+        return HighWaterMark(data=row[0], url=row[1])
+
+    def update(self, data: Optional[date], url: Optional[str], termo: str = "") -> None:
+        """Avança a marca d'água; a data só é substituída por uma mais recente."""
+        if data is None and url is None:
+            return
+        upsert_query = f"""
+        INSERT INTO {TABLE_NAME} (fonte, termo, ultima_data, ultima_url)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (fonte, termo) DO UPDATE SET
+            ultima_data = GREATEST({TABLE_NAME}.ultima_data, EXCLUDED.ultima_data),
+            ultima_url = COALESCE(EXCLUDED.ultima_url, {TABLE_NAME}.ultima_url),
+            atualizado_em = NOW();
+        """
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(upsert_query, (self.fonte, termo, data, url))
+                conn.commit()
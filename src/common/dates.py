@@ -0,0 +1,75 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+from common.text import fold
+
+# Constantes
+# Nomes e abreviações dos meses sem acento e em minúsculas, para casar com fold()
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+MESES.update({name[:3]: number for name, number in list(MESES.items())})
+
+LONG_DATE_PATTERN = re.compile(r"(\d{1,2})\s+de\s+([a-z]+)\.?\s+de\s+(\d{4})")
+SHORT_DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})")
+CACHE_SIZE = 4096
+
+
+def month_number(name: str) -> Optional[int]:
+    """Número do mês a partir do nome ou da abreviação em português ("Março", "MAR", "mar")."""
+    return MESES.get(fold(name.strip()))
+
+
+def _build_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_long_date(text: str) -> Optional[date]:
+    """
+    Converte datas por extenso ("19 de fevereiro de 2025") sem depender do locale do sistema.
+
+    :return: A data, ou None se o texto não estiver no formato esperado.
+    """
+    match = LONG_DATE_PATTERN.search(fold(text))
+    if not match:
+        return None
+    month = MESES.get(match.group(2))
+    if month is None:
+        return None
+    return _build_date(int(match.group(3)), month, int(match.group(1)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_short_date(text: str) -> Optional[date]:
+    """
+    Converte datas no formato "DD/MM/AA" ou "DD/MM/AAAA"; anos com dois dígitos são do século 21.
+
+    :return: A data, ou None se o texto não estiver no formato esperado.
+    """
+    match = SHORT_DATE_PATTERN.fullmatch(text.strip())
+    if not match:
+        return None
+    year = int(match.group(3))
+    if year < 100:
+        year += 2000
+    return _build_date(year, int(match.group(2)), int(match.group(1)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_iso_date(text: str) -> Optional[date]:
+    """
+    Converte datas ISO 8601, com ou sem horário e fuso ("2025-02-19T10:30:00-03:00").
+
+    :return: A data (no fuso informado), ou None se o texto não estiver no formato esperado.
+    """
+    try:
+        return datetime.fromisoformat(text.strip()).date()
+    except ValueError:
+        return None
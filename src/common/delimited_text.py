@@ -0,0 +1,135 @@
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
+
+# Elementos cujo conteúdo não é texto visível (o BeautifulSoup também os ignora em get_text)
+SKIPPED_TAGS = {"script", "style", "template"}
+
+
+class DelimitedTextExtractor(HTMLParser):
+    """
+    Extrai, durante o parsing, o texto de um elemento entre dois delimitadores.
+
+    Equivale a `get_text(strip=True)` do primeiro elemento com a tag e a classe informadas,
+    seguido de `split(start, 1)[-1]` e `split(end)[0]`, sem montar a árvore do documento e sem
+    copiar o texto inteiro: os textos são guardados em pedaços e descartados ao encontrar o
+    delimitador inicial, e o parsing termina no delimitador final. Os delimitadores são
+    localizados mesmo quando atravessam vários nós de texto.
+    """
+
+    def __init__(self, tag: str, class_: str, start: str, end: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.class_ = class_
+        self.start = start
+        self.end = end
+        self.found = False
+        self.done = False
+        self._depth = 0
+        self._skip_depth = 0
+        self._pieces: List[str] = []
+        self._tail = ""
+        self._started = False
+        # Um nó de texto pode chegar em várias chamadas quando o HTML é alimentado em pedaços
+        self._pending: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush()
+        if self.done:
+            return
+        if self._depth:
+            if tag == self.tag:
+                self._depth += 1
+            elif tag in SKIPPED_TAGS:
+                self._skip_depth += 1
+        elif tag == self.tag and dict(attrs).get("class") == self.class_:
+            self.found = True
+            self._depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        if not self._depth or self.done:
+            return
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == self.tag:
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if self._depth and not self._skip_depth and not self.done:
+            self._pending.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _flush(self) -> None:
+        """Processa o nó de texto completo, sem os espaços das pontas (como get_text(strip=True))."""
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if text and not self.done:
+            self._consume(text)
+
+    def _consume(self, text: str) -> None:
+        delimiter = self.end if self._started else self.start
+        window = self._tail + text
+        index = window.find(delimiter)
+        if index < 0:
+            self._pieces.append(text)
+            self._tail = window[-(len(delimiter) - 1):] if len(delimiter) > 1 else ""
+            return
+
+        if not self._started:
+            # Tudo o que veio antes do delimitador inicial é descartado
+            self._started = True
+            self._pieces = []
+            self._tail = ""
+            remainder = window[index + len(self.start):]
+            if remainder:
+                self._consume(remainder)
+            return
+
+        # O delimitador final pode começar em pedaços já guardados
+        kept = index - len(self._tail)
+        if kept >= 0:
+            self._pieces.append(text[:kept])
+        else:
+            self._trim(-kept)
+        self.done = True
+
+    def _trim(self, size: int) -> None:
+        """Remove os últimos caracteres do texto guardado."""
+        while size and self._pieces:
+            last = self._pieces.pop()
+            if len(last) > size:
+                self._pieces.append(last[:-size])
+                return
+            size -= len(last)
+
+    def text(self) -> str:
+        """Texto extraído; sem o delimitador inicial, o texto do elemento até o delimitador final."""
+        text = "".join(self._pieces)
+        if not self._started:
+            text = text.split(self.end)[0]
+        return text
+
+
+def extract_delimited_text(chunks: Iterable[str], tag: str, class_: str, start: str, end: str) -> Optional[str]:
+    """
+    Alimenta o extrator com o HTML em pedaços, parando assim que o trecho desejado termina.
+
+    :return: Texto entre os delimitadores, ou None se o elemento não existir na página.
+    """
+    extractor = DelimitedTextExtractor(tag, class_, start, end)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor.text() if extractor.found else None
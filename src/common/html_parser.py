@@ -0,0 +1,53 @@
+import os
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from common.metrics import metrics
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _default_backend() -> str:
+    """Usa o lxml quando instalado; caso contrário, o parser nativo do Python."""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+# Pode ser forçado com HTML_PARSER=html.parser (ex.: para comparar resultados entre backends)
+PARSER_BACKEND = os.getenv("HTML_PARSER") or _default_backend()
+
+
+class Strainer:
+    """
+    Filtro de elementos para make_soup, definido como constante no módulo do scraper.
+
+    O SoupStrainer é montado apenas no primeiro uso, para que importar um scraper não importe o bs4.
+    """
+
+    def __init__(self, name: Optional[str] = None, **attrs: Any) -> None:
+        self.name = name
+        self.attrs = attrs
+        self._strainer: Optional["SoupStrainer"] = None
+
+    def build(self) -> "SoupStrainer":
+        if self._strainer is None:
+            from bs4 import SoupStrainer
+
+            self._strainer = SoupStrainer(self.name, **self.attrs)
+        return self._strainer
+
+
+def make_soup(markup: Union[str, bytes], parse_only: Optional[Strainer] = None) -> "BeautifulSoup":
+    """
+    Cria o BeautifulSoup com o backend configurado.
+
+    :param markup: HTML da página.
+    :param parse_only: Restringe a árvore aos elementos necessários, evitando montar o documento inteiro.
+    """
+    from bs4 import BeautifulSoup
+
+    with metrics.timer("parse"):
+        return BeautifulSoup(markup, PARSER_BACKEND, parse_only=parse_only.build() if parse_only else None)
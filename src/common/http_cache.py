@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Pattern, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+# Constantes
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+DEFAULT_TTL: Optional[float] = 0  # 0 = sempre revalida com requisição condicional
+NEVER_EXPIRE: Optional[float] = None
+EVICTION_TARGET = 0.9  # após a evicção o cache fica com até 90% do limite
+# Cabeçalhos que deixam de valer porque o corpo é armazenado já descompactado
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+@dataclass
+class CacheEntry:
+    """Resposta armazenada no cache."""
+
+    url: str
+    body: bytes
+    headers: Dict[str, str]
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def to_response(self) -> "requests.Response":
+        """Reconstrói um objeto Response a partir da entrada do cache."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        # Sem isso, iter_content tentaria ler do socket (inexistente) em vez do corpo já carregado
+        response._content_consumed = True
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response.reason = "OK"
+        response.from_cache = True
+        return response
+
+    def validators(self) -> Dict[str, str]:
+        """Cabeçalhos para revalidação condicional da entrada."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Cache em disco (SQLite) de respostas HTTP, com corpos comprimidos, TTL por URL e evicção LRU."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._policies: List[Tuple[Pattern[str], Optional[float]]] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "responses.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+
+    def add_policy(self, pattern: str, ttl: Optional[float]) -> None:
+        """
+        Registra o TTL das URLs que casam com o padrão. A primeira política registrada que casar vence.
+
+        Registrar de novo um padrão existente apenas atualiza seu TTL, de modo que a lista não cresce
+        quando vários scrapers são criados no mesmo processo com o cliente compartilhado.
+
+        :param pattern: Expressão regular aplicada à URL.
+        :param ttl: Segundos de validade; NEVER_EXPIRE para conteúdo imutável e 0 para sempre revalidar.
+        """
+        compiled = re.compile(pattern)
+        for index, (registered, _) in enumerate(self._policies):
+            if registered.pattern == compiled.pattern:
+                self._policies[index] = (compiled, ttl)
+                return
+        self._policies.append((compiled, ttl))
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """Retorna o TTL aplicável à URL."""
+        for pattern, ttl in self._policies:
+            if pattern.search(url):
+                return ttl
+        return DEFAULT_TTL
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Indica se a entrada pode ser usada sem consultar o servidor."""
+        ttl = self.ttl_for(entry.url)
+        return ttl is NEVER_EXPIRE or time.time() - entry.stored_at < ttl
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Busca a entrada da URL, atualizando seu último acesso."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, headers, encoding, etag, last_modified, stored_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+        body, headers, encoding, etag, last_modified, stored_at = row
+        return CacheEntry(url, zlib.decompress(body), json.loads(headers), encoding, etag, last_modified, stored_at)
+
+    def put(self, url: str, response: "requests.Response") -> None:
+        """Armazena uma resposta bem-sucedida."""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS}
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (url, body, headers, encoding, etag, last_modified, stored_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url, body, json.dumps(headers), response.encoding,
+                    response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                    now, now, len(body),
+                ),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """Renova a validade de uma entrada revalidada pelo servidor (304)."""
+        with self._lock:
+            now = time.time()
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas recentemente até respeitar o tamanho máximo."""
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICTION_TARGET
+        removed = 0
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        logging.info(f"Cache HTTP: {removed} entradas removidas por LRU.")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Retorna o cache compartilhado no processo, ou None se HTTP_CACHE_DIR estiver vazio."""
+    global _cache
+    if not CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,252 @@
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Type, Union
+
+from common.http_cache import ResponseCache, get_cache
+from common.metrics import metrics
+from common.page_archive import PageArchive, get_archive
+from common.rate_limiter import THROTTLE_STATUSES, HostRateLimiter, get_rate_limiter
+
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
+
+# Constantes
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)  # (conexão, leitura) em segundos
+POOL_CONNECTIONS = 10  # quantidade de hosts com pool mantido em cache
+POOL_MAXSIZE = 4  # conexões keep-alive simultâneas por host
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+BACKOFF_JITTER = 0.5
+# 429 e 503 não entram aqui: são tratados pelo limitador adaptativo, que reduz a taxa do host antes de repetir
+RETRY_STATUSES = (500, 502, 504)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _accept_encoding() -> str:
+    """Anuncia brotli apenas quando há um decodificador instalado para o urllib3."""
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+
+@lru_cache(maxsize=None)
+def _jittered_retry() -> Type["Retry"]:
+    """
+    Retry com backoff exponencial acrescido de um jitter aleatório. A classe é criada no primeiro cliente,
+    para que importar este módulo (e os scrapers) não importe o requests e o urllib3.
+    """
+    from urllib3.util.retry import Retry
+
+    class JitteredRetry(Retry):
+        def get_backoff_time(self) -> float:
+            backoff = super().get_backoff_time()
+            if backoff <= 0:
+                return backoff
+            return backoff + random.uniform(0, BACKOFF_JITTER)
+
+    return JitteredRetry
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Expõe RequestException e Response do requests sem importá-lo junto com este módulo: os scrapers usam
+    `except http_client.RequestException`, avaliado só quando uma exceção chega ao except.
+    """
+    if name in ("RequestException", "Response"):
+        import requests
+
+        return getattr(requests, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class HttpClient:
+    """Cliente HTTP com sessão keep-alive, pool de conexões por host e retentativas."""
+
+    def __init__(
+        self,
+        session: Optional["requests.Session"] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        pool_maxsize: int = POOL_MAXSIZE,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        archive: Optional[PageArchive] = None,
+    ) -> None:
+        """
+        Inicializa o cliente.
+
+        :param session: Sessão a ser reaproveitada (ex.: a do cloudscraper). Uma nova é criada se omitida.
+        :param headers: Cabeçalhos padrão adicionados a todas as requisições.
+        :param timeout: Timeout padrão, em segundos, ou tupla (conexão, leitura).
+        :param pool_maxsize: Máximo de conexões simultâneas por host.
+        :param max_retries: Número máximo de retentativas por requisição.
+        :param backoff_factor: Fator do backoff exponencial entre retentativas.
+        :param cache: Cache de respostas consultado antes de cada GET.
+        :param rate_limiter: Limitador por host aplicado às requisições que vão à rede.
+        :param archive: Arquivo onde é guardado o corpo de cada página baixada com sucesso da rede.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.archive = archive
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        self.session.headers["Accept-Encoding"] = _accept_encoding()
+        self.session.headers["Connection"] = "keep-alive"
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = _jittered_retry()(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Reconfigura os adapters já montados (inclusive o adapter TLS do cloudscraper)
+        # em vez de substituí-los, para não perder configurações específicas da sessão.
+        for adapter in self.session.adapters.values():
+            if isinstance(adapter, HTTPAdapter):
+                adapter.max_retries = retry
+                adapter.init_poolmanager(POOL_CONNECTIONS, pool_maxsize, block=True)
+
+    def set_cache_policy(self, pattern: str, ttl: Optional[float]) -> None:
+        """Registra o TTL de cache das URLs que casam com o padrão (sem efeito se o cache estiver desativado)."""
+        if self.cache:
+            self.cache.add_policy(pattern, ttl)
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """
+        Executa um GET usando a sessão compartilhada e o timeout padrão.
+
+        Com cache habilitado, respostas ainda válidas são servidas do disco e as
+        expiradas são revalidadas com If-None-Match/If-Modified-Since. Com o arquivo de páginas habilitado,
+        as respostas 200 vindas da rede são arquivadas (as do cache já foram arquivadas quando baixadas).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if not self.cache:
+            return self._archived(url, self._send(url, **kwargs))
+
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry):
+            metrics.incr("cache_hits")
+            return entry.to_response()
+        if entry:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.validators()}
+
+        response = self._send(url, **kwargs)
+        if entry and response.status_code == 304:
+            metrics.incr("cache_revalidated")
+            self.cache.touch(url)
+            return entry.to_response()
+        if response.status_code == 200:
+            self.cache.put(url, response)
+        return self._archived(url, response)
+
+    def _archived(self, url: str, response: "requests.Response") -> "requests.Response":
+        if self.archive and response.status_code == 200:
+            self.archive.put(url, response)
+        return response
+
+    def _send(self, url: str, **kwargs) -> "requests.Response":
+        """Faz o GET pela rede respeitando o limitador do host e repetindo as respostas 429/503."""
+        with metrics.timer("fetch"):
+            response = self._send_limited(url, **kwargs)
+        metrics.incr("http_requests")
+        metrics.incr("bytes_fetched", len(response.content))
+        if response.status_code >= 400:
+            metrics.incr("http_errors")
+        return response
+
+    def _send_limited(self, url: str, **kwargs) -> "requests.Response":
+        if not self.rate_limiter:
+            return self.session.get(url, **kwargs)
+
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(url)
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.exceptions.RequestException:
+                self.rate_limiter.feedback(url, None, time.monotonic() - start)
+                raise
+            self.rate_limiter.feedback(
+                url, response.status_code, time.monotonic() - start, response.headers.get("Retry-After")
+            )
+            if response.status_code not in THROTTLE_STATUSES or attempt == self.max_retries:
+                break
+            logging.warning(f"{url} respondeu {response.status_code}; repetindo após o intervalo do limitador.")
+        return response
+
+    def close(self) -> None:
+        """Fecha as conexões abertas da sessão."""
+        self.session.close()
+
+
+class ArchiveClient(HttpClient):
+    """
+    Cliente sem rede usado na reprodução: responde cada GET com a versão mais recente da URL no arquivo
+    de páginas, ou com 404 se a URL nunca foi arquivada.
+    """
+
+    def __init__(self, source: PageArchive) -> None:
+        super().__init__(max_retries=0)
+        self.source = source
+
+    def _send(self, url: str, **kwargs) -> "requests.Response":
+        page = self.source.latest(url)
+        if page is None:
+            import requests
+
+            metrics.incr("archive_misses")
+            response = requests.Response()
+            response.status_code = 404
+            response.url = url
+            response._content = b""
+            response.reason = "Não arquivada"
+            return response
+        metrics.incr("archive_hits")
+        return self.source.response(page)
+
+
+_clients: Dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str = "default", session_factory: Optional[Callable[[], "requests.Session"]] = None, **kwargs) -> HttpClient:
+    """
+    Retorna o cliente HTTP compartilhado no processo com o nome informado, criando-o na primeira chamada.
+
+    :param name: Nome do cliente (ex.: "default", "cloudscraper").
+    :param session_factory: Função que cria a sessão base do cliente.
+    :param kwargs: Parâmetros repassados ao construtor de HttpClient.
+    """
+    with _clients_lock:
+        if name not in _clients:
+            session = session_factory() if session_factory else None
+            kwargs.setdefault("cache", get_cache())
+            kwargs.setdefault("rate_limiter", get_rate_limiter())
+            kwargs.setdefault("archive", get_archive())
+            _clients[name] = HttpClient(session=session, **kwargs)
+            logging.info(f"Cliente HTTP '{name}' criado.")
+        return _clients[name]
+
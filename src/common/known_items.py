@@ -0,0 +1,52 @@
+import logging
+from typing import Any, Hashable, Optional, Sequence, Set
+
+from config.db_connection import DatabaseConnection
+
+
+class KnownItems:
+    """
+    Índice em memória dos itens já gravados em uma tabela, carregado com uma única consulta.
+
+    A consulta só é feita na primeira verificação: uma execução incremental que para antes de
+    consultar o índice (ex.: ao alcançar a marca d'água na primeira notícia) não lê a tabela.
+    """
+
+    def __init__(self, table_name: str, columns: Sequence[str]) -> None:
+        """
+        Prepara o índice das chaves existentes na tabela.
+
+        :param table_name: Tabela a ser consultada.
+        :param columns: Colunas que formam a chave. Com uma única coluna a chave é o próprio valor,
+                        com mais de uma é a tupla dos valores.
+        """
+        self.table_name = table_name
+        self.columns = tuple(columns)
+        self._keys: Optional[Set[Hashable]] = None
+
+    @property
+    def keys(self) -> Set[Hashable]:
+        if self._keys is None:
+            self._keys = self._load()
+        return self._keys
+
+    def _load(self) -> Set[Hashable]:
+        """Lê todas as chaves da tabela em uma única consulta."""
+        query = f"SELECT {', '.join(self.columns)} FROM {self.table_name}"
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+        keys = {row[0] for row in rows} if len(self.columns) == 1 else {tuple(row) for row in rows}
+        logging.info(f"{len(keys)} itens já existentes carregados de {self.table_name}.")
+        return keys
+
+    def add(self, key: Any) -> None:
+        """Registra um item recém-coletado para evitar buscá-lo de novo na mesma execução."""
+        self.keys.add(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
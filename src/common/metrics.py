@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+
+# Constantes
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+MAX_SAMPLES = 10_000  # amostras guardadas por etapa para o cálculo dos percentis
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+@dataclass
+class _Timing:
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = 0.0
+    samples: List[float] = field(default_factory=list)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        # Amostragem de reservatório: memória constante mesmo em coletas longas
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            index = random.randrange(self.count)
+            if index < MAX_SAMPLES:
+                self.samples[index] = seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Metrics:
+    """Coleta tempos por etapa (fetch, parse, match, insert...) e contadores de uma execução."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._timings: Dict[str, _Timing] = {}
+        self._counters: Dict[str, float] = {}
+        self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Registra a duração de uma ocorrência da etapa."""
+        with self._lock:
+            self._timings.setdefault(stage, _Timing()).add(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Mede o bloco e registra sua duração na etapa informada."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Incrementa um contador (páginas, artigos, bytes, acertos de cache, conflitos...)."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Retorna o relatório da execução como dicionário."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": timing.count,
+                    "total_s": round(timing.total, 6),
+                    "min_s": round(timing.min, 6) if timing.count else 0.0,
+                    "max_s": round(timing.max, 6),
+                    **{f"p{int(q * 100)}_s": round(timing.quantile(q), 6) for q in QUANTILES},
+                }
+                for stage, timing in self._timings.items()
+            }
+            counters = dict(self._counters)
+        return {
+            "started_at": self.started_at,
+            "elapsed_s": round(time.time() - self.started_at, 3),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self, source: str) -> str:
+        """Exporta as métricas no formato texto do Prometheus."""
+        report = self.snapshot()
+        lines = [
+            "# TYPE scraper_stage_seconds summary",
+        ]
+        for stage, values in report["stages"].items():
+            labels = f'source="{source}",stage="{stage}"'
+            for q in QUANTILES:
+                lines.append(f'scraper_stage_seconds{{{labels},quantile="{q}"}} {values[f"p{int(q * 100)}_s"]}')
+            lines.append(f"scraper_stage_seconds_sum{{{labels}}} {values['total_s']}")
+            lines.append(f"scraper_stage_seconds_count{{{labels}}} {values['count']}")
+        for name, value in report["counters"].items():
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            lines.append(f'scraper_{name}_total{{source="{source}"}} {value}')
+        lines.append(f'scraper_run_seconds{{source="{source}"}} {report["elapsed_s"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, source: str, directory: str = METRICS_DIR) -> None:
+        """Grava o relatório da execução em JSON e no formato do Prometheus."""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{source}_metrics.json"), "w", encoding="utf-8") as file:
+            file.write(self.to_json())
+        with open(os.path.join(directory, f"{source}_metrics.prom"), "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus(source))
+        logging.info(f"Relatório de métricas gravado em {directory}/{source}_metrics.json")
+
+
+# Instância compartilhada pelo processo
+metrics = Metrics()
@@ -0,0 +1,333 @@
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from config.db_connection import DatabaseConnection
+from config.migrations import apply_migration
+from common.metrics import metrics
+from common.text import fold
+
+# Constantes
+SIGNATURES_TABLE = "near_duplicate_signatures"
+BANDS_TABLE = "near_duplicate_bands"
+CLUSTER_SEQUENCE = "near_duplicate_cluster_seq"
+CLUSTER_COLUMN = "cluster_id"
+SHINGLE_SIZE = 5  # caracteres por shingle; manchetes são curtas demais para shingles de palavras
+NUM_PERM = 64
+BANDS = 16  # 16 bandas de 4 linhas: pares com Jaccard acima de ~0,5 viram candidatos
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.6  # Jaccard estimado mínimo para dois textos entrarem no mesmo cluster
+SUMMARY_CHARS = 280  # início do resumo somado ao título; o corpo inteiro varia demais entre as fontes
+BATCH_SIZE = 1000
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Coeficientes (a, b) das funções de hash (a * x + b) mod p, fixos para que as assinaturas sejam estáveis."""
+    coefficients = []
+    for index in range(NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-{index}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def shingles(text: str) -> Set[int]:
+    """Shingles de caracteres do texto sem acentos, caixa e pontuação, como inteiros de 64 bits."""
+    normalized = " ".join(_NON_WORD.sub(" ", fold(text)).split())
+    if len(normalized) <= SHINGLE_SIZE:
+        pieces = {normalized} if normalized else set()
+    else:
+        pieces = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return {int.from_bytes(hashlib.blake2b(piece.encode(), digest_size=8).digest(), "big") for piece in pieces}
+
+
+def minhash(text: str) -> Optional[List[int]]:
+    """Assinatura MinHash do texto (NUM_PERM valores de 32 bits), ou None se não houver texto."""
+    values = shingles(text)
+    if not values:
+        return None
+    return [
+        min((a * value + b) % _MERSENNE_PRIME for value in values) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_hashes(signature: Sequence[int]) -> List[int]:
+    """Hash de cada banda da assinatura, como BIGINT com sinal; assinaturas com uma banda igual são candidatas."""
+    hashes = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(",".join(map(str, chunk)).encode(), digest_size=8).digest()
+        hashes.append(int.from_bytes(digest, "big", signed=True))
+    return hashes
+
+
+def normalize_key(key: Optional[str]) -> Optional[str]:
+    """Chave de identificação sem acentos, caixa e espaços repetidos, ou None se a tabela não tiver chave."""
+    if key is None:
+        return None
+    return " ".join(fold(key).split())
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Jaccard estimado: fração das posições iguais nas duas assinaturas."""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERM
+
+
+@dataclass(frozen=True)
+class DedupTable:
+    """
+    Tabela cujas linhas recebem cluster_id; text é a expressão SQL do texto usado na assinatura.
+
+    key é a expressão SQL dos campos que identificam a linha, para tabelas cujo texto é quase todo
+    padronizado (ex.: os aportes do Startupi): duas linhas com chave só entram no mesmo cluster se as
+    chaves forem iguais, por mais parecidos que sejam os textos.
+    """
+
+    name: str
+    text: str
+    key: Optional[str] = None
+
+    def migration(self, cursor) -> None:
+        """Cria a coluna cluster_id e o índice usado tanto pelos consumidores quanto pela busca de linhas pendentes."""
+        cursor.execute(f"ALTER TABLE {self.name} ADD COLUMN IF NOT EXISTS {CLUSTER_COLUMN} BIGINT")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.name}_{CLUSTER_COLUMN}_idx ON {self.name} ({CLUSTER_COLUMN})")
+
+    def reset(self, cursor) -> None:
+        """Apaga os clusters e as assinaturas da tabela, para que a próxima atribuição a agrupe de novo."""
+        cursor.execute(f"UPDATE {self.name} SET {CLUSTER_COLUMN} = NULL WHERE {CLUSTER_COLUMN} IS NOT NULL")
+        cursor.execute(f"SELECT to_regclass('{SIGNATURES_TABLE}')")
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(f"DELETE FROM {BANDS_TABLE} WHERE fonte = %s", (self.name,))
+            cursor.execute(f"DELETE FROM {SIGNATURES_TABLE} WHERE fonte = %s", (self.name,))
+
+
+DEDUP_TABLES: Dict[str, DedupTable] = {
+    table.name: table
+    for table in (
+        DedupTable("startups", f"concat_ws(' ', titulo, left(resumo, {SUMMARY_CHARS}))"),
+        DedupTable("neofeed", f"concat_ws(' ', titulo, left(resumo, {SUMMARY_CHARS}))"),
+        # No Fusões, titulo guarda o resumo da listagem e resumo o corpo inteiro do artigo
+        DedupTable("fusoes_aquisicoes", "titulo"),
+        # O texto dos aportes segue o mesmo modelo em todos os meses; sem a chave, aportes distintos viram um cluster só
+        DedupTable("startupi_deals", "texto", key="concat_ws('|', empresa, valor, data)"),
+    )
+}
+
+
+class NearDuplicateIndex:
+    """
+    Agrupa notícias quase idênticas de todas as fontes em clusters, usando MinHash e LSH.
+
+    As assinaturas e os hashes das bandas ficam no banco; os candidatos de cada linha nova são as linhas
+    com alguma banda igual, encontradas pelo índice (banda, hash) sem comparar com a tabela inteira.
+    Cada linha nova entra no cluster do candidato mais parecido acima de SIMILARITY_THRESHOLD (e com a
+    mesma chave, quando as duas linhas têm uma), ou abre um cluster novo.
+    """
+
+    def __init__(self) -> None:
+        self._setup_database()
+
+    def _setup_database(self) -> None:
+        """Cria as tabelas de assinaturas e de bandas e a sequência dos clusters."""
+        create_tables_query = f"""
+        CREATE SEQUENCE IF NOT EXISTS {CLUSTER_SEQUENCE};
+        CREATE TABLE IF NOT EXISTS {SIGNATURES_TABLE} (
+            fonte TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            {CLUSTER_COLUMN} BIGINT NOT NULL,
+            assinatura BIGINT[] NOT NULL,
+            PRIMARY KEY (fonte, id)
+        );
+        CREATE TABLE IF NOT EXISTS {BANDS_TABLE} (
+            banda SMALLINT NOT NULL,
+            hash BIGINT NOT NULL,
+            fonte TEXT NOT NULL,
+            id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS {BANDS_TABLE}_banda_hash_idx ON {BANDS_TABLE} (banda, hash);
+        """
+        apply_migration("near_duplicates_0001_cria_tabelas", create_tables_query)
+        apply_migration(
+            "near_duplicates_0002_chave", f"ALTER TABLE {SIGNATURES_TABLE} ADD COLUMN IF NOT EXISTS chave TEXT;"
+        )
+        # Usado para apagar as bandas de uma linha regravada antes de agrupá-la de novo
+        apply_migration(
+            "near_duplicates_0003_indice_bandas_linha",
+            f"CREATE INDEX IF NOT EXISTS {BANDS_TABLE}_fonte_id_idx ON {BANDS_TABLE} (fonte, id);",
+        )
+
+    def assign(self, table_names: Iterable[str]) -> int:
+        """
+        Atribui cluster_id às linhas das tabelas que ainda não têm um.
+
+        :return: Quantidade de linhas que entraram em um cluster já existente (quase duplicatas).
+        """
+        duplicates = 0
+        for table_name in table_names:
+            table = DEDUP_TABLES[table_name]
+            while True:
+                with metrics.timer("dedup"):
+                    processed, found = self._assign_batch(table)
+                duplicates += found
+                if processed < BATCH_SIZE:
+                    break
+        return duplicates
+
+    def _assign_batch(self, table: DedupTable) -> Tuple[int, int]:
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                # Processos de fontes diferentes atribuem clusters um de cada vez, para que duas cópias
+                # gravadas ao mesmo tempo vejam uma à outra
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (SIGNATURES_TABLE,))
+                cursor.execute(
+                    f"SELECT id, {table.text}, {table.key or 'NULL'} FROM {table.name} "
+                    f"WHERE {CLUSTER_COLUMN} IS NULL ORDER BY id LIMIT %s",
+                    (BATCH_SIZE,),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return 0, 0
+
+                # Linhas regravadas com conteúdo novo (--update-changed, --replay) voltam sem cluster_id, mas
+                # ainda têm a assinatura antiga, que não pode servir de candidata nem a elas nem às demais
+                self._forget(cursor, table, [row_id for row_id, _, _ in rows])
+
+                signatures = {row_id: minhash(text or "") for row_id, text, _ in rows}
+                keys = {row_id: normalize_key(key) for row_id, _, key in rows}
+                bands = {row_id: band_hashes(signature) for row_id, signature in signatures.items() if signature}
+                buckets, clustered = self._candidates(cursor, bands)
+
+                assignments: List[Tuple[int, int]] = []
+                duplicates = 0
+                for row_id, _, _ in rows:
+                    signature = signatures[row_id]
+                    cluster_id = None
+                    if signature:
+                        row_bands = list(enumerate(bands[row_id]))
+                        candidates = {key for band in row_bands for key in buckets.get(band, ())}
+                        cluster_id = self._best_cluster(signature, keys[row_id], candidates, clustered)
+                    if cluster_id is not None:
+                        duplicates += 1
+                    else:
+                        cursor.execute(f"SELECT nextval('{CLUSTER_SEQUENCE}')")
+                        cluster_id = cursor.fetchone()[0]
+                    assignments.append((row_id, cluster_id))
+                    if signature:
+                        # Linhas do próprio lote também são candidatas das seguintes
+                        key = (table.name, row_id)
+                        clustered[key] = (cluster_id, signature, keys[row_id])
+                        for band in row_bands:
+                            buckets.setdefault(band, []).append(key)
+
+                self._store(cursor, table, assignments, signatures, bands, keys)
+                conn.commit()
+
+        metrics.incr("near_duplicates", duplicates)
+        logging.info(f"{table.name}: {len(rows)} linhas agrupadas, {duplicates} quase duplicatas encontradas.")
+        return len(rows), duplicates
+
+    @staticmethod
+    def _forget(cursor, table: DedupTable, row_ids: List[int]) -> None:
+        """Apaga as assinaturas e bandas gravadas para as linhas (se houver), antes de agrupá-las de novo."""
+        cursor.execute(f"DELETE FROM {BANDS_TABLE} WHERE fonte = %s AND id = ANY(%s)", (table.name, row_ids))
+        cursor.execute(f"DELETE FROM {SIGNATURES_TABLE} WHERE fonte = %s AND id = ANY(%s)", (table.name, row_ids))
+
+    def _candidates(
+        self, cursor, bands: Dict[int, List[int]]
+    ) -> Tuple[Dict[Tuple[int, int], List[Tuple[str, int]]], Dict[Tuple[str, int], Tuple[int, List[int], Optional[str]]]]:
+        """
+        Linhas já agrupadas que compartilham alguma banda com as linhas do lote.
+
+        :return: Tupla (linhas por banda, cluster, assinatura e chave de cada linha).
+        """
+        pairs = {(band, value) for hashes in bands.values() for band, value in enumerate(hashes)}
+        if not pairs:
+            return {}, {}
+        band_numbers, band_values = zip(*pairs)
+        cursor.execute(
+            f"""
+            SELECT b.banda, b.hash, s.fonte, s.id, s.{CLUSTER_COLUMN}, s.assinatura, s.chave
+            FROM {BANDS_TABLE} b
+            JOIN unnest(%s::smallint[], %s::bigint[]) AS p(banda, hash) ON b.banda = p.banda AND b.hash = p.hash
+            JOIN {SIGNATURES_TABLE} s ON s.fonte = b.fonte AND s.id = b.id
+            """,
+            (list(band_numbers), list(band_values)),
+        )
+        buckets: Dict[Tuple[int, int], List[Tuple[str, int]]] = {}
+        clustered: Dict[Tuple[str, int], Tuple[int, List[int], Optional[str]]] = {}
+        for band, value, fonte, row_id, cluster_id, signature, key in cursor.fetchall():
+            buckets.setdefault((band, value), []).append((fonte, row_id))
+            clustered[(fonte, row_id)] = (cluster_id, signature, key)
+        return buckets, clustered
+
+    @staticmethod
+    def _best_cluster(
+        signature: List[int],
+        row_key: Optional[str],
+        candidates: Set[Tuple[str, int]],
+        clustered: Dict[Tuple[str, int], Tuple[int, List[int], Optional[str]]],
+    ) -> Optional[int]:
+        """
+        Cluster do candidato mais parecido, se a semelhança estimada passar do limite. Quando a linha e o
+        candidato têm chave, as chaves precisam ser iguais.
+        """
+        best_cluster, best_similarity = None, SIMILARITY_THRESHOLD
+        for key in candidates:
+            cluster_id, candidate, candidate_key = clustered[key]
+            if row_key is not None and candidate_key is not None and row_key != candidate_key:
+                continue
+            score = similarity(signature, candidate)
+            if score >= best_similarity:
+                best_cluster, best_similarity = cluster_id, score
+        return best_cluster
+
+    def _store(
+        self,
+        cursor,
+        table: DedupTable,
+        assignments: List[Tuple[int, int]],
+        signatures: Dict[int, Optional[List[int]]],
+        bands: Dict[int, List[int]],
+        keys: Dict[int, Optional[str]],
+    ) -> None:
+        """Grava o cluster de cada linha na tabela da fonte e as assinaturas, chaves e bandas das que têm texto."""
+        execute_values(
+            cursor,
+            f"UPDATE {table.name} AS t SET {CLUSTER_COLUMN} = v.cluster FROM (VALUES %s) AS v(id, cluster) WHERE t.id = v.id",
+            assignments,
+            page_size=1000,
+        )
+        execute_values(
+            cursor,
+            f"INSERT INTO {SIGNATURES_TABLE} (fonte, id, {CLUSTER_COLUMN}, assinatura, chave) VALUES %s "
+            f"ON CONFLICT (fonte, id) DO UPDATE SET {CLUSTER_COLUMN} = EXCLUDED.{CLUSTER_COLUMN}, "
+            f"assinatura = EXCLUDED.assinatura, chave = EXCLUDED.chave",
+            [
+                (table.name, row_id, cluster_id, signatures[row_id], keys[row_id])
+                for row_id, cluster_id in assignments
+                if signatures[row_id]
+            ],
+            page_size=1000,
+        )
+        execute_values(
+            cursor,
+            f"INSERT INTO {BANDS_TABLE} (banda, hash, fonte, id) VALUES %s",
+            [
+                (band, value, table.name, row_id)
+                for row_id, hashes in bands.items()
+                for band, value in enumerate(hashes)
+            ],
+            page_size=1000,
+        )
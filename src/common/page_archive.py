@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+from common.metrics import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+# Constantes
+ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", ".page_archive")
+# As páginas são gravadas uma vez e lidas só na reprodução; vale a compressão máxima
+COMPRESSION_LEVEL = 9
+
+
+@dataclass(frozen=True)
+class ArchivedPage:
+    """Versão arquivada de uma URL: o corpo fica em disco, endereçado pelo SHA-256."""
+
+    url: str
+    sha256: str
+    encoding: Optional[str]
+    first_seen: float
+    last_seen: float
+
+
+class PageArchive:
+    """
+    Arquivo das páginas HTML baixadas, para reprocessá-las sem rede.
+
+    Cada corpo é gravado comprimido em objects/<2 primeiros dígitos>/<sha256>.z, de modo que uma página
+    baixada várias vezes sem mudanças ocupa espaço uma única vez. O índice (SQLite) guarda as versões de
+    cada URL, com a primeira e a última vez em que cada versão foi vista.
+    """
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR) -> None:
+        self.archive_dir = archive_dir
+        os.makedirs(os.path.join(archive_dir, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(archive_dir, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.create_function("REGEXP", 2, lambda pattern, value: re.search(pattern, value) is not None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                encoding TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (url, sha256)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_url_last_seen ON pages (url, last_seen)")
+        self._conn.commit()
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.archive_dir, "objects", sha256[:2], f"{sha256}.z")
+
+    def put(self, url: str, response: "requests.Response") -> str:
+        """
+        Arquiva o corpo de uma resposta bem-sucedida.
+
+        :return: SHA-256 do corpo.
+        """
+        body = response.content
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Grava em um arquivo temporário e renomeia, para que outro processo nunca leia um objeto pela metade
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(zlib.compress(body, COMPRESSION_LEVEL))
+            os.replace(temp_path, path)
+            metrics.incr("archived_pages")
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO pages (url, sha256, encoding, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url, sha256) DO UPDATE SET last_seen = excluded.last_seen
+                """,
+                (url, sha256, response.encoding, now, now),
+            )
+            self._conn.commit()
+        return sha256
+
+    def read(self, page: ArchivedPage) -> bytes:
+        """Lê e descomprime o corpo de uma versão arquivada."""
+        with open(self._path(page.sha256), "rb") as file:
+            return zlib.decompress(file.read())
+
+    def response(self, page: ArchivedPage) -> "requests.Response":
+        """Reconstrói a resposta HTTP de uma versão arquivada, como se tivesse vindo da rede."""
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = page.url
+        response._content = self.read(page)
+        # Sem isso, iter_content tentaria ler do socket (inexistente) em vez do corpo já carregado
+        response._content_consumed = True
+        response.encoding = page.encoding
+        response.reason = "OK"
+        return response
+
+    def latest(self, url: str) -> Optional[ArchivedPage]:
+        """Retorna a versão mais recente da URL, ou None se ela nunca foi arquivada."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, sha256, encoding, first_seen, last_seen FROM pages WHERE url = ? "
+                "ORDER BY last_seen DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+        return ArchivedPage(*row) if row else None
+
+    def versions(self, pattern: str) -> List[ArchivedPage]:
+        """
+        Lista todas as versões das URLs que casam com a expressão regular, da mais antiga para a mais recente.
+
+        Versões idênticas de uma mesma URL aparecem uma única vez, mesmo que tenham sido baixadas várias vezes.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, sha256, encoding, first_seen, last_seen FROM pages WHERE url REGEXP ? "
+                "ORDER BY first_seen, url",
+                (pattern,),
+            ).fetchall()
+        return [ArchivedPage(*row) for row in rows]
+
+
+_archive: Optional[PageArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[PageArchive]:
+    """Retorna o arquivo de páginas compartilhado no processo, ou None se PAGE_ARCHIVE_DIR estiver vazio."""
+    global _archive
+    if not ARCHIVE_DIR:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive()
+            logging.info(f"Arquivo de páginas em {os.path.abspath(ARCHIVE_DIR)}.")
+        return _archive
@@ -0,0 +1,72 @@
+import logging
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from config.db_connection import DatabaseConnection
+from common.bulk_loader import bulk_upsert
+from common.checkpoint import CheckpointMark, CrawlCheckpoint
+
+# Constantes
+DEFAULT_BATCH_SIZE = 200
+
+
+def batched(
+    rows: Iterable[Union[Sequence[Any], CheckpointMark]], batch_size: int
+) -> Iterator[Tuple[List[Any], Optional[CheckpointMark]]]:
+    """
+    Agrupa as linhas em listas de até batch_size elementos, consumindo o iterável sob demanda.
+
+    Um CheckpointMark encerra o lote corrente antes do tamanho máximo e é devolvido junto com ele.
+    """
+    batch: List[Any] = []
+    for row in rows:
+        if isinstance(row, CheckpointMark):
+            yield batch, row
+            batch = []
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch, None
+            batch = []
+    if batch:
+        yield batch, None
+
+
+def stream_to_postgres(
+    rows: Iterable[Union[Sequence[Any], CheckpointMark]],
+    table_name: str,
+    columns: Sequence[str],
+    conflict_columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    update_columns: Optional[Sequence[str]] = None,
+    change_column: Optional[str] = None,
+    checkpoint: Optional[CrawlCheckpoint] = None,
+    reset_columns: Optional[Sequence[str]] = None,
+) -> Tuple[int, int]:
+    """
+    Grava as linhas geradas pelo scraper em lotes de tamanho fixo, confirmando cada lote.
+
+    A memória fica limitada a um lote e o que já foi gravado é mantido se a coleta for interrompida.
+
+    :param update_columns: Ver bulk_upsert; regrava as linhas existentes cujo change_column mudou.
+    :param reset_columns: Ver bulk_upsert.
+    :param checkpoint: Se informado, cada CheckpointMark é salvo depois que as linhas anteriores a ele
+                       foram confirmadas, e o checkpoint é removido ao fim da coleta.
+    :return: Tupla (inseridas, ignoradas) somando todos os lotes.
+    """
+    total_inserted = total_skipped = number = 0
+    for batch, mark in batched(rows, batch_size):
+        if batch:
+            number += 1
+            with DatabaseConnection() as conn:
+                inserted, skipped = bulk_upsert(
+                    conn, table_name, columns, batch, conflict_columns, update_columns, change_column,
+                    reset_columns=reset_columns,
+                )
+            total_inserted += inserted
+            total_skipped += skipped
+            logging.info(f"Lote {number} gravado em {table_name} ({len(batch)} linhas).")
+        if mark is not None and checkpoint is not None:
+            checkpoint.save(mark.posicao, mark.pendentes)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return total_inserted, total_skipped
@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Constantes
+INITIAL_RATE = 2.0  # requisições por segundo ao começar a falar com um host
+MIN_RATE = 0.1
+MAX_RATE = 20.0
+BURST = 2.0  # tokens acumuláveis, permite pequenas rajadas após períodos ociosos
+TARGET_LATENCY = 1.5  # segundos; respostas mais rápidas que isso aumentam a taxa
+INCREASE_STEP = 0.5  # aumento aditivo a cada resposta rápida
+DECREASE_FACTOR = 0.5  # redução multiplicativa em 429/503 ou erro de rede
+SLOW_DECREASE_FACTOR = 0.8  # redução quando a latência passa do dobro do alvo
+THROTTLE_STATUSES = (429, 503)
+
+
+@dataclass
+class _Bucket:
+    rate: float
+    max_rate: float
+    tokens: float = BURST
+    updated: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Interpreta o cabeçalho Retry-After, em segundos ou como data HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRateLimiter:
+    """
+    Limitador de requisições por host baseado em token bucket.
+
+    A taxa de cada host se adapta às respostas (AIMD): sobe aos poucos enquanto o servidor
+    responde rápido e cai pela metade em 429/503 ou erros de rede, respeitando o Retry-After.
+    """
+
+    def __init__(self, initial_rate: float = INITIAL_RATE, max_rate: float = MAX_RATE) -> None:
+        self.initial_rate = initial_rate
+        self.max_rate = max_rate
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> _Bucket:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = _Bucket(rate=self.initial_rate, max_rate=self.max_rate)
+            return self._buckets[host]
+
+    def set_rate(self, host: str, rate: float, max_rate: Optional[float] = None) -> None:
+        """Define a taxa inicial (e opcionalmente o teto) de um host específico."""
+        with self._lock:
+            self._buckets[host] = _Bucket(rate=rate, max_rate=max_rate or self.max_rate)
+
+    def acquire(self, url: str) -> None:
+        """Bloqueia até que uma requisição ao host da URL seja permitida."""
+        bucket = self._bucket(url)
+        while True:
+            with bucket.lock:
+                now = time.monotonic()
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                else:
+                    bucket.tokens = min(BURST, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                    bucket.updated = now
+                    if bucket.tokens >= 1:
+                        bucket.tokens -= 1
+                        return
+                    wait = (1 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def feedback(self, url: str, status: Optional[int], latency: float, retry_after: Optional[str] = None) -> None:
+        """
+        Ajusta a taxa do host conforme o resultado da requisição.
+
+        :param status: Código HTTP da resposta, ou None em erro de rede.
+        :param latency: Duração da requisição, em segundos.
+        :param retry_after: Valor do cabeçalho Retry-After, se houver.
+        """
+        bucket = self._bucket(url)
+        with bucket.lock:
+            if status is None or status in THROTTLE_STATUSES:
+                bucket.rate = max(MIN_RATE, bucket.rate * DECREASE_FACTOR)
+                delay = _retry_after_seconds(retry_after)
+                bucket.blocked_until = time.monotonic() + (delay if delay is not None else 1 / bucket.rate)
+                bucket.tokens = 0
+                logging.warning(f"Limitador: {urlparse(url).netloc} reduzido para {bucket.rate:.2f} req/s (status {status}).")
+            elif latency > 2 * TARGET_LATENCY:
+                bucket.rate = max(MIN_RATE, bucket.rate * SLOW_DECREASE_FACTOR)
+            elif latency <= TARGET_LATENCY and status < 400:
+                bucket.rate = min(bucket.max_rate, bucket.rate + INCREASE_STEP)
+
+
+_rate_limiter: Optional[HostRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Retorna o limitador compartilhado no processo."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter()
+        return _rate_limiter
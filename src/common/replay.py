@@ -0,0 +1,68 @@
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator
+
+from common.http_client import ArchiveClient
+from common.metrics import metrics
+from common.page_archive import ArchivedPage, get_archive
+
+# Constantes
+DEFAULT_WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 4  # páginas enviadas de uma vez a cada processo
+
+# Estado de cada processo do pool: o scraper é criado uma vez por processo, e não a cada página
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(factory: Callable[..., Any]) -> None:
+    archive = get_archive()
+    _worker["archive"] = archive
+    _worker["scraper"] = factory(http=ArchiveClient(archive))
+
+
+def _parse_page(method: str, page: ArchivedPage) -> Any:
+    """Chama o método de parsing do scraper com a resposta reconstruída; uma página com erro não interrompe as demais."""
+    try:
+        return getattr(_worker["scraper"], method)(_worker["archive"].response(page))
+    except Exception as e:
+        logging.error(f"Erro ao reprocessar {page.url} ({page.sha256[:12]}): {e}")
+        return None
+
+
+def replay_pages(
+    pattern: str, factory: Callable[..., Any], method: str, workers: int = DEFAULT_WORKERS
+) -> Iterator[Any]:
+    """
+    Reprocessa sem rede todas as versões arquivadas das URLs que casam com o padrão, distribuindo as páginas
+    entre processos para usar todos os núcleos.
+
+    Em cada processo, factory(http=ArchiveClient) cria o scraper, e as páginas referenciadas por uma página
+    de listagem (ex.: as notícias) são lidas do arquivo pelo próprio cliente HTTP do scraper.
+
+    :param pattern: Expressão regular das URLs reprocessadas (ex.: as páginas de listagem da fonte).
+    :param factory: Classe do scraper ou functools.partial dela; precisa ser importável pelos processos.
+    :param method: Nome do método do scraper que recebe a resposta arquivada e devolve o resultado da página.
+    :param workers: Quantidade de processos.
+    :return: Resultado de cada página, da versão mais antiga para a mais recente; as páginas com erro são omitidas.
+    """
+    archive = get_archive()
+    if archive is None:
+        logging.error("Arquivo de páginas desativado (PAGE_ARCHIVE_DIR vazio); nada a reprocessar.")
+        return
+    pages = archive.versions(pattern)
+    logging.info(f"Reprocessando {len(pages)} páginas arquivadas com {workers} processos.")
+    if not pages:
+        return
+
+    # "spawn" evita herdar conexões e locks do processo principal
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(pages)), mp_context=context, initializer=_init_worker, initargs=(factory,)
+    ) as executor:
+        for result in executor.map(_parse_page, itertools.repeat(method), pages, chunksize=CHUNK_SIZE):
+            metrics.incr("replayed_pages")
+            if result is not None:
+                yield result
@@ -0,0 +1,127 @@
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.db_connection import DatabaseConnection
+from common.metrics import metrics
+
+# Constantes
+SEARCH_COLUMN = "busca"
+TEXT_SEARCH_CONFIG = "portuguese"
+DEFAULT_LIMIT = 50
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """
+    Busca textual de uma tabela: coluna tsvector gerada a partir das colunas de texto, com índice GIN,
+    e índice btree em data.
+
+    titulo, resumo e termo são as expressões que levam a tabela ao formato único do resultado de search().
+    """
+
+    table: str
+    weighted_columns: Tuple[Tuple[str, str], ...]
+    titulo: str = "titulo"
+    resumo: str = "resumo"
+    termo: str = "termo"
+
+    def document(self) -> str:
+        """Expressão do tsvector; os pesos (A a D) fazem o título pesar mais que o corpo no ranking."""
+        return " || ".join(
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+            for column, weight in self.weighted_columns
+        )
+
+    def migration(self, cursor) -> None:
+        """Cria a coluna gerada e os índices; a coluna é mantida pelo próprio PostgreSQL a cada INSERT/UPDATE."""
+        cursor.execute(
+            f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS {SEARCH_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS ({self.document()}) STORED"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_{SEARCH_COLUMN}_idx ON {self.table} USING GIN ({SEARCH_COLUMN})")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_data_idx ON {self.table} (data)")
+
+    def select_query(self, filters: str) -> str:
+        return (
+            f"SELECT '{self.table}' AS fonte, id, {self.titulo} AS titulo, {self.resumo} AS resumo, "
+            f"{self.termo} AS termo, data, ts_rank_cd({SEARCH_COLUMN}, consulta) AS relevancia "
+            f"FROM {self.table}, websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %(consulta)s) AS consulta "
+            f"WHERE {SEARCH_COLUMN} @@ consulta{filters}"
+        )
+
+
+# Tabelas pesquisáveis; as migrações de cada scraper usam o índice da própria tabela
+SEARCH_INDEXES: Dict[str, SearchIndex] = {
+    index.table: index
+    for index in (
+        SearchIndex("startups", (("titulo", "A"), ("resumo", "B"))),
+        SearchIndex("neofeed", (("titulo", "A"), ("resumo", "B"))),
+        SearchIndex("startupi", (("resumo", "B"),), titulo="NULL", termo="NULL"),
+        SearchIndex(
+            "startupi_deals", (("empresa", "A"), ("investidores", "B"), ("texto", "B")),
+            titulo="empresa", resumo="texto", termo="rodada",
+        ),
+        SearchIndex("fusoes_aquisicoes", (("titulo", "A"), ("resumo", "B")), termo="NULL"),
+    )
+}
+
+
+@dataclass
+class SearchResult:
+    """Artigo encontrado por search(), no formato único das fontes."""
+
+    fonte: str
+    id: int
+    titulo: Optional[str]
+    resumo: Optional[str]
+    termo: Optional[str]
+    data: date
+    relevancia: float
+
+
+def search(
+    consulta: str,
+    fontes: Optional[Sequence[str]] = None,
+    termos: Optional[Sequence[str]] = None,
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> List[SearchResult]:
+    """
+    Busca nas tabelas de todas as fontes de uma vez, ordenando os resultados pela relevância.
+
+    A consulta segue a sintaxe de busca web do PostgreSQL: palavras são combinadas com E, frases entre
+    aspas devem aparecer em sequência, "or" combina alternativas e "-" exclui uma palavra
+    (ex.: '"série b" fintech'). As palavras são reduzidas ao radical em português.
+
+    :param fontes: Tabelas consultadas (padrão: todas de SEARCH_INDEXES).
+    :param termos: Termos aceitos (coluna termo; em startupi_deals, a rodada).
+    :param inicio: Data mínima (inclusive).
+    :param fim: Data máxima (inclusive).
+    :param limit: Máximo de resultados.
+    :return: Resultados do mais para o menos relevante; empates pela data mais recente.
+    """
+    filters = ""
+    if inicio is not None:
+        filters += " AND data >= %(inicio)s"
+    if fim is not None:
+        filters += " AND data <= %(fim)s"
+    if termos:
+        filters += " AND {termo} = ANY(%(termos)s)"
+
+    indexes = [SEARCH_INDEXES[name] for name in fontes] if fontes else list(SEARCH_INDEXES.values())
+    union = " UNION ALL ".join(
+        f"({index.select_query(filters.format(termo=index.termo))})" for index in indexes
+    )
+    query = f"{union} ORDER BY relevancia DESC, data DESC LIMIT %(limit)s"
+    params = {"consulta": consulta, "inicio": inicio, "fim": fim, "termos": list(termos or []), "limit": limit}
+
+    with metrics.timer("search"):
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+    logging.info(f"Busca '{consulta}': {len(rows)} resultados em {len(indexes)} tabelas.")
+    return [SearchResult(*row) for row in rows]
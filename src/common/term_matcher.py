@@ -0,0 +1,67 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+from common.metrics import metrics
+from common.text import fold
+
+
+class TermMatcher:
+    """
+    Localiza, em uma única passada pelo texto, todos os termos de um vocabulário.
+
+    Os termos são compilados em um autômato de Aho-Corasick, sem acento e sem caixa,
+    de modo que o custo da busca não cresce com o tamanho do vocabulário. Os termos
+    são tratados como texto literal ("M&A" não é uma expressão regular).
+    """
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self.terms: List[str] = list(dict.fromkeys(terms))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+        for index, term in enumerate(self.terms):
+            self._add(fold(term), index)
+        self._build_failure_links()
+
+    def _add(self, word: str, index: int) -> None:
+        """Insere um termo normalizado na trie."""
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[node][char] = child
+            node = child
+        self._output[node].add(index)
+
+    def _build_failure_links(self) -> None:
+        """Calcula os links de falha em largura, herdando as saídas dos sufixos."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+
+    def search(self, text: str) -> List[str]:
+        """Retorna todos os termos presentes no texto, na ordem do vocabulário."""
+        with metrics.timer("match"):
+            return self._search(text)
+
+    def _search(self, text: str) -> List[str]:
+        node = 0
+        found: Set[int] = set()
+        for char in fold(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                found |= self._output[node]
+        return [self.terms[index] for index in sorted(found)]
@@ -0,0 +1,15 @@
+import unicodedata
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(char: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", char)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def fold(text: str) -> str:
+    """Remove acentos e normaliza a caixa, para comparações como "Fusão" == "fusao"."""
+    if text.isascii():
+        return text.casefold()
+    return "".join(_fold_char(char) for char in text)
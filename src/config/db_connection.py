@@ -1,26 +1,134 @@
 import os
+import threading
+import time
+from typing import Dict, Optional
+
 import psycopg2
-from dotenv import load_dotenv
+from psycopg2 import extensions, pool
+
+from common.metrics import metrics
+
+# Constantes
+HEALTH_CHECK_INTERVAL = 30  # segundos ociosa antes de testar a conexão com SELECT 1
+
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# O ThreadedConnectionPool falha quando esgotado; o semáforo faz as threads aguardarem uma conexão livre.
+# Criado junto com o pool, depois que o .env foi lido.
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_last_used: Dict[int, float] = {}
+_env_loaded = False
+
+
+def _load_env() -> None:
+    """Lê o .env na primeira conexão, e não na importação, para que importar um scraper não acesse o disco."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
+
+
+def _connection_config() -> Dict[str, Optional[str]]:
+    _load_env()
+    config = {
+        "dbname": os.getenv("POSTGRES_DB"),
+        "user": os.getenv("POSTGRES_USER"),
+        "password": os.getenv("POSTGRES_PASSWORD"),
+        "host": os.getenv("POSTGRES_HOST"),
+        "port": os.getenv("POSTGRES_PORT"),
+    }
+    # Com POSTGRES_SCHEMA, todas as tabelas (inclusive as de controle) são criadas e lidas só nesse schema
+    schema = os.getenv("POSTGRES_SCHEMA")
+    if schema:
+        config["options"] = f"-c search_path={schema}"
+    return config
+
+
+def get_pool() -> pool.ThreadedConnectionPool:
+    """Retorna o pool de conexões do processo, criando-o na primeira chamada."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            config = _connection_config()
+            min_size = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+            _pool = pool.ThreadedConnectionPool(min_size, _pool_max_size(), **config)
+        return _pool
+
+
+def _pool_max_size() -> int:
+    _load_env()
+    return int(os.getenv("POSTGRES_POOL_MAX", "10"))
+
+
+def _get_pool_slots() -> threading.BoundedSemaphore:
+    global _pool_slots
+    with _pool_lock:
+        if _pool_slots is None:
+            _pool_slots = threading.BoundedSemaphore(_pool_max_size())
+        return _pool_slots
+
+
+def close_pool() -> None:
+    """Fecha todas as conexões do pool (ex.: ao final do processo)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+        _last_used.clear()
+
+
+def _is_healthy(conn: extensions.connection) -> bool:
+    """Verifica se a conexão ainda está utilizável; conexões ociosas há muito tempo são testadas no servidor."""
+    if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
 
-# Carregar variáveis do .env
-load_dotenv()
 
 class DatabaseConnection:
-    """Gerencia a conexão com o banco PostgreSQL usando context manager."""
+    """Empresta uma conexão do pool compartilhado do processo usando context manager."""
 
     def __init__(self):
-        self.config = {
-            "dbname": os.getenv("POSTGRES_DB"),
-            "user": os.getenv("POSTGRES_USER"),
-            "password": os.getenv("POSTGRES_PASSWORD"),
-            "host": os.getenv("POSTGRES_HOST"),
-            "port": os.getenv("POSTGRES_PORT"),
-        }
+        self.conn = None
+        self._pool = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
 
     def __enter__(self):
-        self.conn = psycopg2.connect(**self.config)
+        start = time.perf_counter()
+        self._slots = _get_pool_slots()
+        self._slots.acquire()
+        try:
+            self._pool = get_pool()
+            self.conn = self._pool.getconn()
+            if not _is_healthy(self.conn):
+                metrics.incr("db_reconnects")
+                self._pool.putconn(self.conn, close=True)
+                self.conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        # Inclui a espera por uma conexão livre quando o pool está esgotado
+        metrics.observe("db_acquire", time.perf_counter() - start)
         return self.conn
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.conn:
-            self.conn.close()
+            try:
+                # Descarta o que não foi confirmado, como fazia o fechamento da conexão
+                if not self.conn.closed and self.conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    self.conn.rollback()
+                _last_used[id(self.conn)] = time.monotonic()
+                self._pool.putconn(self.conn, close=bool(self.conn.closed))
+            finally:
+                self.conn = None
+                self._slots.release()
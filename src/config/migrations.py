@@ -0,0 +1,69 @@
+import logging
+import threading
+from typing import Callable, Optional, Set, Union
+
+from config.db_connection import DatabaseConnection
+
+# Constantes
+MIGRATIONS_TABLE = "schema_migrations"
+
+Migration = Union[str, Callable[..., None]]
+
+_applied: Optional[Set[str]] = None
+_lock = threading.Lock()
+
+
+def _load_applied(cursor) -> Set[str]:
+    """Cria a tabela de controle, se necessário, e lê as migrações já aplicadas."""
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            nome TEXT PRIMARY KEY,
+            aplicada_em TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    cursor.execute(f"SELECT nome FROM {MIGRATIONS_TABLE}")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migration(name: str, migration: Migration) -> bool:
+    """
+    Aplica uma migração de esquema uma única vez por banco.
+
+    As migrações já aplicadas são lidas uma vez por processo, de modo que instanciar
+    os scrapers de novo não executa DDL nem consultas adicionais.
+
+    :param name: Nome único da migração (ex.: "startups_0001_cria_tabela").
+    :param migration: SQL a executar ou função que recebe o cursor.
+    :return: True se a migração foi aplicada nesta chamada.
+    """
+    global _applied
+    with _lock:
+        if _applied is not None and name in _applied:
+            return False
+
+        with DatabaseConnection() as conn:
+            with conn.cursor() as cursor:
+                if _applied is None:
+                    _applied = _load_applied(cursor)
+                    conn.commit()
+                if name in _applied:
+                    return False
+
+                # Evita que dois processos apliquem a mesma migração ao mesmo tempo
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (name,))
+                cursor.execute(f"SELECT 1 FROM {MIGRATIONS_TABLE} WHERE nome = %s", (name,))
+                applied_now = cursor.fetchone() is None
+                if applied_now:
+                    if callable(migration):
+                        migration(cursor)
+                    else:
+                        cursor.execute(migration)
+                    cursor.execute(f"INSERT INTO {MIGRATIONS_TABLE} (nome) VALUES (%s)", (name,))
+                conn.commit()
+
+        _applied.add(name)
+        if applied_now:
+            logging.info(f"Migração {name} aplicada.")
+        return applied_now
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Adiciona o diretório src ao caminho de pesquisa
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+
+@dataclass(frozen=True)
+class Source:
+    """Fonte coletada pelo orquestrador e os argumentos repassados ao seu main()."""
+
+    name: str
+    module: str
+    argv: Tuple[str, ...] = ()
+
+
+@dataclass
+class SourceResult:
+    """Resultado da execução de uma fonte."""
+
+    name: str
+    status: str
+    duration: float
+    inserted: int = 0
+    skipped: int = 0
+    error: Optional[str] = None
+
+
+# Constantes
+# O limite de concorrência interno de cada fonte é definido pelos argumentos do seu main()
+SOURCES: Tuple[Source, ...] = (
+    Source("startups", "Startups.scrape_startups_news", ("--workers", "8")),
+    Source("neofeed", "Neofeed.scrape_neofeed_news"),
+    Source("startupi", "Startupi.scrape_startupi_investments"),
+    Source("fusoes_aquisicoes", "Fusoes_Aquisicoes.scrape_fusoes_aquisicoes"),
+)
+# Opções aceitas pelo main() de todas as fontes; as demais precisam do prefixo da fonte (ex.: --startupi.backfill)
+COMMON_FLAGS = frozenset({"--stream", "--batch-size", "--update-changed", "--resume", "--replay", "--replay-workers"})
+
+
+def split_source_argv(extra_argv: List[str], source_names: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Separa os argumentos repassados às fontes.
+
+    As opções de COMMON_FLAGS vão para todas as fontes. Uma opção prefixada com o nome da fonte
+    (ex.: --startupi.backfill, --startups.workers 4) vai apenas para ela, sem o prefixo, de modo que
+    uma opção exclusiva de uma fonte não faz o argparse das outras falhar.
+
+    :return: Tupla (argumentos comuns, argumentos de cada fonte).
+    :raises ValueError: Para uma opção que não é comum nem tem o prefixo de uma fonte conhecida.
+    """
+    common: List[str] = []
+    per_source: Dict[str, List[str]] = {name: [] for name in source_names}
+    target = common
+    for token in extra_argv:
+        if not token.startswith("--"):
+            # Valor da opção anterior
+            target.append(token)
+            continue
+        flag, separator, value = token.partition("=")
+        prefix, dot, option = flag[2:].partition(".")
+        if dot and prefix in per_source:
+            target = per_source[prefix]
+            flag = f"--{option}"
+        elif flag in COMMON_FLAGS:
+            target = common
+        else:
+            raise ValueError(
+                f"Opção {flag} não é aceita por todas as fontes; use o prefixo da fonte (ex.: --startupi.{flag[2:]})."
+            )
+        target.append(f"{flag}{separator}{value}")
+    return common, per_source
+
+
+def run_source(source: Source, extra_argv: List[str]) -> SourceResult:
+    """Executa o main() de uma fonte em um processo próprio, capturando qualquer falha."""
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(source.module)
+        counts = module.main([*source.argv, *extra_argv])
+        inserted, skipped = counts if counts else (0, 0)
+        return SourceResult(source.name, "ok", time.perf_counter() - start, inserted, skipped)
+    except SystemExit as e:
+        status = "ok" if e.code in (0, None) else "erro"
+        return SourceResult(source.name, status, time.perf_counter() - start, error=None if status == "ok" else f"exit {e.code}")
+    except Exception as e:
+        logging.exception(f"Falha na fonte {source.name}")
+        return SourceResult(source.name, "erro", time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+def run_all(
+    sources: List[Source],
+    extra_argv: List[str],
+    max_parallel: Optional[int] = None,
+    source_argv: Optional[Dict[str, List[str]]] = None,
+) -> List[SourceResult]:
+    """
+    Executa as fontes em paralelo, cada uma em seu próprio processo.
+
+    Uma fonte que falha não interrompe as demais, e o tempo total é o da fonte mais lenta.
+
+    :param sources: Fontes a executar.
+    :param extra_argv: Argumentos repassados a todas as fontes (ex.: --stream).
+    :param max_parallel: Máximo de fontes simultâneas (padrão: todas).
+    :param source_argv: Argumentos repassados apenas à fonte de cada nome (ver split_source_argv).
+    """
+    source_argv = source_argv or {}
+    results: Dict[str, SourceResult] = {}
+    # "spawn" garante que cada fonte comece sem os handlers de log do orquestrador e configure o próprio no main()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_parallel or len(sources), mp_context=context) as executor:
+        futures = {
+            executor.submit(run_source, source, [*extra_argv, *source_argv.get(source.name, [])]): source
+            for source in sources
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Ex.: o processo da fonte terminou abruptamente
+                result = SourceResult(source.name, "erro", 0.0, error=f"{type(e).__name__}: {e}")
+            results[source.name] = result
+            logging.info(f"Fonte {source.name} finalizada: {result.status} em {result.duration:.1f}s")
+    return [results[source.name] for source in sources]
+
+
+def print_summary(results: List[SourceResult], elapsed: float) -> None:
+    """Exibe o resumo consolidado da execução."""
+    lines = [
+        "",
+        f"{'Fonte':<20}{'Status':<8}{'Duração (s)':>12}{'Inseridos':>11}{'Ignorados':>11}  Erro",
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<20}{result.status:<8}{result.duration:>12.1f}{result.inserted:>11}{result.skipped:>11}  {result.error or ''}"
+        )
+    lines.append(f"Tempo total: {elapsed:.1f}s (soma das fontes: {sum(r.duration for r in results):.1f}s)")
+    logging.info("\n".join(lines))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # Configuração de logging feita aqui, e não na importação, para não ser herdada pelos
+    # processos das fontes, que reimportam este módulo e configuram o próprio arquivo de log no main()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("run_all.log"), logging.StreamHandler()]
+    )
+
+    source_names = [source.name for source in SOURCES]
+    parser = argparse.ArgumentParser(
+        description="Executa todas as fontes de notícias em paralelo.",
+        epilog=(
+            f"Opções repassadas a todas as fontes: {', '.join(sorted(COMMON_FLAGS))}. As opções de uma única "
+            "fonte levam o nome dela como prefixo, ex.: --startupi.backfill, --neofeed.fanout, --startups.workers 4."
+        ),
+    )
+    parser.add_argument("--sources", nargs="+", choices=source_names, default=source_names, help="Fontes a executar.")
+    parser.add_argument("--max-parallel", type=int, default=None, help="Máximo de fontes executadas ao mesmo tempo.")
+    args, extra_argv = parser.parse_known_args(argv)
+    try:
+        common_argv, source_argv = split_source_argv(extra_argv, source_names)
+    except ValueError as e:
+        parser.error(str(e))
+
+    sources = [source for source in SOURCES if source.name in args.sources]
+    start = time.perf_counter()
+    results = run_all(sources, common_argv, args.max_parallel, source_argv)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result.status == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import os
+from datetime import date
+from typing import Optional
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+# Os testes não gravam cache HTTP nem arquivo de páginas no diretório de trabalho
+os.environ["HTTP_CACHE_DIR"] = ""
+os.environ["PAGE_ARCHIVE_DIR"] = ""
+
+from benchmarks.stub_server import load_routes, render  # noqa: E402
+
+FIXTURES_BASE = "http://fixtures"
+
+
+class FixtureClient:
+    """Cliente HTTP sem rede que responde com as páginas gravadas em benchmarks/fixtures, como o StubServer."""
+
+    def __init__(self) -> None:
+        self.routes = load_routes()
+        self.requested = []
+
+    def html(self, path: str) -> Optional[str]:
+        today = date.today()
+        for pattern, template in self.routes:
+            match = pattern.match(path)
+            if match:
+                variables = {
+                    "BASE": FIXTURES_BASE,
+                    "YEAR": str(today.year),
+                    "YEAR2": f"{today.year % 100:02d}",
+                    **{name.upper(): value for name, value in match.groupdict(default="1").items()},
+                }
+                return render(template, variables)
+        return None
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        self.requested.append(url)
+        body = self.html(urlsplit(url).path)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200 if body is not None else 404
+        response._content = body.encode("utf-8") if body is not None else b""
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        return response
+
+    def set_cache_policy(self, pattern: str, ttl: Optional[float]) -> None:
+        pass
+
+
+@pytest.fixture
+def fixture_client() -> FixtureClient:
+    return FixtureClient()
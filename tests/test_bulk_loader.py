@@ -0,0 +1,69 @@
+from common.bulk_loader import bulk_upsert
+
+
+class FakeCursor:
+    """Registra as consultas e o CSV enviado pelo COPY."""
+
+    def __init__(self):
+        self.queries = []
+        self.copied = ""
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def copy_expert(self, query, stream):
+        self.queries.append(query)
+        self.copied = stream.read()
+
+    def fetchall(self):
+        return [(False,)]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_ = FakeCursor()
+
+    def cursor(self):
+        return self.cursor_
+
+    def commit(self):
+        pass
+
+
+def test_last_row_of_a_repeated_key_wins():
+    conn = FakeConnection()
+    rows = [("Título antigo", "k1", "c1"), ("Título novo", "k1", "c2")]
+
+    bulk_upsert(
+        conn, "noticias", ["titulo", "hash_chave", "hash_conteudo"], rows,
+        conflict_columns=["hash_chave"], update_columns=["titulo", "hash_conteudo"], change_column="hash_conteudo",
+    )
+
+    queries = conn.cursor_.queries
+    # A posição de cada linha vem da sequência da coluna extra, preenchida na ordem do COPY
+    assert any("ADD COLUMN _ordem BIGSERIAL" in query for query in queries)
+    assert conn.cursor_.copied.splitlines() == ['"Título antigo","k1","c1"', '"Título novo","k1","c2"']
+    insert = next(query for query in queries if query.startswith("INSERT"))
+    assert "SELECT DISTINCT ON (hash_chave)" in insert
+    assert "ORDER BY hash_chave, _ordem DESC" in insert
+
+
+def test_rewritten_rows_lose_their_cluster():
+    from Neofeed.scrape_neofeed_news import TABLE_SPEC
+
+    conn = FakeConnection()
+    options = TABLE_SPEC.upsert_options(update_changed=True)
+    bulk_upsert(conn, "neofeed", TABLE_SPEC.stored_columns, [], **options)
+
+    insert = next(query for query in conn.cursor_.queries if query.startswith("INSERT"))
+    assert "cluster_id = DEFAULT" in insert
+    assert "atualizado_em = DEFAULT" in insert
+    assert "WHERE neofeed.hash_conteudo IS DISTINCT FROM EXCLUDED.hash_conteudo" in insert
+    assert TABLE_SPEC.upsert_options(update_changed=False)["reset_columns"] is None
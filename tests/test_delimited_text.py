@@ -0,0 +1,89 @@
+"""
+A extração em streaming do Fusões (DelimitedTextExtractor) deve devolver o mesmo texto que o BeautifulSoup
+(_extract_soup), qualquer que seja o tamanho dos pedaços de HTML e mesmo com os delimitadores divididos em
+vários nós de texto.
+"""
+from typing import List
+
+import pytest
+import requests
+
+from conftest import FIXTURES_BASE
+from Fusoes_Aquisicoes import scrape_fusoes_aquisicoes as fusoes
+
+CHUNK_SIZES = [1, 2, 7, 64, fusoes.CONTENT_CHUNK_SIZE]
+
+# Delimitadores quebrados entre tags, comentários e entidades, com texto ignorado (script) no meio
+SPLIT_DELIMITERS = f"""
+<html><body>
+<div class="{fusoes.CONTENT_CLASS}">
+  <p>Cabeçalho descartado</p>
+  <h3>INSIGHT D<b>O DIA: Hum</b><!-- x -->ores &amp; Ru<i>mores</i></h3>
+  <p>Primeiro parágrafo com acentuação &eacute; e &lt;entidades&gt;.</p>
+  <script>var ignorado = "Saiba quais são as mais recentes";</script>
+  <div><p>Parágrafo aninhado</p></div>
+  <p>Saiba quais são as mais rec<span>entes</span><a href="/x/">postagens de humores e rumores</a>do mercado</p>
+  <p>Rodapé descartado</p>
+</div>
+<div class="{fusoes.CONTENT_CLASS}"><p>Segunda div ignorada</p></div>
+</body></html>
+"""
+
+WITHOUT_START = f"""
+<div class="{fusoes.CONTENT_CLASS}"><p>Texto sem o delimitador inicial</p>
+<p>Saiba quais são as mais recentes<a>postagens de humores e rumores</a>do mercado</p><p>Fim</p></div>
+"""
+
+WITHOUT_CONTENT = "<html><body><div class='outra'><p>INSIGHT DO DIA: Humores &amp; Rumores</p></div></body></html>"
+
+
+class StaticClient:
+    """Cliente HTTP que responde a qualquer URL com o mesmo HTML."""
+
+    def __init__(self, html: str) -> None:
+        self.body = html.encode("utf-8")
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        response._content = self.body
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        return response
+
+    def set_cache_policy(self, pattern: str, ttl) -> None:
+        pass
+
+
+def extract_both(monkeypatch, http, url: str, chunk_size: int) -> List[str]:
+    """Extrai o artigo nos dois modos; o streaming é o padrão do scraper."""
+    monkeypatch.setattr(fusoes, "CONTENT_CHUNK_SIZE", chunk_size)
+    streaming = fusoes.NewsScraper(f"{FIXTURES_BASE}/fusoes_aquisicoes/destaques-do-dia/page/", http=http)
+    soup = fusoes.NewsScraper(streaming.base_url, streaming_extraction=False, http=http)
+    assert streaming.streaming_extraction
+    return [streaming.extract_full_content(url), soup.extract_full_content(url)]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_fixture_article(monkeypatch, fixture_client, chunk_size):
+    url = f"{FIXTURES_BASE}/fusoes_aquisicoes/destaque/artigo-1/"
+    streamed, parsed = extract_both(monkeypatch, fixture_client, url, chunk_size)
+
+    assert streamed and streamed != "Conteúdo não encontrado"
+    assert fusoes.START_DELIMITER not in streamed
+    assert streamed == parsed
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("html", [SPLIT_DELIMITERS, WITHOUT_START, WITHOUT_CONTENT], ids=["split", "sem-inicio", "sem-div"])
+def test_split_delimiters(monkeypatch, chunk_size, html):
+    streamed, parsed = extract_both(monkeypatch, StaticClient(html), "http://fixtures/artigo/", chunk_size)
+
+    assert streamed == parsed
+
+
+def test_split_delimiters_text(monkeypatch):
+    streamed, _ = extract_both(monkeypatch, StaticClient(SPLIT_DELIMITERS), "http://fixtures/artigo/", 3)
+
+    assert streamed == "Primeiro parágrafo com acentuação é e <entidades>.Parágrafo aninhado"
@@ -0,0 +1,131 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+
+from analytics import export_parquet
+from analytics.export_parquet import ParquetExporter, SourceTable
+
+SOURCE = SourceTable("neofeed")
+
+
+class FakeDatabase:
+    """Linhas (id, titulo, resumo, termo, data, atualizado_em) e o relógio do banco."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.now = datetime(2024, 7, 1, 12, tzinfo=timezone.utc)
+        self.queries = []
+
+    def tick(self, hours=2):
+        self.now += timedelta(hours=hours)
+
+
+class FakeCursor:
+    """Responde às consultas do exportador a partir das linhas em memória."""
+
+    def __init__(self, database):
+        self.database = database
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.database.queries.append(query)
+        rows = self.database.rows
+        if query == "SELECT NOW()":
+            self.result = [(self.database.now,)]
+        elif "atualizado_em >" in query:
+            since, last_id = params
+            since = datetime.fromisoformat(since) - timedelta(hours=1)
+            self.result = [row[:5] for row in rows if row[5] > since and row[0] <= last_id]
+        else:
+            (last_id,) = params
+            self.result = [row[:5] for row in rows if row[0] > last_id]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchmany(self, size):
+        rows, self.result = self.result[:size], self.result[size:]
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def cursor(self, name=None):
+        return FakeCursor(self.database)
+
+
+def exported_rows(root):
+    table = pq.read_table(root).select(["id", "resumo"]).to_pylist()
+    return sorted(table, key=lambda row: row["id"])
+
+
+def export(root, database, **kwargs):
+    exporter = ParquetExporter(str(root), chunk_rows=1, **kwargs)
+    return exporter.export_source(SOURCE)
+
+
+def test_rows_rewritten_in_place_replace_the_exported_copy(monkeypatch, tmp_path):
+    database = FakeDatabase([])
+    database.rows = [
+        (1, "Aporte A", "resumo antigo", "Aporte", date(2024, 5, 1), database.now - timedelta(days=1)),
+        (2, "Aporte B", "resumo B", "Aporte", date(2024, 6, 1), database.now - timedelta(days=1)),
+    ]
+    monkeypatch.setattr(export_parquet, "DatabaseConnection", lambda: FakeConnection(database))
+
+    assert export(tmp_path, database) == 2
+    database.tick()
+    assert export(tmp_path, database) == 0
+
+    # --update-changed regrava a linha 1 mantendo o id, e o DO UPDATE renova atualizado_em
+    database.tick()
+    database.rows[0] = (1, "Aporte A", "resumo novo", "Aporte", date(2024, 5, 1), database.now)
+    database.rows.append((3, "Aporte C", "resumo C", "Aporte", date(2024, 5, 2), database.now))
+    database.tick()
+    assert export(tmp_path, database) == 2
+
+    assert exported_rows(tmp_path) == [
+        {"id": 1, "resumo": "resumo novo"},
+        {"id": 2, "resumo": "resumo B"},
+        {"id": 3, "resumo": "resumo C"},
+    ]
+
+
+def test_incremental_export_never_scans_the_exported_range(monkeypatch, tmp_path):
+    database = FakeDatabase([])
+    database.rows = [(1, "Aporte A", "resumo A", "Aporte", date(2024, 5, 1), database.now)]
+    monkeypatch.setattr(export_parquet, "DatabaseConnection", lambda: FakeConnection(database))
+
+    export(tmp_path, database)
+    database.tick()
+    database.queries.clear()
+    export(tmp_path, database)
+
+    assert not any("md5" in query or "string_agg" in query for query in database.queries)
+    assert any("atualizado_em >" in query for query in database.queries)
+
+
+def test_full_refresh_rewrites_the_source(monkeypatch, tmp_path):
+    database = FakeDatabase([])
+    database.rows = [(1, "Aporte A", "resumo A", "Aporte", date(2024, 5, 1), database.now)]
+    monkeypatch.setattr(export_parquet, "DatabaseConnection", lambda: FakeConnection(database))
+
+    export(tmp_path, database)
+    assert export(tmp_path, database, full_refresh=True) == 1
+    assert exported_rows(tmp_path) == [{"id": 1, "resumo": "resumo A"}]
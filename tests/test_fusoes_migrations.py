@@ -0,0 +1,38 @@
+from Fusoes_Aquisicoes import scrape_fusoes_aquisicoes as fusoes
+
+
+class FakeCursor:
+    def __init__(self, lz4: bool) -> None:
+        self.lz4 = lz4
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def fetchone(self):
+        return (1,) if self.lz4 else None
+
+
+def test_failed_compression_migration_does_not_stop_the_next_ones(monkeypatch):
+    applied = []
+
+    def apply_migration(name, migration):
+        if name.endswith("_0002_comprime_resumo"):
+            raise RuntimeError('compression method lz4 not supported')
+        applied.append(name[len(fusoes.TABLE_NAME) + 1:][:4])
+        return True
+
+    monkeypatch.setattr(fusoes, "apply_migration", apply_migration)
+    fusoes.NewsScraper("http://fixtures/")._setup_database()
+
+    assert applied == ["0001", "0003", "0004", "0005", "0006"]
+
+
+def test_compression_is_skipped_on_servers_without_lz4():
+    cursor = FakeCursor(lz4=False)
+    fusoes.NewsScraper._compress_resumo(cursor)
+    assert not any("SET COMPRESSION" in query for query in cursor.queries)
+
+    cursor = FakeCursor(lz4=True)
+    fusoes.NewsScraper._compress_resumo(cursor)
+    assert "SET COMPRESSION lz4" in cursor.queries[-1]
@@ -0,0 +1,112 @@
+import itertools
+
+from common import near_duplicates
+from common.near_duplicates import DEDUP_TABLES, NearDuplicateIndex
+
+# Modelo do ranking do Startupi: só a empresa e o valor mudam de um aporte para o outro
+DEAL_TEXT = "A startup {} recebeu um aporte de R$ {} milhões em rodada liderada por fundos de venture capital."
+
+
+class FakeCursor:
+    """Devolve o lote pendente e sequências de cluster; nenhuma linha já agrupada no banco."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.sequence = itertools.count(1)
+        self.result = None
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.queries.append((" ".join(query.split()), params))
+        if "nextval" in query:
+            self.result = [(next(self.sequence),)]
+        elif "WHERE cluster_id IS NULL" in query:
+            self.result = self.rows
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+
+def assign_clusters(monkeypatch, rows, cursor=None):
+    """Agrupa as linhas de startupi_deals e devolve o cluster de cada id."""
+    stored = {}
+    cursor = cursor or FakeCursor(rows)
+
+    def execute_values(cursor, query, values, page_size=None):
+        if query.startswith("UPDATE"):
+            stored.update(values)
+
+    monkeypatch.setattr(near_duplicates, "execute_values", execute_values)
+    monkeypatch.setattr(near_duplicates, "DatabaseConnection", lambda: FakeConnection(cursor))
+    index = NearDuplicateIndex.__new__(NearDuplicateIndex)
+    index._assign_batch(DEDUP_TABLES["startupi_deals"])
+    return stored
+
+
+def test_distinct_deals_with_boilerplate_text_stay_in_separate_clusters(monkeypatch):
+    rows = [
+        (1, DEAL_TEXT.format("Acme", 10), "Acme|10000000|2023-05-01"),
+        (2, DEAL_TEXT.format("Acma", 12), "Acma|12000000|2023-05-01"),
+        (3, DEAL_TEXT.format("Beta", 10), "Beta|10000000|2023-06-01"),
+    ]
+    assert near_duplicates.similarity(
+        near_duplicates.minhash(rows[0][1]), near_duplicates.minhash(rows[1][1])
+    ) >= near_duplicates.SIMILARITY_THRESHOLD
+
+    clusters = assign_clusters(monkeypatch, rows)
+
+    assert len(set(clusters.values())) == 3
+
+
+def test_same_deal_listed_twice_shares_a_cluster(monkeypatch):
+    rows = [
+        (1, DEAL_TEXT.format("Acme", 10), "Acme|10000000|2023-05-01"),
+        (2, DEAL_TEXT.format("Acme", 10) + " ", "ACME|10000000|2023-05-01"),
+    ]
+
+    clusters = assign_clusters(monkeypatch, rows)
+
+    assert clusters[1] == clusters[2]
+
+
+def test_rewritten_rows_drop_their_old_signature_before_regrouping(monkeypatch):
+    rows = [(7, DEAL_TEXT.format("Acme", 10), "Acme|10000000|2023-05-01")]
+    cursor = FakeCursor(rows)
+
+    assign_clusters(monkeypatch, rows, cursor)
+
+    statements = [query for query, _ in cursor.queries]
+    deletes = [(query, params) for query, params in cursor.queries if query.startswith("DELETE")]
+    assert [params for _, params in deletes] == [("startupi_deals", [7]), ("startupi_deals", [7])]
+    assert {query.split()[2] for query, _ in deletes} == {"near_duplicate_bands", "near_duplicate_signatures"}
+    # As assinaturas antigas somem antes da busca de candidatas
+    first_candidates = next(i for i, query in enumerate(statements) if "JOIN unnest" in query)
+    assert all(statements.index(query) < first_candidates for query, _ in deletes)
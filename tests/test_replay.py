@@ -0,0 +1,36 @@
+from conftest import FIXTURES_BASE
+from common.http_client import ArchiveClient
+from common.page_archive import PageArchive
+from Fusoes_Aquisicoes import scrape_fusoes_aquisicoes as fusoes
+
+BASE_URL = f"{FIXTURES_BASE}/fusoes_aquisicoes/destaques-do-dia/page/"
+
+
+def test_fusoes_replay_drops_news_whose_article_was_not_archived(fixture_client, tmp_path):
+    listing_url = f"{BASE_URL}1/"
+    live = fusoes.NewsScraper(BASE_URL, incremental=False, skip_known=False, http=fixture_client)
+    live_news = live.parse_listing(fixture_client.get(listing_url).text)
+    article_urls = fixture_client.requested[1:]
+    assert len(live_news) == len(article_urls) > 1
+
+    # A listagem e todos os artigos menos o primeiro foram arquivados na coleta
+    archive = PageArchive(str(tmp_path))
+    for url in [listing_url, *article_urls[1:]]:
+        archive.put(url, fixture_client.get(url))
+
+    replayed = fusoes.NewsScraper(
+        BASE_URL, incremental=False, skip_known=False, update_changed=True, http=ArchiveClient(archive)
+    ).parse_archived_listing(archive.response(archive.latest(listing_url)))
+
+    # Sem a linha do artigo ausente, o upsert da reprodução não tem como sobrescrever o resumo já gravado
+    assert replayed == live_news[1:]
+    assert all(body for _, body, _ in replayed)
+
+
+def test_fusoes_live_scrape_keeps_news_whose_article_failed(fixture_client):
+    scraper = fusoes.NewsScraper(BASE_URL, incremental=False, skip_known=False, http=fixture_client)
+    scraper.extract_full_content = lambda url: None
+
+    news = scraper.parse_listing(fixture_client.get(f"{BASE_URL}1/").text)
+
+    assert news and all(body == "" for _, body, _ in news)
@@ -0,0 +1,41 @@
+import importlib
+import inspect
+
+import pytest
+
+from run_all import COMMON_FLAGS, SOURCES, split_source_argv
+
+SOURCE_NAMES = [source.name for source in SOURCES]
+
+
+def test_common_flags_go_to_every_source():
+    common, per_source = split_source_argv(["--stream", "--batch-size", "50", "--replay"], SOURCE_NAMES)
+
+    assert common == ["--stream", "--batch-size", "50", "--replay"]
+    assert all(argv == [] for argv in per_source.values())
+
+
+def test_prefixed_flags_go_only_to_their_source():
+    common, per_source = split_source_argv(
+        ["--startupi.backfill", "--stream", "--startups.workers", "4", "--neofeed.fanout", "--startupi.workers=2"],
+        SOURCE_NAMES,
+    )
+
+    assert common == ["--stream"]
+    assert per_source["startupi"] == ["--backfill", "--workers=2"]
+    assert per_source["startups"] == ["--workers", "4"]
+    assert per_source["neofeed"] == ["--fanout"]
+    assert per_source["fusoes_aquisicoes"] == []
+
+
+def test_source_specific_flag_without_prefix_is_rejected():
+    with pytest.raises(ValueError, match="--startupi.backfill"):
+        split_source_argv(["--backfill"], SOURCE_NAMES)
+
+
+def test_every_source_accepts_the_common_flags():
+    """Cada opção comum precisa existir no main() de todas as fontes, senão o argparse delas sai com status 2."""
+    for source in SOURCES:
+        module_source = inspect.getsource(importlib.import_module(source.module).main)
+        for flag in COMMON_FLAGS:
+            assert f'"{flag}"' in module_source, f"{source.name} não aceita {flag}"
@@ -0,0 +1,60 @@
+import logging
+
+from benchmarks import run_benchmarks
+
+
+def test_scraper_that_swallows_a_database_error_fails_the_benchmark(monkeypatch):
+    def failing_runner(base_url, pages):
+        logging.error("Erro ao inserir dados no banco de dados: connection refused")
+        return 0, 0
+
+    monkeypatch.setitem(run_benchmarks.RUNNERS, "startups", failing_runner)
+    result = run_benchmarks.run_benchmark("startups", "http://fixtures", 1)
+
+    assert result.logged_errors == 1
+    assert result.error == "nenhuma linha gravada (1 erros no log)"
+
+
+def test_rows_already_stored_count_as_success(monkeypatch):
+    monkeypatch.setitem(run_benchmarks.RUNNERS, "startups", lambda base_url, pages: (0, 12))
+    result = run_benchmarks.run_benchmark("startups", "http://fixtures", 1)
+
+    assert result.error is None
+
+
+class RecordingConnection:
+    """Conexão falsa que registra as consultas e o POSTGRES_SCHEMA visto em cada uma."""
+
+    queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def commit(self):
+        pass
+
+
+def test_benchmark_tables_live_in_a_throwaway_schema(monkeypatch):
+    from config import db_connection
+
+    RecordingConnection.queries = []
+    monkeypatch.setattr(db_connection, "DatabaseConnection", RecordingConnection)
+    monkeypatch.setattr(db_connection, "close_pool", lambda: None)
+    monkeypatch.delenv("POSTGRES_SCHEMA", raising=False)
+    monkeypatch.setattr(db_connection, "_load_env", lambda: None)
+
+    with run_benchmarks.isolated_schema() as schema:
+        assert schema.startswith(run_benchmarks.SCHEMA_PREFIX)
+        assert db_connection._connection_config()["options"] == f"-c search_path={schema}"
+
+    assert "options" not in db_connection._connection_config()
+    assert RecordingConnection.queries == [f"CREATE SCHEMA {schema}", f"DROP SCHEMA {schema} CASCADE"]
@@ -0,0 +1,25 @@
+from datetime import date, datetime
+
+from common.crawl_state import HighWaterMark
+from Startupi import scrape_startupi_investments as startupi
+
+
+class FakeCrawlState:
+    """Estado de coleta em que o ranking do ano anterior já foi ingerido."""
+
+    def __init__(self, table_name):
+        pass
+
+    def get(self, termo=""):
+        return HighWaterMark(data=date(datetime.now().year - 1, 12, 1))
+
+
+def test_last_year_is_fetched_again_after_it_was_ingested(monkeypatch, fixture_client):
+    monkeypatch.setattr(startupi, "CrawlState", FakeCrawlState)
+    monkeypatch.setattr(startupi, "NearDuplicateIndex", lambda: None)
+    monkeypatch.setattr(startupi.InvestmentScraper, "_setup_database", lambda self: None)
+
+    scraper = startupi.InvestmentScraper(http=fixture_client)
+    scraper._prepare_database()
+
+    assert scraper.start_year == scraper.end_year == datetime.now().year - 1
@@ -0,0 +1,95 @@
+"""
+Os parsers montam apenas a subárvore necessária (Strainer); estes testes garantem que, nas páginas gravadas
+em benchmarks/fixtures, os campos extraídos são os mesmos que com o documento inteiro, no mesmo backend e no
+html.parser, a referência do parser nativo do Python.
+"""
+import pytest
+
+from conftest import FIXTURES_BASE
+from Fusoes_Aquisicoes import scrape_fusoes_aquisicoes as fusoes
+from Neofeed import scrape_neofeed_news as neofeed
+from Startupi import scrape_startupi_investments as startupi
+from Startups import scrape_startups_news as startups
+
+
+def without_strainers(monkeypatch, module, *names):
+    """Troca os Strainers do módulo por None, fazendo make_soup montar o documento inteiro."""
+    for name in names:
+        monkeypatch.setattr(module, name, None)
+
+
+def reference(monkeypatch, parse):
+    """Resultado de parse() com o documento inteiro montado pelo html.parser."""
+    monkeypatch.setattr("common.html_parser.PARSER_BACKEND", "html.parser")
+    return parse()
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_startups_listing(monkeypatch, fixture_client, backend):
+    monkeypatch.setattr("common.html_parser.PARSER_BACKEND", backend)
+    scraper = startups.NewsScraper(
+        base_url=f"{FIXTURES_BASE}/startups/ultimas-noticias/page/", max_workers=1, http=fixture_client
+    )
+    html = fixture_client.get(f"{scraper.base_url}1/").content
+
+    strained, _ = scraper.parse_listing(html, 1)
+    without_strainers(monkeypatch, startups, "LISTING_STRAINER", "DATE_STRAINER")
+    full, _ = scraper.parse_listing(html, 1)
+    expected, _ = reference(monkeypatch, lambda: scraper.parse_listing(html, 1))
+
+    assert strained
+    assert strained == full
+    assert strained == expected
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_neofeed_listing(monkeypatch, fixture_client, backend):
+    monkeypatch.setattr("common.html_parser.PARSER_BACKEND", backend)
+    scraper = neofeed.NewsScraper(http=fixture_client)
+    html = fixture_client.get(f"{FIXTURES_BASE}/neofeed/?s=Aporte").text
+
+    strained = scraper.parse_listing(html)
+    without_strainers(monkeypatch, neofeed, "ARTICLE_STRAINER")
+    full = scraper.parse_listing(html)
+    expected = reference(monkeypatch, lambda: scraper.parse_listing(html))
+
+    assert strained
+    assert strained == full
+    assert strained == expected
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_startupi_months_and_deals(monkeypatch, fixture_client, backend):
+    monkeypatch.setattr("common.html_parser.PARSER_BACKEND", backend)
+    scraper = startupi.InvestmentScraper(http=fixture_client)
+    html = fixture_client.get(f"{FIXTURES_BASE}/startupi/ranking-investimentos-2023/").text
+
+    def parse():
+        return scraper.parse_content(html, 2023), scraper.parse_deals(html, 2023)
+
+    strained = parse()
+    without_strainers(monkeypatch, startupi, "TABS_STRAINER")
+    full = parse()
+    expected = reference(monkeypatch, parse)
+
+    assert strained[0] and strained[1]
+    assert strained == full
+    assert strained == expected
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_fusoes_listing_and_article(monkeypatch, fixture_client, backend):
+    monkeypatch.setattr("common.html_parser.PARSER_BACKEND", backend)
+    base_url = f"{FIXTURES_BASE}/fusoes_aquisicoes/destaques-do-dia/page/"
+    scraper = fusoes.NewsScraper(base_url, streaming_extraction=False, http=fixture_client)
+    html = fixture_client.get(f"{base_url}1/").text
+
+    strained = scraper.parse_listing(html)
+    without_strainers(monkeypatch, fusoes, "ARTICLE_STRAINER", "CONTENT_STRAINER")
+    full = scraper.parse_listing(html)
+    expected = reference(monkeypatch, lambda: scraper.parse_listing(html))
+
+    assert strained
+    assert all(body and body != "Conteúdo não encontrado" for _, body, _ in strained)
+    assert strained == full
+    assert strained == expected